@@ -0,0 +1,72 @@
+"""
+Measure the overhead of the request and dependency metrics, see
+ska_oso_pht_services.utils.metrics:
+
+    python scripts/metrics_overhead.py
+
+Prints the time taken to record a request and to time a dependency call,
+with the metrics kept in memory only and shared through a directory as under
+gunicorn, and the time taken to render the metrics of several workers.
+"""
+
+import os
+import tempfile
+import timeit
+
+from ska_oso_pht_services.utils.metrics import Metrics
+
+NUMBER = 100_000
+WORKERS = 9
+
+
+def record_request(metrics: Metrics) -> None:
+    metrics.start_request("proposal_get")
+    metrics.end_request("proposal_get", 200, 0.01)
+
+
+def time_dependency(metrics: Metrics) -> None:
+    with metrics.time_dependency("oda"):
+        pass
+
+
+def report(name: str, seconds: float, number: int) -> None:
+    print(f"{name:<40} {seconds / number * 1e6:8.2f} us")
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        for label, metrics in (
+            ("in memory", Metrics()),
+            ("shared", Metrics(directory=directory)),
+        ):
+            report(
+                f"record a request, {label}",
+                timeit.timeit(lambda m=metrics: record_request(m), number=NUMBER),
+                NUMBER,
+            )
+            report(
+                f"time a dependency call, {label}",
+                timeit.timeit(lambda m=metrics: time_dependency(m), number=NUMBER),
+                NUMBER,
+            )
+
+        # The files of the other workers, with as many operations as the API
+        for worker in range(WORKERS - 1):
+            other = Metrics(directory=directory)
+            for operation in range(30):
+                other.start_request(f"operation_{operation}")
+                other.end_request(f"operation_{operation}", 200, 0.01)
+            other.flush()
+            os.replace(
+                os.path.join(directory, f"{os.getpid()}.json"),
+                os.path.join(directory, f"{worker}.json"),
+            )
+        report(
+            f"render the metrics of {WORKERS} workers",
+            timeit.timeit(metrics.render, number=100),
+            100,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,29 +2,128 @@
 ska_oso_pht_services
 """
 
+import hashlib
+import json
+import logging
 import os
-from typing import Any, Dict
+import tempfile
+import time
+from typing import Any, Dict, Optional
 
 import yaml
 from connexion import App
-from flask import Flask, Response
+from flask import Flask, Response, g, request
 from openapi_spec_validator import validate_spec
 
 from ska_oso_pht_services.flaskoda import oda
+from ska_oso_pht_services.utils import profiling
+from ska_oso_pht_services.utils.metrics import METRICS
+from ska_oso_pht_services.utils.response_cache import ProposalResponseCache
+from ska_oso_pht_services.utils.validation_session import ValidationSessions
 
 KUBE_NAMESPACE = os.getenv("KUBE_NAMESPACE", "ska-oso-pht-services")
 API_PATH = f"/{KUBE_NAMESPACE}/pht/api/v2"
 
 
+# Directory holding the parsed OpenAPI spec, so that process starts after the
+# first one skip parsing the YAML and validating it. The image writes the cache
+# when it is built, so that it is there from the first start of a pod.
+OPENAPI_SPEC_CACHE_DIR = os.getenv(
+    "OPENAPI_SPEC_CACHE_DIR", os.path.join(tempfile.gettempdir(), "pht-openapi")
+)
+OPENAPI_SPEC_CACHE = os.getenv("OPENAPI_SPEC_CACHE", "true").lower() == "true"
+# Skip the validation of the spec, e.g. in production where the spec shipped
+# with the image has already been validated by the tests
+OPENAPI_SKIP_VALIDATION = (
+    os.getenv("OPENAPI_SKIP_VALIDATION", "false").lower() == "true"
+)
+
+# Import astropy/astroquery when the app is created rather than on the first
+# coordinates request. With the app preloaded by gunicorn this is done once
+# and shared by the workers.
+COORDINATES_EAGER_INIT = os.getenv("COORDINATES_EAGER_INIT", "false").lower() == "true"
+
+LOGGER = logging.getLogger(__name__)
+
+
 def resolve_openapi_spec() -> Dict[str, Any]:
+    """
+    Return the OpenAPI spec of the service.
+
+    The spec is loaded from the cache if it holds a copy for the current
+    content of the openapi directory, otherwise it is parsed from the YAML,
+    validated unless OPENAPI_SKIP_VALIDATION is set and then cached.
+    Validation only needs to run once per content of the directory, e.g.
+    when the image is built, so the cache is written either way.
+    """
+    start = time.perf_counter()
     cwd, _ = os.path.split(__file__)
-    path = os.path.join(cwd, "./openapi/pht-openapi-v1.yaml")
+    openapi_dir = os.path.join(cwd, "openapi")
+    cache_path = os.path.join(
+        OPENAPI_SPEC_CACHE_DIR, f"pht-openapi-{_spec_hash(openapi_dir)}.json"
+    )
+
+    specification = _load_cached_spec(cache_path) if OPENAPI_SPEC_CACHE else None
+    if specification is not None:
+        LOGGER.info(
+            "Loaded cached OpenAPI spec in %.1f ms",
+            (time.perf_counter() - start) * 1000,
+        )
+        return specification
+
+    path = os.path.join(openapi_dir, "pht-openapi-v1.yaml")
     with open(path, "r", encoding="utf-8") as file:
         specification = yaml.safe_load(file)
-    validate_spec(specification)
+    if not OPENAPI_SKIP_VALIDATION:
+        validate_spec(specification)
+    if OPENAPI_SPEC_CACHE:
+        _store_cached_spec(cache_path, specification)
+    LOGGER.info("Loaded OpenAPI spec in %.1f ms", (time.perf_counter() - start) * 1000)
     return specification
 
 
+def _spec_hash(openapi_dir: str) -> str:
+    # Hash every file in the directory, as the spec may $ref the others
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(openapi_dir)):
+        path = os.path.join(openapi_dir, name)
+        if not os.path.isfile(path):
+            continue
+        digest.update(name.encode())
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:32]
+
+
+def _load_cached_spec(cache_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(cache_path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_cached_spec(cache_path: str, specification: Dict[str, Any]) -> None:
+    # Only specs which survive the round trip to JSON unchanged can be cached,
+    # e.g. not ones with integer keys or dates
+    try:
+        serialised = json.dumps(specification)
+    except (TypeError, ValueError):
+        return
+    if json.loads(serialised) != specification:
+        return
+    try:
+        os.makedirs(OPENAPI_SPEC_CACHE_DIR, exist_ok=True)
+        # Write to a temporary file first, as several workers may start at once
+        with tempfile.NamedTemporaryFile(
+            "w", dir=OPENAPI_SPEC_CACHE_DIR, delete=False, encoding="utf-8"
+        ) as file:
+            file.write(serialised)
+        os.replace(file.name, cache_path)
+    except OSError:
+        LOGGER.warning("Could not cache the OpenAPI spec in %s", cache_path)
+
+
 class CustomRequestBodyValidator:  # pylint: disable=too-few-public-methods
     """
         There is a (another) issue with Connection where it cannot validate against a
@@ -55,12 +154,57 @@ def set_default_headers_on_response(response: Response) -> Response:
     response.headers[
         "Access-Control-Allow-Methods"
     ] = "*"  # solves PUT request issue from frontend
+    # solves POST request issue from frontend, If-None-Match is needed for
+    # conditional GET requests, If-Match for incremental validation and
+    # X-Profile to request profiling
     response.headers[
         "Access-Control-Allow-Headers"
-    ] = "Content-Type, Authorization"  # solves POST request issue from frontend
+    ] = "Content-Type, Authorization, If-None-Match, If-Match, X-Profile"
+    # allows the frontend to read the ETag for conditional GET requests, the
+    # cursor of the next page of a proposal list and the id of a profile
+    response.headers[
+        "Access-Control-Expose-Headers"
+    ] = "ETag, X-Next-Cursor, X-Profile-Id"
+    return response
+
+
+def _operation_name(endpoint: Optional[str]) -> str:
+    # Connexion names the endpoints <blueprint>.<operationId with _ for .>
+    if endpoint is None:
+        return "unknown"
+    return endpoint.rsplit(".", 1)[-1].removeprefix("ska_oso_pht_services_api_")
+
+
+def start_request_metrics() -> None:
+    """
+    Record the start of a request in the metrics
+    """
+    g.metrics_operation = _operation_name(request.endpoint)
+    g.metrics_start = time.perf_counter()
+    METRICS.start_request(g.metrics_operation)
+
+
+def record_response_status(response: Response) -> Response:
+    """
+    Keep the status of the response for the request metrics
+    """
+    g.metrics_status = response.status_code
     return response
 
 
+def end_request_metrics(_exc=None) -> None:
+    """
+    Record the end of a request in the metrics. Runs even if the request
+    failed with an unhandled exception.
+    """
+    if "metrics_start" in g:
+        METRICS.end_request(
+            g.metrics_operation,
+            g.get("metrics_status", 500),
+            time.perf_counter() - g.metrics_start,
+        )
+
+
 def create_app(open_api_spec=None) -> App:
     """
     Create the Connection application with required config
@@ -86,6 +230,23 @@ def create_app(open_api_spec=None) -> App:
 
     oda.init_app(app.app)
 
+    # Import and configure astroquery here or on the first coordinates
+    # request. Each thread then configures its own SIMBAD/NED query objects
+    # once rather than per request.
+    if COORDINATES_EAGER_INIT:
+        # pylint: disable=import-outside-toplevel
+        from ska_oso_pht_services.utils import coordinates
+
+        coordinates.init_resolvers()
+
+    app.app.extensions["proposal_cache"] = ProposalResponseCache()
+    app.app.extensions["validation_sessions"] = ValidationSessions()
+
     app.app.after_request(set_default_headers_on_response)
+    app.app.after_request(profiling.add_profile_id_header)
+
+    app.app.before_request(start_request_metrics)
+    app.app.after_request(record_response_status)
+    app.app.teardown_request(end_request_metrics)
 
     return app
@@ -3,17 +3,19 @@ These functions map to the API paths, with the returned value being the API resp
 
 Connexion maps the function name to the operationId in the OpenAPI document path
 """
+import base64
+import binascii
 import json
 import logging
 import os.path
-import smtplib
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+import sys
+from bisect import bisect_right
 from functools import wraps
 from http import HTTPStatus
+from typing import Optional
 
-from astroquery.exceptions import RemoteServiceError
-from flask import jsonify, request
+from flask import Response as FlaskResponse
+from flask import current_app, jsonify, request, stream_with_context
 from ska_db_oda.persistence.domain.query import MatchType, UserQuery
 from ska_oso_pdm import Proposal
 
@@ -23,12 +25,45 @@ from ska_oso_pht_services.connectors.pht_handler import (
     transform_update_proposal,
 )
 from ska_oso_pht_services.flaskoda import oda
-from ska_oso_pht_services.utils import coordinates, s3_bucket, validation
+from ska_oso_pht_services.utils import (
+    batch_validation,
+    email_delivery,
+    json_patch,
+    profiling,
+    s3_bucket,
+    validation,
+)
+from ska_oso_pht_services.utils.metrics import CONTENT_TYPE, METRICS
+from ska_oso_pht_services.utils.response_cache import compute_etag
+from ska_oso_pht_services.utils.validation_session import StaleSessionError
 
 Response = Proposal
 
 LOGGER = logging.getLogger(__name__)
 
+COORDINATES_BATCH_MAX_SIZE = 1000
+
+INVITATION_BATCH_MAX_SIZE = 500
+
+SIGNED_URL_BATCH_MAX_SIZE = 100
+
+VALIDATION_BATCH_MAX_SIZE = 5000
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Fields shown on the proposal list page, returned by view=summary
+PROPOSAL_SUMMARY_FIELDS = (
+    "prsl_id",
+    "status",
+    "cycle",
+    "submitted_on",
+    "submitted_by",
+    "metadata",
+    "info.title",
+    "info.proposal_type",
+    "info.science_category",
+)
+
 
 def load_string_from_file(filename):
     """
@@ -58,24 +93,31 @@ def error_handler(api_func):
     @wraps(api_func)
     def decorated_function(*args, **kwargs):
         try:
-            return api_func(*args, **kwargs)
-        except RemoteServiceError as ve:
-            return (
-                jsonify(
-                    {
-                        "error": "Get Coordinates Value Error",
-                        "status": 400,
-                        "message": str(ve),
-                    }
-                ),
-                400,
-            )
+            return profiling.profile_call(api_func, *args, **kwargs)
         except ValueError as ve:
             return (
                 jsonify({"error": "Value Error", "status": 400, "message": str(ve)}),
                 400,
             )
+        except TimeoutError as te:
+            return (
+                jsonify(
+                    {"error": "Gateway Timeout", "status": 504, "message": str(te)}
+                ),
+                504,
+            )
         except Exception as e:  # pylint: disable=broad-except
+            if _is_remote_service_error(e):
+                return (
+                    jsonify(
+                        {
+                            "error": "Get Coordinates Value Error",
+                            "status": 400,
+                            "message": str(e),
+                        }
+                    ),
+                    400,
+                )
             return (
                 jsonify(
                     {"error": "Internal Server Error", "status": 500, "message": str(e)}
@@ -86,6 +128,24 @@ def error_handler(api_func):
     return decorated_function
 
 
+def _is_remote_service_error(error: Exception) -> bool:
+    # astroquery is only imported once coordinates are first resolved, and
+    # until then none of its errors can have been raised
+    exceptions = sys.modules.get("astroquery.exceptions")
+    return exceptions is not None and isinstance(error, exceptions.RemoteServiceError)
+
+
+def _json_response(body, status: HTTPStatus = HTTPStatus.OK) -> FlaskResponse:
+    """
+    Wrap JSON already serialised by pydantic in a Flask response, so that it
+    is not parsed and serialised again by Connexion/Flask.
+
+    :param body: the JSON document as a str or bytes
+    :param status: the HTTP status of the response
+    """
+    return FlaskResponse(body, status=status, mimetype="application/json")
+
+
 @error_handler
 def proposal_get(identifier: str) -> Response:
     """
@@ -94,48 +154,161 @@ def proposal_get(identifier: str) -> Response:
     Retrieves the Proposal with the given identifier from the
     underlying data store, if available
 
+    The response has an ETag header, and a request with a matching
+    If-None-Match header gets a 304 Not Modified response without a body.
+
     :param identifier: identifier of the Proposal
-    :return: a tuple of an Proposal and a
-        HTTP status, which the Connection will wrap in a response
+    :return: a response with the Proposal JSON, or a tuple of an error
+        and a HTTP status, which the Connection will wrap in a response
     """
 
     try:
         LOGGER.debug("GET PROPOSAL prsl_id: %s", identifier)
-        with oda.uow() as uow:
+        with METRICS.time_dependency("oda"), oda.uow() as uow:
             retrieved_prsl = uow.prsls.get(identifier)
-        # TODO: revisit Url is not JSON serializable error using model_dump()
-        return json.loads(retrieved_prsl.model_dump_json()), HTTPStatus.OK
     except KeyError:
         msg = f"Proposal List with query {identifier} not found "
         LOGGER.exception(f"proposal_get -> {msg}")
         return {"error": msg}, HTTPStatus.NOT_FOUND
 
+    # The serialised proposal and its ETag are reused while the ODA version of
+    # the proposal is unchanged, and a conditional GET for an unchanged
+    # proposal is answered without a body
+    version = retrieved_prsl.metadata.version if retrieved_prsl.metadata else None
+    cache = current_app.extensions["proposal_cache"]
+    cached = cache.get(identifier, version) if version is not None else None
+    if cached is not None:
+        etag, body = cached
+    else:
+        body = retrieved_prsl.model_dump_json().encode()
+        etag = (
+            cache.put(identifier, version, body)
+            if version is not None
+            else compute_etag(body)
+        )
+
+    if request.if_none_match.contains(etag):
+        response = FlaskResponse(status=HTTPStatus.NOT_MODIFIED)
+    else:
+        response = _json_response(body)
+    response.set_etag(etag)
+    return response
+
 
 @error_handler
-def proposal_get_list(identifier: str) -> Response:
+def proposal_get_list(
+    identifier: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    view: str = "full",
+    fields: Optional[str] = None,
+) -> Response:
     """
     Function that requests to GET /proposals/list are mapped to
 
     Retrieves the Proposals with the given identifier as a user query from the
     underlying data store, if available
 
+    Proposals are returned in prsl_id order. If a limit is given, at most that
+    many proposals are returned and, if there are more, the X-Next-Cursor
+    response header holds the cursor to pass to get the next page.
+    If the request accepts application/x-ndjson, the proposals are streamed
+    as newline delimited JSON, serialised one at a time.
+
+    With view=summary only the fields needed by list pages are serialised,
+    and fields selects an explicit comma separated list of dotted field
+    paths, e.g. "prsl_id,info.title".
+
     :param identifier: identifier of the Proposal
-    :return: a tuple of a list of Proposal and a
-        HTTP status, which the Connection will wrap in a response
+    :param limit: maximum number of proposals to return
+    :param cursor: cursor returned with the previous page
+    :param view: full or summary
+    :param fields: comma separated fields to return, overriding view
+    :return: a response with the list of Proposal, or a tuple of an error
+        and a HTTP status, which the Connection will wrap in a response
     """
 
     try:
         LOGGER.debug("GET PROPOSAL LIST query: %s", identifier)
-        with oda.uow() as uow:
+        with METRICS.time_dependency("oda"), oda.uow() as uow:
             query_param = UserQuery(user=identifier, match_type=MatchType.EQUALS)
             prsl = uow.prsls.query(query_param)
-        # TODO: revisit Url is not JSON serializable error using model_dump()
-        return [json.loads(x.model_dump_json()) for x in prsl], HTTPStatus.OK
     except KeyError:
         msg = f"Proposal List with query {identifier} not found "
         LOGGER.exception(f"proposal_get_list -> {msg}")
         return {"error": msg}, HTTPStatus.NOT_FOUND
 
+    include = _projection(view, fields)
+    prsl = sorted(prsl, key=lambda x: x.prsl_id)
+    next_cursor = None
+    if cursor is not None:
+        after = _decode_cursor(cursor)
+        start = bisect_right([x.prsl_id for x in prsl], after)
+        prsl = prsl[start:]
+    if limit is not None:
+        if limit < 1:
+            raise ValueError("limit must be a positive integer")
+        if len(prsl) > limit:
+            prsl = prsl[:limit]
+            next_cursor = _encode_cursor(prsl[-1].prsl_id)
+
+    if request.accept_mimetypes.best == NDJSON_MIMETYPE:
+        response = FlaskResponse(
+            (x.model_dump_json(include=include) + "\n" for x in prsl),
+            mimetype=NDJSON_MIMETYPE,
+        )
+    else:
+        response = _json_response(
+            "[" + ",".join(x.model_dump_json(include=include) for x in prsl) + "]"
+        )
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+def _projection(view: str, fields: Optional[str]) -> Optional[dict]:
+    """
+    Return the pydantic include specification for the requested view or
+    fields, or None to serialise the whole proposal.
+    """
+    if fields is not None:
+        paths = [path.strip() for path in fields.split(",") if path.strip()]
+        if not paths:
+            raise ValueError("fields must name at least one field")
+    elif view == "summary":
+        paths = PROPOSAL_SUMMARY_FIELDS
+    elif view == "full":
+        return None
+    else:
+        raise ValueError(f"Unknown view {view}")
+
+    include = {}
+    for path in paths:
+        node = include
+        *parents, leaf = path.split(".")
+        for parent in parents:
+            child = node.setdefault(parent, {})
+            if child is True:
+                break
+            node = child
+        else:
+            node[leaf] = True
+    return include
+
+
+def _encode_cursor(prsl_id: str) -> str:
+    return base64.urlsafe_b64encode(prsl_id.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> str:
+    try:
+        after = base64.b64decode(cursor, altchars=b"-_", validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError) as err:
+        raise ValueError(f"Invalid cursor {cursor}") from err
+    if not after:
+        raise ValueError(f"Invalid cursor {cursor}")
+    return after
+
 
 @error_handler
 def proposal_create(body) -> Response:
@@ -161,13 +334,20 @@ def proposal_create(body) -> Response:
         LOGGER.exception(f"proposal_create -> {msg}")
         return {"error": msg}, HTTPStatus.BAD_REQUEST
 
-    with oda.uow() as uow:
+    with METRICS.time_dependency("oda"), oda.uow() as uow:
         updated_prsl = uow.prsls.add(prsl)
         uow.commit()
+    _invalidate(updated_prsl.prsl_id)
 
     return updated_prsl.prsl_id, HTTPStatus.OK
 
 
+def _invalidate(prsl_id: str) -> None:
+    # Drop what is kept about a proposal which has been written
+    current_app.extensions["proposal_cache"].invalidate(prsl_id)
+    current_app.extensions["validation_sessions"].invalidate(prsl_id)
+
+
 @error_handler
 def proposal_edit(body: dict, identifier: str) -> Response:
     """
@@ -196,14 +376,83 @@ def proposal_edit(body: dict, identifier: str) -> Response:
             "error": "Body and Proposal ID do not match"
         }, HTTPStatus.UNPROCESSABLE_ENTITY
 
-    with oda.uow() as uow:
-        uow.prsls.add(prsl)
+    # add returns the proposal as stored, with the metadata set by the ODA, so
+    # it does not need to be read back
+    with METRICS.time_dependency("oda"), oda.uow() as uow:
+        updated_prsl = uow.prsls.add(prsl)
+        uow.commit()
+    _invalidate(identifier)
+
+    return _json_response(updated_prsl.model_dump_json())
+
+
+@error_handler
+def proposal_patch(body: list, identifier: str) -> Response:
+    """
+    Function that requests to PATCH /proposals/{identifier} are mapped to
+
+    Applies the JSON Patch (RFC 6902) operations to the stored Proposal with
+    the given identifier, validates the result and stores it. The paths of
+    the operations are those of the stored Proposal, e.g. /info/title.
+    Operations changing /metadata, which the ODA sets, are rejected, and the
+    fields derived from the info are recomputed as for PUT /proposals.
+
+    :param body: the JSON Patch operations
+    :param identifier: identifier of the Proposal
+    :return: a response with the updated Proposal as stored by the ODA, or a
+        tuple of an error and a HTTP status, which the Connection will wrap
+        in a response
+    """
+    LOGGER.debug("PATCH PROPOSAL prsl_id: %s", identifier)
+
+    with METRICS.time_dependency("oda"), oda.uow() as uow:
+        try:
+            stored_prsl = uow.prsls.get(identifier)
+        except KeyError:
+            msg = f"Proposal {identifier} not found"
+            LOGGER.exception(f"proposal_patch -> {msg}")
+            return {"error": msg}, HTTPStatus.NOT_FOUND
+        try:
+            patched = json_patch.apply_patch(stored_prsl.model_dump(mode="json"), body)
+            if _patches_metadata(body):
+                raise ValueError("The metadata of a Proposal is set by the ODA")
+            prsl = Proposal.model_validate(_transform_patched(patched))
+        except ValueError as e:
+            msg = f"Validation error '{e}'"
+            LOGGER.exception(f"proposal_patch -> {msg}")
+            return {"error": msg}, HTTPStatus.BAD_REQUEST
+
+        if prsl.prsl_id != identifier:
+            return {
+                "error": "Body and Proposal ID do not match"
+            }, HTTPStatus.UNPROCESSABLE_ENTITY
+
+        updated_prsl = uow.prsls.add(prsl)
         uow.commit()
-        updated_prsl = uow.prsls.get(identifier)
+    _invalidate(identifier)
+
+    return _json_response(updated_prsl.model_dump_json())
+
+
+def _transform_patched(patched: dict) -> dict:
+    # The investigator_refs, status and submitted_on are derived as for
+    # PUT /proposals, so that they follow the patched info. A draft has no
+    # submitter, which the transform expects as an empty string.
+    return transform_update_proposal(
+        {
+            **patched,
+            "submitted_by": patched.get("submitted_by") or "",
+            "submitted_on": patched.get("submitted_on"),
+        }
+    )
+
 
-    # TODO: revisit Url is not JSON serializable error using model_dump()
-    res = json.loads(updated_prsl.model_dump_json())
-    return res, HTTPStatus.OK
+def _patches_metadata(patch: list) -> bool:
+    # The version and modification times are kept by the ODA, and replacing
+    # the whole document would replace them too
+    return any(
+        not path or path[0] == "metadata" for path in json_patch.patched_paths(patch)
+    )
 
 
 @error_handler
@@ -220,6 +469,13 @@ def proposal_validate(body: dict) -> Response:
     LOGGER.debug("POST PROPOSAL validate")
 
     try:
+        # Keep proposals which have been created for incremental validation
+        # of their changes with PATCH /proposals/validate/{identifier}
+        prsl_id = body.get("prsl_id") if body else None
+        if prsl_id and prsl_id != "new":
+            sessions = current_app.extensions["validation_sessions"]
+            return _validation_response(*sessions.validate(prsl_id, body))
+
         transform_body = transform_update_proposal(body)
 
         prsl = Proposal.model_validate(transform_body)
@@ -233,6 +489,133 @@ def proposal_validate(body: dict) -> Response:
         return {"error": msg}, HTTPStatus.BAD_REQUEST
 
 
+@error_handler
+def proposal_validate_patch(body: list, identifier: str) -> Response:
+    """
+    Function that requests to PATCH /proposals/validate/{identifier} are
+    mapped to
+
+    Applies the JSON Patch to the proposal last validated with POST
+    /proposals/validate and validates the result, re-running only the
+    validation affected by the patch. The If-Match header must hold the ETag
+    of the previous validation of the proposal.
+
+    :param body: the JSON Patch operations
+    :param identifier: identifier of the Proposal
+    :return: the result of validation and messages, as for POST
+        /proposals/validate
+    """
+    LOGGER.debug("PATCH PROPOSAL validate prsl_id: %s", identifier)
+
+    sessions = current_app.extensions["validation_sessions"]
+    base_version = next(iter(request.if_match), None)
+    try:
+        return _validation_response(
+            *sessions.validate_patch(identifier, body, base_version)
+        )
+    except KeyError:
+        return {
+            "error": (
+                f"Proposal {identifier} has not been validated, send it to"
+                " POST /proposals/validate first"
+            )
+        }, HTTPStatus.NOT_FOUND
+    except StaleSessionError as e:
+        return {
+            "error": f"{e}, send the proposal to POST /proposals/validate"
+        }, HTTPStatus.CONFLICT
+    except ValueError as e:
+        msg = f"Validation error '{e}'"
+        LOGGER.exception(f"proposal_validate_patch -> {msg}")
+        return {"error": msg}, HTTPStatus.BAD_REQUEST
+
+
+def _validation_response(result: dict, version: Optional[str]):
+    # The ETag is the version of the validation session, to send with
+    # If-Match when patching it
+    if version is None:
+        return result, HTTPStatus.OK
+    return result, HTTPStatus.OK, {"ETag": f'"{version}"'}
+
+
+@error_handler
+def proposal_validate_batch(body: dict) -> Response:
+    """
+    Function that requests to POST /proposals/validate/batch are mapped to
+
+    Validates many proposals at once, e.g. every submitted proposal at cycle
+    close. The proposals sent in the request are validated in parallel by the
+    validation processes while the stored ones are read from the ODA and
+    validated one at a time.
+
+    :param body: A dictionary with "proposals", a list of proposals as sent to
+        POST /proposals/validate, and "prsl_ids", a list of identifiers of
+        stored proposals.
+    :return: a response streaming, as newline delimited JSON, the result of
+        validation of each stored proposal then of each proposal of the
+        request, with its prsl_id and index in the request, or an "error".
+        If the validation stops early, the last line is an "error" without
+        an index.
+    """
+    bodies = body.get("proposals", [])
+    prsl_ids = body.get("prsl_ids", [])
+    if not isinstance(bodies, list) or not all(isinstance(x, dict) for x in bodies):
+        raise ValueError("proposals must be a list of proposals")
+    if not isinstance(prsl_ids, list) or not all(isinstance(x, str) for x in prsl_ids):
+        raise ValueError("prsl_ids must be a list of proposal identifiers")
+    if len(bodies) + len(prsl_ids) > VALIDATION_BATCH_MAX_SIZE:
+        raise ValueError(
+            f"At most {VALIDATION_BATCH_MAX_SIZE} proposals can be validated at once"
+        )
+
+    LOGGER.debug(
+        "POST PROPOSAL validate batch: %d proposals, %d prsl_ids",
+        len(bodies),
+        len(prsl_ids),
+    )
+    # Start validating the proposals of the request before reading the ODA
+    body_results = batch_validation.validate_bodies(bodies)
+
+    def results():
+        for index, prsl_id in enumerate(prsl_ids):
+            yield _ndjson_line(
+                {"index": index, "prsl_id": prsl_id, **_validate_stored(prsl_id)}
+            )
+        for index, (prsl, result) in enumerate(zip(bodies, body_results)):
+            yield _ndjson_line(
+                {"index": index, "prsl_id": prsl.get("prsl_id"), **result}
+            )
+
+    def results_or_error():
+        # The status has been sent by the time an error is raised, so the end
+        # of the stream is marked with an error record instead
+        try:
+            yield from results()
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            LOGGER.exception("POST PROPOSAL validate batch failed")
+            yield _ndjson_line({"error": f"Validation of the batch failed: {err}"})
+
+    return FlaskResponse(
+        stream_with_context(results_or_error()), mimetype=NDJSON_MIMETYPE
+    )
+
+
+def _validate_stored(prsl_id: str) -> dict:
+    try:
+        with METRICS.time_dependency("oda"), oda.uow() as uow:
+            prsl = uow.prsls.get(prsl_id)
+    except KeyError:
+        return {"error": f"Proposal {prsl_id} not found"}
+    except Exception as err:  # pylint: disable=broad-exception-caught
+        LOGGER.exception("Could not read proposal %s", prsl_id)
+        return {"error": f"Could not read proposal {prsl_id}: {err}"}
+    return validation.validate_proposal(prsl)
+
+
+def _ndjson_line(item: dict) -> str:
+    return json.dumps(item) + "\n"
+
+
 @error_handler
 def upload_pdf(filename: str) -> Response:
     """
@@ -243,10 +626,7 @@ def upload_pdf(filename: str) -> Response:
     :return: a string "/upload/signedurl/{filename}"
     """
     LOGGER.debug("GET Upload Signed URL")
-    s3_client = s3_bucket.get_aws_client()
-    upload_signed_url = s3_bucket.create_presigned_url_upload_pdf(
-        filename, s3_client, 60
-    )
+    upload_signed_url = s3_bucket.get_presigned_url("put_object", filename)
 
     return (
         upload_signed_url,
@@ -264,10 +644,7 @@ def download_pdf(filename: str) -> Response:
     :return: a string "/download/signedurl/{filename}"
     """
     LOGGER.debug("GET Download Signed URL")
-    s3_client = s3_bucket.get_aws_client()
-    download_signed_url = s3_bucket.create_presigned_url_download_pdf(
-        filename, s3_client, 60
-    )
+    download_signed_url = s3_bucket.get_presigned_url("get_object", filename)
 
     return (
         download_signed_url,
@@ -285,10 +662,7 @@ def delete_pdf(filename: str) -> Response:
     :return: a string "/delete/signedurl/{filename}"
     """
     LOGGER.debug("GET Delete Signed URL")
-    s3_client = s3_bucket.get_aws_client()
-    delete_signed_url = s3_bucket.create_presigned_url_delete_pdf(
-        filename, s3_client, 60
-    )
+    delete_signed_url = s3_bucket.get_presigned_url("delete_object", filename)
 
     return (
         delete_signed_url,
@@ -296,6 +670,136 @@ def delete_pdf(filename: str) -> Response:
     )
 
 
+@error_handler
+def multipart_upload_create(filename: str, body: dict) -> Response:
+    """
+    Function that requests to endpoint POST /upload/multipart/{filename}
+    are mapped to
+
+    Starts a multipart upload of a large document, which the client then
+    uploads in parts, in parallel if it wishes, with a PUT of each part to
+    its presigned URL.
+
+    :param filename: filename of the uploaded document
+    :param body: A dictionary with the number of "parts"
+    :return: A dictionary with the "upload_id" and the presigned "urls" of
+        parts 1 to parts
+    """
+    parts = body.get("parts")
+    if not isinstance(parts, int) or isinstance(parts, bool):
+        raise ValueError("parts must be an integer")
+
+    LOGGER.debug("POST Multipart upload %s in %d parts", filename, parts)
+    upload_id, urls = s3_bucket.create_multipart_upload(
+        filename, parts, s3_bucket.get_aws_client()
+    )
+
+    return {"upload_id": upload_id, "urls": urls}, HTTPStatus.OK
+
+
+@error_handler
+def multipart_upload_complete(filename: str, body: dict) -> Response:
+    """
+    Function that requests to endpoint
+    POST /upload/multipart/{filename}/complete are mapped to
+
+    :param filename: filename of the uploaded document
+    :param body: A dictionary with the "upload_id" and the "parts", a list of
+        the "part_number" and "etag" returned by the upload of each part
+    :return: an empty response once the document has been assembled
+    """
+    upload_id = body.get("upload_id")
+    parts = body.get("parts")
+    if not isinstance(upload_id, str):
+        raise ValueError("upload_id must be a string")
+    if not isinstance(parts, list) or not all(map(_is_uploaded_part, parts)):
+        raise ValueError("parts must be a list of part numbers and etags")
+
+    LOGGER.debug("POST Complete multipart upload %s of %s", upload_id, filename)
+    s3_bucket.complete_multipart_upload(
+        filename,
+        upload_id,
+        [(part["part_number"], part["etag"]) for part in parts],
+        s3_bucket.get_aws_client(),
+    )
+
+    return "", HTTPStatus.NO_CONTENT
+
+
+def _is_uploaded_part(part) -> bool:
+    if not isinstance(part, dict):
+        return False
+    return isinstance(part.get("part_number"), int) and isinstance(
+        part.get("etag"), str
+    )
+
+
+@error_handler
+def multipart_upload_abort(filename: str, upload_id: str) -> Response:
+    """
+    Function that requests to endpoint DELETE /upload/multipart/{filename}
+    are mapped to
+
+    :param filename: filename of the uploaded document
+    :param upload_id: id of the multipart upload to abort
+    :return: an empty response once the upload has been aborted
+    """
+    LOGGER.debug("DELETE Multipart upload %s of %s", upload_id, filename)
+    s3_bucket.abort_multipart_upload(filename, upload_id, s3_bucket.get_aws_client())
+
+    return "", HTTPStatus.NO_CONTENT
+
+
+@error_handler
+def get_signed_urls(body: dict) -> Response:
+    """
+    Function that requests to endpoint POST /signedurls are mapped to
+
+    Generates the presigned URLs for several documents in one request, e.g.
+    all the PDFs attached to a proposal.
+
+    :param body: A dictionary with "requests", a list of dictionaries with
+        the "operation" (upload, download or delete) and the "filename"
+    :return: A dictionary with a "urls" list holding, for each request in
+        order, its operation, filename and presigned "url"
+    """
+    items = body.get("requests")
+    if not isinstance(items, list) or not all(map(_is_signed_url_request, items)):
+        raise ValueError("requests must be a list of operations and filenames")
+    if len(items) > SIGNED_URL_BATCH_MAX_SIZE:
+        raise ValueError(
+            f"At most {SIGNED_URL_BATCH_MAX_SIZE} signed URLs can be requested at once"
+        )
+
+    LOGGER.debug("POST Signed URLs: %d requests", len(items))
+    operations = [(item["operation"], item["filename"]) for item in items]
+    urls = s3_bucket.get_presigned_urls(operations)
+
+    return {
+        "urls": [
+            {"operation": operation, "filename": filename, "url": url}
+            for (operation, filename), url in zip(operations, urls)
+        ]
+    }, HTTPStatus.OK
+
+
+def _is_signed_url_request(item) -> bool:
+    return isinstance(item, dict) and all(
+        isinstance(item.get(field), str) for field in ("operation", "filename")
+    )
+
+
+def _coordinates():
+    """
+    Return the coordinates module, importing it on first use so that workers
+    only load astropy and astroquery once coordinates are requested.
+    """
+    # pylint: disable=import-outside-toplevel
+    from ska_oso_pht_services.utils import coordinates
+
+    return coordinates
+
+
 @error_handler
 def get_systemcoordinates(identifier: str, reference_frame: str) -> Response:
     """
@@ -320,7 +824,107 @@ def get_systemcoordinates(identifier: str, reference_frame: str) -> Response:
     :rtype: dict
     """
     LOGGER.debug("POST PROPOSAL get coordinates: %s", identifier)
-    response = coordinates.get_coordinates(identifier)
+    response = _coordinates().get_coordinates(identifier)
+    return _to_reference_frame(response, reference_frame)
+
+
+@error_handler
+def get_systemcoordinates_batch(body: dict) -> Response:
+    """
+    Function that requests to POST /coordinates/batch are mapped to
+
+    Query celestial coordinates for a list of object names in one request.
+    SIMBAD is queried once for all the names and NED only for those that
+    SIMBAD could not resolve.
+
+    :param body: A dictionary with "identifiers", the list of object names, and
+        "reference_frame" ("galactic" or "equatorial").
+    :return: A dictionary with a "results" list holding, for each identifier
+        in request order, either its "coordinates" in the same format as
+        returned by GET /coordinates or an "error" message.
+    :rtype: dict
+    """
+    identifiers = body.get("identifiers")
+    if not isinstance(identifiers, list) or not all(
+        isinstance(identifier, str) for identifier in identifiers
+    ):
+        raise ValueError("identifiers must be a list of object names")
+    if len(identifiers) > COORDINATES_BATCH_MAX_SIZE:
+        raise ValueError(
+            f"At most {COORDINATES_BATCH_MAX_SIZE} identifiers can be resolved at once"
+        )
+    reference_frame = body.get("reference_frame", "equatorial")
+
+    LOGGER.debug("POST get coordinates batch: %d identifiers", len(identifiers))
+    resolved = _coordinates().get_coordinates_batch(identifiers)
+
+    found = [
+        identifier
+        for identifier in dict.fromkeys(identifiers)
+        if isinstance(resolved[identifier], dict)
+    ]
+    converted = dict(
+        zip(
+            found,
+            _to_reference_frame_batch(
+                [resolved[identifier] for identifier in found], reference_frame
+            ),
+        )
+    )
+
+    results = []
+    for identifier in identifiers:
+        if identifier in converted:
+            results.append(
+                {"identifier": identifier, "coordinates": converted[identifier]}
+            )
+        else:
+            results.append(
+                {"identifier": identifier, "error": str(resolved[identifier])}
+            )
+
+    return {"results": results}, HTTPStatus.OK
+
+
+def _to_reference_frame_batch(responses: list, reference_frame: str) -> list:
+    """
+    Convert many get_coordinates results at once, giving the same output as
+    _to_reference_frame for each of them.
+    """
+    if not responses:
+        return []
+    coordinates = _coordinates()
+    ra = [response["ra"] for response in responses]
+    dec = [response["dec"] for response in responses]
+    if reference_frame.lower() == "galactic":
+        galactic = coordinates.convert_to_galactic_array(ra, dec)
+        return [
+            {
+                "galactic": {
+                    "lon": float(lon),
+                    "lat": float(lat),
+                    "velocity": response["velocity"],
+                    "redshift": response["redshift"],
+                }
+            }
+            for lon, lat, response in zip(galactic["lon"], galactic["lat"], responses)
+        ]
+    equatorial = coordinates.round_coord_to_3_decimal_places_array(ra, dec)
+    return [
+        {
+            "equatorial": {
+                "ra": str(ra),
+                "dec": str(dec),
+                "velocity": response["velocity"],
+                "redshift": response["redshift"],
+            }
+        }
+        for ra, dec, response in zip(equatorial["ra"], equatorial["dec"], responses)
+    ]
+
+
+def _to_reference_frame(response: dict, reference_frame: str) -> dict:
+    coordinates = _coordinates()
     if reference_frame.lower() == "galactic":
         return coordinates.convert_to_galactic(
             response["ra"], response["dec"], response["velocity"], response["redshift"]
@@ -333,33 +937,133 @@ def get_systemcoordinates(identifier: str, reference_frame: str) -> Response:
 
 @error_handler
 def send_email():
+    """
+    Function that requests to endpoint POST /send-email are mapped to
+
+    Queues the invitation to the proposal for delivery in the background.
+
+    :return: A dictionary with the "delivery_id" to pass to
+        GET /send-email/{delivery_id}, with status 202 Accepted
+    """
     data = request.get_json()
-    email = data["email"]
-    prsl_id = data["prsl_id"]
-    subject = f"Invitation to participate in SKAO proposal - {prsl_id}"
-    message = (
-        f"You have been invited to participate in the SKAO proposal with id {prsl_id}."
-        " Kindly click on attached link to accept or reject"
+    email = data.get("email")
+    prsl_id = data.get("prsl_id")
+    if not isinstance(email, str) or not isinstance(prsl_id, str):
+        raise ValueError("email and prsl_id must be strings")
+
+    delivery_id = email_delivery.DELIVERY_QUEUE.submit(
+        email, email_delivery.invitation_message(email, prsl_id)
+    )
+    LOGGER.debug("Queued invitation %s to proposal %s", delivery_id, prsl_id)
+
+    return (
+        jsonify(
+            {
+                "message": "Email queued for delivery",
+                "delivery_id": delivery_id,
+                "status": email_delivery.QUEUED,
+            }
+        ),
+        HTTPStatus.ACCEPTED,
     )
 
-    # SMTP configuration
-    smtp_server = "eu-smtp-outbound-1.mimecast.com"
-    smtp_port = 587
-    smtp_user = "proposal-preparation-tool@skao.int"
-    smtp_password = os.getenv("SMTP_PASSWORD", "SMTP_PASSWORD")
 
-    msg = MIMEMultipart()
-    msg["From"] = smtp_user
-    msg["To"] = email
-    msg["Subject"] = subject
+@error_handler
+def send_email_bulk(body: dict):
+    """
+    Function that requests to endpoint POST /send-email/bulk are mapped to
+
+    Queues the invitations to the proposal for all the recipients, which the
+    delivery queue sends over a single SMTP session.
+
+    :param body: A dictionary with the "prsl_id" and the list of "emails"
+    :return: A dictionary with a "results" list holding, for each distinct
+        email in request order, its "delivery_id" and "status", or the
+        "error" if the address was rejected, with status 202 Accepted
+    """
+    prsl_id = body.get("prsl_id")
+    emails = body.get("emails")
+    if not isinstance(prsl_id, str):
+        raise ValueError("prsl_id must be a string")
+    if not isinstance(emails, list) or not all(isinstance(x, str) for x in emails):
+        raise ValueError("emails must be a list of email addresses")
+    if len(emails) > INVITATION_BATCH_MAX_SIZE:
+        raise ValueError(
+            f"At most {INVITATION_BATCH_MAX_SIZE} invitations can be sent at once"
+        )
+
+    results = []
+    for email in dict.fromkeys(emails):
+        if not _is_email_address(email):
+            results.append(
+                {"email": email, "status": "rejected", "error": "Invalid address"}
+            )
+            continue
+        delivery_id = email_delivery.DELIVERY_QUEUE.submit(
+            email, email_delivery.invitation_message(email, prsl_id)
+        )
+        results.append(
+            {
+                "email": email,
+                "delivery_id": delivery_id,
+                "status": email_delivery.QUEUED,
+            }
+        )
+    LOGGER.debug("Queued %d invitations to proposal %s", len(results), prsl_id)
+
+    return jsonify({"results": results}), HTTPStatus.ACCEPTED
+
+
+def _is_email_address(email: str) -> bool:
+    local, _, domain = email.strip().partition("@")
+    return bool(local) and "." in domain and not any(c.isspace() for c in email)
+
 
-    msg.attach(MIMEText(message, "plain"))
+@error_handler
+def send_email_status(delivery_id: str):
+    """
+    Function that requests to endpoint GET /send-email/{delivery_id} are
+    mapped to
+
+    :param delivery_id: id returned by POST /send-email
+    :return: A dictionary with the "status" of the delivery, queued, sent or
+        failed, and the "error" of a failed delivery
+    """
+    status = email_delivery.DELIVERY_QUEUE.status(delivery_id)
+    if status is None:
+        return {"error": f"Delivery {delivery_id} not found"}, HTTPStatus.NOT_FOUND
+    return {"delivery_id": delivery_id, **status}, HTTPStatus.OK
+
+
+def get_metrics():
+    """
+    Function that requests to GET /metrics are mapped to
+
+    :return: the request and dependency metrics of all the worker processes,
+        see ska_oso_pht_services.utils.metrics, in the Prometheus text format
+    """
+    return FlaskResponse(METRICS.render(), content_type=CONTENT_TYPE)
 
-    # Connect to the SMTP server
-    server = smtplib.SMTP(smtp_server, smtp_port)
-    server.starttls()  # Upgrade the connection to secure
-    server.login(smtp_user, smtp_password)
-    server.sendmail(smtp_user, email, msg.as_string())
-    server.quit()
 
-    return jsonify({"message": "Email sent successfully!"}), 200
+@error_handler
+def get_profile(profile_id: str, format_: str = "pstats"):
+    """
+    Function that requests to GET /profiles/{profile_id} are mapped to
+
+    :param profile_id: the X-Profile-Id returned with a profiled request
+    :param format_: pstats for the data saved by cProfile, or text for the
+        functions with the highest cumulative time
+    :return: the profile of the request
+    """
+    data = profiling.PROFILER.get(profile_id)
+    if data is None:
+        return {"error": f"Profile {profile_id} not found"}, HTTPStatus.NOT_FOUND
+    if format_ == "text":
+        return FlaskResponse(profiling.render_text(data), mimetype="text/plain")
+    if format_ != "pstats":
+        raise ValueError(f"Unknown profile format {format_}")
+    return FlaskResponse(
+        data,
+        mimetype="application/octet-stream",
+        headers={"Content-Disposition": f"attachment; filename={profile_id}.pstats"},
+    )
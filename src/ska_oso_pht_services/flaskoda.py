@@ -1,5 +1,6 @@
 import logging
 import os
+import threading
 
 from flask import _app_ctx_stack, current_app  # pylint: disable=no-name-in-module
 from ska_db_oda.persistence.unitofwork.filesystemunitofwork import FilesystemUnitOfWork
@@ -12,6 +13,8 @@ LOGGER = logging.getLogger(__name__)
 
 BACKEND_VAR = "ODA_BACKEND_TYPE"
 
+_CONNECTION_POOL_LOCK = threading.Lock()
+
 
 class FlaskODA(object):
     """
@@ -58,8 +61,12 @@ class FlaskODA(object):
     @property
     def connection_pool(self):
         # Lazy creation of one psycopg ConnectionPool instance per Flask application
+        # The lock stops concurrent first requests in a threaded worker each
+        # creating a pool
         if not hasattr(current_app, "connection_pool"):
-            current_app.connection_pool = create_connection_pool()
+            with _CONNECTION_POOL_LOCK:
+                if not hasattr(current_app, "connection_pool"):
+                    current_app.connection_pool = create_connection_pool()
         return current_app.connection_pool
 
 
@@ -0,0 +1,157 @@
+"""
+Gunicorn configuration for serving ska_oso_pht_services.wsgi:app, used with
+
+    gunicorn --config python:ska_oso_pht_services.gunicorn_config \
+        ska_oso_pht_services.wsgi:app
+
+Most requests spend their time waiting on SIMBAD, NED, S3 or the ODA, so by
+default each worker process serves several requests at once with threads
+(gthread). The settings can be overridden with the GUNICORN_* environment
+variables:
+
+GUNICORN_WORKER_CLASS
+    sync, gthread (default) or gevent. gevent is only used if it is installed,
+    otherwise gthread is used instead.
+GUNICORN_WORKERS
+    number of worker processes, by default derived from the CPUs available
+    to the container
+GUNICORN_THREADS
+    threads per gthread worker, default 8
+GUNICORN_WORKER_CONNECTIONS
+    concurrent requests per gevent worker, default 1000
+GUNICORN_TIMEOUT
+    worker timeout in seconds, by default 10 more than the longest
+    POST /coordinates/batch, SIMBAD_TIMEOUT + COORDINATES_BATCH_DEADLINE
+GUNICORN_KEEPALIVE
+    keep-alive time in seconds, default 5
+GUNICORN_PRELOAD
+    load the application before forking the workers, default true except for
+    gevent, which has to patch the standard library before the application
+    is imported
+
+The workers share their metrics through the files in METRICS_DIR, by default
+pht-metrics in the temporary directory, see ska_oso_pht_services.utils.metrics,
+the profiles of requests through PROFILING_DIR, by default pht-profiles, see
+ska_oso_pht_services.utils.profiling, and the statuses of email deliveries
+through EMAIL_STATUS_PATH, by default pht-email-status.sqlite, see
+ska_oso_pht_services.utils.email_delivery.
+"""
+
+import importlib.util
+import logging
+import math
+import os
+import tempfile
+
+from ska_oso_pht_services.utils.cpus import available_cpus
+
+LOGGER = logging.getLogger(__name__)
+
+WORKER_CLASSES = ("sync", "gthread", "gevent")
+
+
+def _worker_class() -> str:
+    worker = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+    if worker not in WORKER_CLASSES:
+        LOGGER.warning("Unknown GUNICORN_WORKER_CLASS %s, using gthread", worker)
+        return "gthread"
+    if worker == "gevent" and importlib.util.find_spec("gevent") is None:
+        LOGGER.warning("gevent is not installed, using gthread workers")
+        return "gthread"
+    return worker
+
+
+def _default_workers(worker: str, cpus: int) -> int:
+    # Sync workers serve one request at a time, so use the usual 2 * CPUs + 1.
+    # Threaded and gevent workers serve many requests each, so one per CPU
+    # keeps the CPU bound work (coordinate conversion, validation) parallel,
+    # and one more takes requests while the others are busy with such work.
+    if worker == "sync":
+        return 2 * cpus + 1
+    return cpus + 1
+
+
+worker_class = _worker_class()
+workers = int(
+    os.getenv("GUNICORN_WORKERS", str(_default_workers(worker_class, available_cpus())))
+)
+threads = int(os.getenv("GUNICORN_THREADS", "8")) if worker_class == "gthread" else 1
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+# The longest request is POST /coordinates/batch: the bulk SIMBAD query, up to
+# SIMBAD_TIMEOUT, then the NED lookups within COORDINATES_BATCH_DEADLINE. Both
+# are read as in ska_oso_pht_services.utils.coordinates, which is not imported
+# so that astropy is not loaded before gevent patches the standard library.
+COORDINATES_BATCH_DEADLINE = float(os.getenv("COORDINATES_BATCH_DEADLINE", "60"))
+SIMBAD_TIMEOUT = float(os.getenv("SIMBAD_TIMEOUT", "15"))
+timeout = int(
+    os.getenv(
+        "GUNICORN_TIMEOUT",
+        str(math.ceil(COORDINATES_BATCH_DEADLINE + SIMBAD_TIMEOUT + 10)),
+    )
+)
+graceful_timeout = 30
+# Left of the graceful timeout for sending the queued emails when a worker
+# exits, so that it still has time to stop its validation processes before
+# it is killed
+EMAIL_DRAIN_TIMEOUT = graceful_timeout / 2
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+preload_app = (
+    os.getenv("GUNICORN_PRELOAD", "true").lower() == "true" and worker_class != "gevent"
+)
+logger_class = "ska_oso_pht_services.wsgi.UniformLogger"
+# Set in the environment by gunicorn before the application is loaded
+METRICS_DIR = os.getenv(
+    "METRICS_DIR", os.path.join(tempfile.gettempdir(), "pht-metrics")
+)
+PROFILING_DIR = os.getenv(
+    "PROFILING_DIR", os.path.join(tempfile.gettempdir(), "pht-profiles")
+)
+EMAIL_STATUS_PATH = os.getenv(
+    "EMAIL_STATUS_PATH",
+    os.path.join(tempfile.gettempdir(), "pht-email-status.sqlite"),
+)
+raw_env = [
+    f"METRICS_DIR={METRICS_DIR}",
+    f"PROFILING_DIR={PROFILING_DIR}",
+    f"EMAIL_STATUS_PATH={EMAIL_STATUS_PATH}",
+]
+
+
+def on_starting(server):  # pylint: disable=unused-argument
+    """
+    Start the metrics of the workers from zero.
+    """
+    # pylint: disable=import-outside-toplevel
+    from ska_oso_pht_services.utils import metrics
+
+    metrics.clear_directory(METRICS_DIR)
+
+
+def child_exit(server, worker):  # pylint: disable=unused-argument
+    """
+    Keep the metrics of the exited worker without its requests in flight.
+    """
+    # pylint: disable=import-outside-toplevel
+    from ska_oso_pht_services.utils import metrics
+
+    metrics.mark_process_dead(METRICS_DIR, worker.pid)
+
+
+def worker_exit(server, worker):  # pylint: disable=unused-argument
+    """
+    Give the worker EMAIL_DRAIN_TIMEOUT to send the emails still queued,
+    then stop its validation processes and write its last metrics.
+    """
+    # pylint: disable=import-outside-toplevel
+    from ska_oso_pht_services.utils import batch_validation
+    from ska_oso_pht_services.utils.email_delivery import DELIVERY_QUEUE
+    from ska_oso_pht_services.utils.metrics import METRICS
+
+    try:
+        if not DELIVERY_QUEUE.join(timeout=EMAIL_DRAIN_TIMEOUT):
+            LOGGER.warning("Worker %s exiting with emails still queued", worker.pid)
+    finally:
+        batch_validation.shutdown()
+        METRICS.flush()
@@ -0,0 +1,138 @@
+"""
+Validation of many proposals at once, e.g. of every submitted proposal at
+cycle close, used by POST /proposals/validate/batch.
+
+Transforming the proposals sent by the frontend, validating them with pydantic
+and running the validation rules is CPU bound, so large batches are spread
+over a pool of VALIDATION_WORKERS processes, by default one per CPU available
+to the container. The pool is started on the first large batch and reused by
+the following ones. So that the pools of several gunicorn workers do not
+compete for the CPUs, only one process on the host validates with its pool at
+a time, holding the lock file VALIDATION_LOCK_PATH, and a batch arriving
+meanwhile is validated in the calling thread. Batches smaller than
+VALIDATION_PARALLEL_MIN_SIZE, or every batch with fewer than 2 workers, are
+also validated in the calling thread, as sending the proposals to the pool
+would only add overhead.
+
+The workers are spawned rather than forked, as forking a process which is
+running other threads, like a gthread worker, is not safe. If a worker
+process dies, the rest of the batch is validated in the calling thread.
+"""
+
+import fcntl
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import IO, Iterator, List, Optional
+
+from ska_oso_pdm import Proposal
+
+from ska_oso_pht_services.connectors.pht_handler import transform_update_proposal
+from ska_oso_pht_services.utils import validation
+from ska_oso_pht_services.utils.cpus import available_cpus
+
+LOGGER = logging.getLogger(__name__)
+
+VALIDATION_WORKERS = int(os.getenv("VALIDATION_WORKERS", str(available_cpus())))
+VALIDATION_PARALLEL_MIN_SIZE = int(os.getenv("VALIDATION_PARALLEL_MIN_SIZE", "16"))
+VALIDATION_LOCK_PATH = os.getenv(
+    "VALIDATION_LOCK_PATH", os.path.join(tempfile.gettempdir(), "pht-validation.lock")
+)
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_LOCK = threading.Lock()
+
+
+def validate_body(body: dict) -> dict:
+    """
+    Validate a proposal as sent by the frontend, returning the result of
+    validation.validate_proposal or an error if it is not a valid proposal
+    """
+    try:
+        prsl = Proposal.model_validate(transform_update_proposal(body))
+    except (ValueError, KeyError, TypeError) as err:
+        return {"error": f"Validation error '{err}'"}
+    return validation.validate_proposal(prsl)
+
+
+def validate_bodies(bodies: List[dict]) -> Iterator[dict]:
+    """
+    Return an iterator over the results of validate_body for the bodies, in
+    order. Large batches are submitted to the process pool straight away, so
+    they are validated while the caller does other work.
+    """
+    if VALIDATION_WORKERS < 2 or len(bodies) < VALIDATION_PARALLEL_MIN_SIZE:
+        return map(validate_body, bodies)
+    lock = _try_lock()
+    if lock is None:
+        LOGGER.info("Another process is validating a batch, validating inline")
+        return map(validate_body, bodies)
+    # Send the bodies in a few chunks per worker rather than one at a time
+    chunksize = max(1, len(bodies) // (VALIDATION_WORKERS * 4))
+    try:
+        results = _pool().map(validate_body, bodies, chunksize=chunksize)
+    except BrokenProcessPool:
+        shutdown()
+        lock.close()
+        return map(validate_body, bodies)
+    return _pool_results(results, bodies, lock)
+
+
+def _pool_results(
+    results: Iterator[dict], bodies: List[dict], lock: IO
+) -> Iterator[dict]:
+    done = 0
+    try:
+        for result in results:
+            yield result
+            done += 1
+    except BrokenProcessPool:
+        # A pool with a killed process cannot be used again, so start a new
+        # one for the next batch
+        LOGGER.warning("Validation process died, validating the rest inline")
+        shutdown()
+        yield from map(validate_body, bodies[done:])
+    finally:
+        lock.close()
+
+
+def _try_lock() -> Optional[IO]:
+    # Closing the file releases the lock
+    try:
+        lock = open(VALIDATION_LOCK_PATH, "a", encoding="utf-8")
+    except OSError as err:
+        LOGGER.warning("Cannot open %s: %s", VALIDATION_LOCK_PATH, err)
+        return None
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return None
+    return lock
+
+
+def _pool() -> ProcessPoolExecutor:
+    global _POOL  # pylint: disable=global-statement
+    with _POOL_LOCK:
+        if _POOL is None:
+            LOGGER.info("Starting %d validation processes", VALIDATION_WORKERS)
+            _POOL = ProcessPoolExecutor(
+                max_workers=VALIDATION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _POOL
+
+
+def shutdown() -> None:
+    """
+    Stop the validation processes, if they have been started.
+    """
+    global _POOL  # pylint: disable=global-statement
+    with _POOL_LOCK:
+        pool, _POOL = _POOL, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
@@ -0,0 +1,185 @@
+"""
+Local catalogue of common objects, used to resolve names without querying
+SIMBAD or NED.
+
+The catalogue is a NumPy .npz file holding the positions (in degrees),
+velocities and redshifts of the objects as arrays, together with a sorted
+array of the normalised names and aliases of every object and the row each
+of them points to. Lookups are a binary search in the alias array, so
+nothing has to be built when the file is loaded.
+
+The catalogue is built from a CSV or VOTable dump with:
+
+    python -m ska_oso_pht_services.utils.catalogue <input> <output.npz>
+
+The input must have "name", "ra" and "dec" columns and may have "aliases"
+(separated by "|"), "velocity" (km/s) and "redshift" columns. RA and Dec are
+either sexagesimal strings in hours and degrees, as returned by SIMBAD, or
+decimal degrees.
+"""
+
+import argparse
+import logging
+import os
+import threading
+from typing import Optional, Tuple
+
+import astropy.units as u
+import numpy as np
+from astropy.coordinates import SkyCoord
+from astropy.table import Table
+
+from ska_oso_pht_services.utils.resolver_cache import normalise_name
+
+LOGGER = logging.getLogger(__name__)
+
+COORDINATES_CATALOGUE_PATH = os.getenv("COORDINATES_CATALOGUE_PATH")
+
+ALIAS_SEPARATOR = "|"
+
+
+class LocalCatalogue:
+    """
+    Read-only catalogue loaded from a file written by build_catalogue.
+    """
+
+    def __init__(self, path: str):
+        with np.load(path) as data:
+            self.ra = data["ra"]
+            self.dec = data["dec"]
+            self.velocity = data["velocity"]
+            self.redshift = data["redshift"]
+            self.aliases = data["aliases"]
+            self.alias_rows = data["alias_rows"]
+
+    def lookup(
+        self, object_name: str
+    ) -> Optional[Tuple[float, float, Optional[float], Optional[float]]]:
+        """
+        Return the RA and Dec in degrees, velocity and redshift of the object
+        with the given name or alias, or None if it is not in the catalogue.
+        Missing velocities and redshifts are returned as None.
+        """
+        key = normalise_name(object_name)
+        index = np.searchsorted(self.aliases, key)
+        if index == len(self.aliases) or self.aliases[index] != key:
+            return None
+        row = self.alias_rows[index]
+        return (
+            float(self.ra[row]),
+            float(self.dec[row]),
+            _optional(self.velocity[row]),
+            _optional(self.redshift[row]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ra)
+
+
+def _optional(value) -> Optional[float]:
+    return None if np.isnan(value) else float(value)
+
+
+_CATALOGUE = None
+_CATALOGUE_LOCK = threading.Lock()
+# Kept instead of the catalogue when it cannot be read, so that the error is
+# logged once rather than the file being read again on every lookup
+_LOAD_FAILED = object()
+
+
+def get_catalogue() -> Optional[LocalCatalogue]:
+    """
+    Return the catalogue configured by COORDINATES_CATALOGUE_PATH, loading it
+    on first use, or None if no catalogue is configured or it cannot be read.
+    """
+    global _CATALOGUE  # pylint: disable=global-statement
+    if COORDINATES_CATALOGUE_PATH is None:
+        return None
+    with _CATALOGUE_LOCK:
+        if _CATALOGUE is None:
+            try:
+                _CATALOGUE = LocalCatalogue(COORDINATES_CATALOGUE_PATH)
+            except (OSError, KeyError, ValueError):
+                LOGGER.exception(
+                    "Could not load the local catalogue %s, resolving without it",
+                    COORDINATES_CATALOGUE_PATH,
+                )
+                _CATALOGUE = _LOAD_FAILED
+            else:
+                LOGGER.info(
+                    "Loaded %d objects from the local catalogue %s",
+                    len(_CATALOGUE),
+                    COORDINATES_CATALOGUE_PATH,
+                )
+        return None if _CATALOGUE is _LOAD_FAILED else _CATALOGUE
+
+
+def build_catalogue(input_path: str, output_path: str) -> int:
+    """
+    Build a catalogue file from a CSV or VOTable dump.
+
+    :param input_path: path of the dump, read with astropy.table.Table.read
+    :param output_path: path of the .npz catalogue file to write
+    :return: the number of objects in the catalogue
+    """
+    table = Table.read(input_path, format=_table_format(input_path))
+
+    if table["ra"].dtype.kind in "iuf":
+        coord = SkyCoord(table["ra"], table["dec"], unit=(u.degree, u.degree))
+    else:
+        coord = SkyCoord(
+            [str(ra) for ra in table["ra"]],
+            [str(dec) for dec in table["dec"]],
+            unit=(u.hourangle, u.degree),
+        )
+
+    aliases = {}
+    for row, entry in enumerate(table):
+        names = [str(entry["name"])]
+        if "aliases" in table.colnames and not np.ma.is_masked(entry["aliases"]):
+            names.extend(str(entry["aliases"]).split(ALIAS_SEPARATOR))
+        for name in names:
+            key = normalise_name(name)
+            if key and aliases.setdefault(key, row) != row:
+                LOGGER.warning("Ignoring duplicate alias %s in row %d", name, row)
+
+    keys = sorted(aliases)
+    np.savez(
+        output_path,
+        ra=coord.ra.degree,
+        dec=coord.dec.degree,
+        velocity=_float_column(table, "velocity"),
+        redshift=_float_column(table, "redshift"),
+        aliases=np.array(keys, dtype=str),
+        alias_rows=np.array([aliases[key] for key in keys], dtype=np.int32),
+    )
+    return len(table)
+
+
+def _table_format(path: str) -> str:
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".vot", ".xml", ".votable"):
+        return "votable"
+    return "ascii.csv"
+
+
+def _float_column(table: Table, name: str) -> np.ndarray:
+    if name not in table.colnames:
+        return np.full(len(table), np.nan)
+    return np.ma.filled(np.ma.asarray(table[name], dtype=float), np.nan)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build the local catalogue used to resolve object names"
+    )
+    parser.add_argument("input", help="CSV or VOTable dump of the objects")
+    parser.add_argument("output", help="path of the .npz catalogue to write")
+    args = parser.parse_args(argv)
+
+    count = build_catalogue(args.input, args.output)
+    print(f"Wrote {count} objects to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
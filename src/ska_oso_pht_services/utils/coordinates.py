@@ -1,8 +1,55 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from concurrent.futures import wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
 import astropy.units as u
+import numpy as np
 from astropy.coordinates import Angle, SkyCoord
 from astroquery.exceptions import RemoteServiceError
-from astroquery.ipac.ned import Ned
-from astroquery.simbad import Simbad
+from astroquery.ipac.ned import NedClass
+from astroquery.simbad import SimbadClass
+
+from ska_oso_pht_services.utils import catalogue
+from ska_oso_pht_services.utils.metrics import METRICS
+from ska_oso_pht_services.utils.resolver_cache import (
+    create_resolver_cache,
+    normalise_name,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+# "sequential" queries NED only after SIMBAD has not found the object,
+# "concurrent" queries both at once, see resolve_concurrently
+COORDINATES_RESOLUTION_MODE = os.getenv("COORDINATES_RESOLUTION_MODE", "sequential")
+# Overall time allowed for a lookup in concurrent mode, in seconds
+COORDINATES_DEADLINE = float(os.getenv("COORDINATES_DEADLINE", "20"))
+# Timeouts of the individual HTTP requests to SIMBAD and NED, in seconds
+SIMBAD_TIMEOUT = float(os.getenv("SIMBAD_TIMEOUT", "15"))
+NED_TIMEOUT = float(os.getenv("NED_TIMEOUT", "15"))
+RESOLVER_MAX_WORKERS = int(os.getenv("RESOLVER_MAX_WORKERS", "8"))
+# NED lookups of POST /coordinates/batch run in a separate pool, so that a large
+# batch cannot hold up single lookups, and within an overall deadline
+RESOLVER_BATCH_MAX_WORKERS = int(os.getenv("RESOLVER_BATCH_MAX_WORKERS", "4"))
+COORDINATES_BATCH_DEADLINE = float(os.getenv("COORDINATES_BATCH_DEADLINE", "60"))
+
+NOT_FOUND_MESSAGE = "Object not found in SIMBAD or NED"
+
+RESOLVER_CACHE = create_resolver_cache()
+
+# typed_id is the name as given in the query, used to match the rows of bulk
+# queries back to the requested names
+SIMBAD_VOTABLE_FIELDS = ("typed_id", "ra", "dec", "rvz_radvel", "rv_value", "z_value")
+
+_LOCAL_RESOLVERS = threading.local()
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+_BATCH_EXECUTOR = None
 
 
 def round_coord_to_3_decimal_places(
@@ -86,6 +133,106 @@ def convert_to_galactic(ra: str, dec: str, velocity: float, redshift: float):
     }
 
 
+def round_coord_to_3_decimal_places_array(
+    ra: Sequence[str], dec: Sequence[str]
+) -> Dict[str, np.ndarray]:
+    """
+    Array version of round_coord_to_3_decimal_places, formatting all the
+    coordinates in one pass.
+
+    Parameters:
+    - ra (sequence of str): Right Ascensions in "HH:MM:SS.sssssssss"
+    - dec (sequence of str): Declinations in "DD:MM:SS.sssssssss"
+
+    Returns:
+    - dict: A dictionary with keys "ra" and "dec", each containing an array
+            of strings with the seconds rounded to 3 decimal places.
+    """
+    return {"ra": _round_seconds(ra), "dec": _round_seconds(dec)}
+
+
+def convert_ra_dec_deg_array(
+    ra_str: Sequence[str], dec_str: Sequence[str]
+) -> Dict[str, np.ndarray]:
+    """
+    Array version of convert_ra_dec_deg.
+
+    Parameters:
+    ra_str (sequence of str): RAs in the format "HH:MM:SS" (e.g., "5:35:17.3")
+    dec_str (sequence of str): Decs in the format "DD:MM:SS" (e.g., "-1:2:37")
+
+    Returns:
+    dict: A dictionary with keys "ra" and "dec", each containing an array of
+          decimal degrees rounded to 3 decimal places.
+    """
+    return {
+        "ra": np.round(_sexagesimal_to_float(ra_str) * 15.0, 3),
+        "dec": np.round(_sexagesimal_to_float(dec_str), 3),
+    }
+
+
+def convert_to_galactic_array(
+    ra: Sequence[str], dec: Sequence[str]
+) -> Dict[str, np.ndarray]:
+    """
+    Array version of convert_to_galactic, converting all the coordinates with
+    a single array-valued SkyCoord.
+
+    Parameters:
+    - ra (sequence of str): Right Ascensions in the format "HH:MM:SS.sss"
+    - dec (sequence of str): Declinations in the format "+DD:MM:SS.sss"
+
+    Returns:
+    - dict: A dictionary with keys "lon" and "lat", each containing an array
+            of Galactic coordinates in degrees.
+    """
+    coord = SkyCoord(
+        _sexagesimal_to_float(ra) * u.hourangle,
+        _sexagesimal_to_float(dec) * u.degree,
+        frame="icrs",
+    )
+    galactic_coord = coord.galactic
+    # "%g" gives the same 6 significant figures as Angle.to_string(decimal=True)
+    # used by convert_to_galactic
+    return {
+        "lon": np.char.mod("%g", galactic_coord.l.degree).astype(float),
+        "lat": np.char.mod("%g", galactic_coord.b.degree).astype(float),
+    }
+
+
+def _sexagesimal_to_float(values: Sequence[str]) -> np.ndarray:
+    """
+    Convert "DD:MM:SS.sss" (or space separated) strings to decimal values in
+    the unit of the first component, using NumPy string operations rather than
+    parsing each value with Angle.
+    """
+    values = np.char.replace(np.char.strip(np.asarray(values, dtype=str)), " ", ":")
+    first = np.char.partition(values, ":")
+    second = np.char.partition(first[..., 2], ":")
+    negative = np.char.startswith(first[..., 0], "-")
+    degrees = np.abs(_to_float(first[..., 0]))
+    minutes = _to_float(second[..., 0])
+    seconds = _to_float(second[..., 2])
+    result = degrees + minutes / 60.0 + seconds / 3600.0
+    return np.where(negative, -result, result)
+
+
+def _to_float(values: np.ndarray) -> np.ndarray:
+    return np.where(values == "", "0", values).astype(float)
+
+
+def _round_seconds(values: Sequence[str]) -> np.ndarray:
+    values = np.asarray(values, dtype=str)
+    head = np.char.rpartition(values, ":")
+    rounded = np.char.add(
+        np.char.add(head[..., 0], ":"),
+        np.char.mod("%06.3f", _to_float(head[..., 2])),
+    )
+    # Only values with a seconds component are rounded, as in
+    # round_coord_to_3_decimal_places
+    return np.where(np.char.count(values, ":") == 2, rounded, values)
+
+
 def _calculate_redshift(radial_velocity, speed_light=299792.458):
     """
     Calculate the redshift from the radial velocity.
@@ -113,42 +260,363 @@ def get_coordinates(object_name: str):
     The function returns the Right Ascension (RA)
     and Declination (Dec) in the hour-minute-second (HMS) and
     degree-minute-second (DMS) format respectively.
+
+    Objects in the local catalogue (see ska_oso_pht_services.utils.catalogue)
+    are resolved without any remote lookup. Otherwise results, including
+    "not found" results, are served from RESOLVER_CACHE when available
+    (see ska_oso_pht_services.utils.resolver_cache).
     Parameters:
     object_name (str): name of the celestial object to query.
     Returns:
     dict: a dict with ra, dec, velocity and redshift values
     """
-    # Try searching in SIMBAD
-    Simbad.add_votable_fields("ra", "dec", "rvz_radvel", "rv_value", "z_value")
-    result_table_simbad = Simbad.query_object(object_name)
-    if result_table_simbad is not None:
-        ra = result_table_simbad["RA"][0]
-        dec = result_table_simbad["DEC"][0]
-        velocity = next(
-            (
-                value
-                for value in [
-                    result_table_simbad["RVZ_RADVEL"][0],
-                    result_table_simbad["RV_VALUE"][0],
-                ]
-                if value is not None and value != ""
-            ),
-            None,
+    result = _query_catalogue(object_name)
+    if result is not None:
+        return result
+    if RESOLVER_CACHE is None:
+        return _query_coordinates(object_name)
+    return RESOLVER_CACHE.get_or_resolve(object_name, _query_coordinates)
+
+
+def get_coordinates_batch(
+    object_names: List[str], deadline: float = COORDINATES_BATCH_DEADLINE
+) -> Dict[str, Any]:
+    """
+    Query celestial coordinates for many object names at once.
+
+    Names which are not in the local catalogue or RESOLVER_CACHE are looked up
+    in SIMBAD with a single bulk query. Only the names SIMBAD could not resolve
+    are then queried in NED, concurrently, with at most
+    RESOLVER_BATCH_MAX_WORKERS requests in flight. If the SIMBAD query fails,
+    every name is queried in NED instead. Names whose lookup fails, or is not
+    finished within the deadline, are given an error message, which is not
+    cached.
+    Parameters:
+    object_names (list): names of the celestial objects to query.
+    deadline (float): overall time allowed for the batch in seconds.
+    Returns:
+    dict: maps each name to a dict with ra, dec, velocity and redshift values,
+    or to an error message if the object was not found.
+    """
+    end = time.monotonic() + deadline
+    results = {}
+    misses = []
+    for object_name in dict.fromkeys(object_names):
+        value = _query_catalogue(object_name)
+        if value is not None:
+            results[object_name] = value
+            continue
+        found, value = (
+            RESOLVER_CACHE.lookup(object_name)
+            if RESOLVER_CACHE is not None
+            else (False, None)
         )
-        if velocity is not None:
-            redshift = _calculate_redshift(velocity)
+        if found:
+            results[object_name] = value
         else:
-            redshift = None
+            misses.append(object_name)
+
+    if misses:
+        try:
+            resolved = _query_simbad_objects(misses)
+            simbad_error = None
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            LOGGER.warning("SIMBAD query of %d names failed: %s", len(misses), err)
+            resolved = {}
+            simbad_error = err
+        ned_misses = [name for name in misses if name not in resolved]
+        errors = {}
+        if ned_misses:
+            found, errors = _query_ned_objects(
+                ned_misses, max(end - time.monotonic(), 0)
+            )
+            resolved.update(found)
+        for object_name in misses:
+            if object_name in errors:
+                results[object_name] = errors[object_name]
+                continue
+            if object_name not in resolved:
+                results[
+                    object_name
+                ] = f"Resolving {object_name} took longer than {deadline} seconds"
+                continue
+            value = resolved[object_name]
+            if value is None and simbad_error is not None:
+                # Not known to be missing from SIMBAD, so not cached
+                results[
+                    object_name
+                ] = f"Object not found in NED and SIMBAD failed: {simbad_error}"
+                continue
+            if value is None:
+                value = NOT_FOUND_MESSAGE
+            results[object_name] = value
+            if RESOLVER_CACHE is not None:
+                RESOLVER_CACHE.store(object_name, value)
+
+    return results
+
+
+def resolve_concurrently(
+    object_name: str,
+    resolvers: Sequence[Callable[[str], Optional[dict]]],
+    deadline: float = COORDINATES_DEADLINE,
+) -> Optional[dict]:
+    """
+    Run all the resolvers for the object name at the same time and return the
+    first authoritative answer.
+
+    Resolvers are given in order of precedence and return None if the object
+    is not found. An answer is authoritative once every resolver before it has
+    answered "not found", failed or timed out, so a SIMBAD hit is used as soon
+    as it arrives while a NED hit is only used once SIMBAD has missed.
+    Resolvers still running when an answer is chosen, or when the deadline
+    expires, are abandoned.
+
+    Parameters:
+    object_name (str): name of the celestial object to query.
+    resolvers (sequence): callables taking the object name, e.g.
+        (_query_simbad, _query_ned).
+    deadline (float): overall time allowed for the lookup in seconds.
+    Returns:
+    dict: the result of the first authoritative resolver, or None if every
+    resolver answered "not found".
+    Raises:
+    TimeoutError: if no resolver found the object before the deadline
+    and at least one of them did not answer in time.
+    Exception: the error of the first failed resolver if no resolver
+    found the object and every other one answered "not found".
+    """
+    end = time.monotonic() + deadline
+    futures = [_get_executor().submit(resolve, object_name) for resolve in resolvers]
+    error = None
+    try:
+        for future in futures:
+            try:
+                result = future.result(timeout=max(end - time.monotonic(), 0))
+            except FuturesTimeoutError:
+                LOGGER.warning("Deadline exceeded resolving %s", object_name)
+                error = TimeoutError(
+                    f"Resolving {object_name} took longer than {deadline} seconds"
+                )
+                continue
+            except Exception as e:  # pylint: disable=broad-except
+                LOGGER.warning("Error resolving %s: %s", object_name, e)
+                error = error or e
+                continue
+            if result is not None:
+                return result
+    finally:
+        for future in futures:
+            future.cancel()
+
+    if error is not None:
+        raise error
+    return None
+
+
+def _query_catalogue(object_name: str) -> Optional[dict]:
+    """
+    Look the object name up in the local catalogue, returning None if there is
+    no catalogue or the object is not in it.
+    """
+    local_catalogue = catalogue.get_catalogue()
+    if local_catalogue is None:
+        return None
+    entry = local_catalogue.lookup(object_name)
+    if entry is None:
+        return None
+    ra, dec, velocity, redshift = entry
+    if redshift is None and velocity is not None:
+        redshift = _calculate_redshift(velocity)
+    return _format_coordinates(ra, dec, velocity, redshift, unit=(u.degree, u.degree))
+
+
+def _query_coordinates(object_name: str):
+    """
+    Query SIMBAD and NED for the given object name, bypassing the cache.
+    See get_coordinates.
+    """
+    if COORDINATES_RESOLUTION_MODE == "concurrent":
+        result = resolve_concurrently(object_name, (_query_simbad, _query_ned))
     else:
-        # If not found in SIMBAD, search in NED
+        # Try searching in SIMBAD, then if not found in SIMBAD, search in NED
+        result = _query_simbad(object_name)
+        if result is None:
+            result = _query_ned(object_name)
+    return result if result is not None else NOT_FOUND_MESSAGE
+
+
+@METRICS.timed("simbad")
+def _query_simbad(object_name: str) -> Optional[dict]:
+    """
+    Query SIMBAD for the given object name, returning None if not found.
+    """
+    simbad, _ = get_resolvers()
+    result_table_simbad = simbad.query_object(object_name)
+    if result_table_simbad is None:
+        return None
+    return _simbad_row_to_coordinates(result_table_simbad[0])
+
+
+@METRICS.timed("simbad")
+def _query_simbad_objects(object_names: List[str]) -> Dict[str, dict]:
+    """
+    Query SIMBAD for all the given names in a single request and return the
+    coordinates of the names that were found.
+    """
+    simbad, _ = get_resolvers()
+    result_table_simbad = simbad.query_objects(object_names)
+    if result_table_simbad is None:
+        return {}
+
+    # SIMBAD returns no row for names it cannot resolve, so rows are matched
+    # back to the requested names using the identifier as typed by the user.
+    # Names differing only in case or spacing, e.g. M31 and m31, share a row.
+    requested = defaultdict(list)
+    for name in object_names:
+        requested[normalise_name(name)].append(name)
+    results = {}
+    for row in result_table_simbad:
+        names = requested.get(normalise_name(str(row["TYPED_ID"])), [])
+        if names and names[0] not in results:
+            value = _simbad_row_to_coordinates(row)
+            results.update((name, value) for name in names)
+    return results
+
+
+def _query_ned_objects(
+    object_names: List[str], timeout: float
+) -> Tuple[Dict[str, Optional[dict]], Dict[str, str]]:
+    """
+    Query NED for the given names in the batch pool and return the results of
+    the lookups that finished within the timeout, and the error messages of
+    those that failed. The lookups still waiting for a thread are cancelled,
+    the running ones end with NED_TIMEOUT.
+    """
+    executor = _get_batch_executor()
+    futures = {executor.submit(_query_ned, name): name for name in object_names}
+    done, pending = wait(futures, timeout=timeout)
+    if pending:
+        LOGGER.warning("Deadline exceeded resolving %d names in NED", len(pending))
+        for future in pending:
+            future.cancel()
+    results, errors = {}, {}
+    for future in done:
+        object_name = futures[future]
         try:
-            result_table_ned = Ned.query_object(object_name)
-        except RemoteServiceError as e:
-            return f"{'Object not found in SIMBAD or NED', e}"
-        ra = result_table_ned["RA"][0]
-        dec = result_table_ned["DEC"][0]
+            results[object_name] = future.result()
+        except Exception as err:  # pylint: disable=broad-exception-caught
+            LOGGER.warning("Error resolving %s in NED: %s", object_name, err)
+            errors[object_name] = f"Error resolving {object_name} in NED: {err}"
+    return results, errors
+
+
+@METRICS.timed("ned")
+def _query_ned(object_name: str) -> Optional[dict]:
+    """
+    Query NED for the given object name, returning None if not found. NED does
+    not provide a velocity, so velocity and redshift are None in the result.
+    """
+    try:
+        _, ned = get_resolvers()
+        result_table_ned = ned.query_object(object_name)
+    except RemoteServiceError:
+        return None
+    # NED returns RA and DEC in decimal degrees
+    return _format_coordinates(
+        result_table_ned["RA"][0],
+        result_table_ned["DEC"][0],
+        None,
+        None,
+        unit=(u.degree, u.degree),
+    )
+
+
+def init_resolvers() -> Tuple[SimbadClass, NedClass]:
+    """
+    Return the SIMBAD and NED query objects of the calling thread, creating
+    them with the SIMBAD votable fields and the request timeouts configured on
+    first use.
+
+    astroquery keeps the last response of each query on the query object and
+    reads the result back from it, so the objects cannot be shared between
+    threads. Each request thread and each resolver pool thread has its own.
+    Called by create_app at startup, so that astroquery is imported and
+    configured before the first request.
+    """
+    resolvers = getattr(_LOCAL_RESOLVERS, "resolvers", None)
+    if resolvers is None:
+        start = time.perf_counter()
+        simbad = SimbadClass()
+        simbad.TIMEOUT = SIMBAD_TIMEOUT
+        simbad.add_votable_fields(*SIMBAD_VOTABLE_FIELDS)
+        ned = NedClass()
+        ned.TIMEOUT = NED_TIMEOUT
+        resolvers = _LOCAL_RESOLVERS.resolvers = (simbad, ned)
+        LOGGER.debug(
+            "Configured SIMBAD and NED resolvers in %.1f ms",
+            (time.perf_counter() - start) * 1000,
+        )
+    return resolvers
+
+
+def get_resolvers() -> Tuple[SimbadClass, NedClass]:
+    """
+    Return the SIMBAD and NED query objects of the calling thread, see
+    init_resolvers.
+    """
+    return init_resolvers()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """
+    Return the thread pool used for concurrent remote lookups, creating it on
+    first use so that each gunicorn worker gets its own pool after forking.
+    """
+    global _EXECUTOR  # pylint: disable=global-statement
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None:
+            _EXECUTOR = ThreadPoolExecutor(
+                max_workers=RESOLVER_MAX_WORKERS, thread_name_prefix="coordinates"
+            )
+        return _EXECUTOR
+
+
+def _get_batch_executor() -> ThreadPoolExecutor:
+    """
+    Return the thread pool used for the NED lookups of batches, see
+    _get_executor.
+    """
+    global _BATCH_EXECUTOR  # pylint: disable=global-statement
+    with _EXECUTOR_LOCK:
+        if _BATCH_EXECUTOR is None:
+            _BATCH_EXECUTOR = ThreadPoolExecutor(
+                max_workers=RESOLVER_BATCH_MAX_WORKERS,
+                thread_name_prefix="coordinates-batch",
+            )
+        return _BATCH_EXECUTOR
+
+
+def _simbad_row_to_coordinates(row) -> dict:
+    velocity = next(
+        (
+            value
+            for value in [row["RVZ_RADVEL"], row["RV_VALUE"]]
+            if value is not None and value != ""
+        ),
+        None,
+    )
+    if velocity is not None:
+        velocity = float(velocity)
+        redshift = _calculate_redshift(velocity)
+    else:
+        redshift = None
+    return _format_coordinates(row["RA"], row["DEC"], velocity, redshift)
+
+
+def _format_coordinates(ra, dec, velocity, redshift, unit=(u.hourangle, u.degree)):
     coordinates = (
-        SkyCoord(ra, dec, unit=(u.hourangle, u.degree), frame="icrs")
+        SkyCoord(ra, dec, unit=unit, frame="icrs")
         .to_string("hmsdms")
         .replace("h", ":")
         .replace("d", ":")
@@ -0,0 +1,25 @@
+"""
+The CPUs available to the service, used to size the gunicorn workers and the
+validation processes.
+"""
+
+import os
+
+
+def available_cpus() -> int:
+    """
+    Return the number of CPUs the process may use, taking into account the
+    CPU limit of the container (cgroup v2 cpu.max) as well as the affinity.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max", encoding="utf-8") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
@@ -0,0 +1,328 @@
+"""
+Background delivery of the emails sent by the PHT, e.g. proposal invitations.
+
+Messages are put on a queue and the request returns straight away with a
+delivery id. A single worker thread per process takes messages off the queue
+in batches and sends them over one authenticated SMTP connection, which is
+kept open and reused between batches until it has been idle for
+EMAIL_SMTP_IDLE_TIMEOUT seconds. Sends which fail with a temporary error are
+retried with exponential backoff on a fresh connection, while permanent (5xx)
+rejections fail straight away.
+
+The status of each delivery is kept in memory by the process that queued it,
+unless EMAIL_STATUS_PATH is set, as the gunicorn configuration does, in which
+case the statuses are kept in an SQLite file there, so that every gunicorn
+worker can return them.
+"""
+
+import json
+import logging
+import os
+import queue
+import smtplib
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import closing
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from ska_oso_pht_services.utils.metrics import METRICS
+
+LOGGER = logging.getLogger(__name__)
+
+SMTP_SERVER = os.getenv("SMTP_SERVER", "eu-smtp-outbound-1.mimecast.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER", "proposal-preparation-tool@skao.int")
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD", "SMTP_PASSWORD")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "30"))
+
+EMAIL_BATCH_SIZE = int(os.getenv("EMAIL_BATCH_SIZE", "50"))
+EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", "3"))
+EMAIL_RETRY_BACKOFF = float(os.getenv("EMAIL_RETRY_BACKOFF", "1"))
+EMAIL_SMTP_IDLE_TIMEOUT = float(os.getenv("EMAIL_SMTP_IDLE_TIMEOUT", "30"))
+EMAIL_STATUS_MAXSIZE = int(os.getenv("EMAIL_STATUS_MAXSIZE", "10000"))
+EMAIL_STATUS_PATH = os.getenv("EMAIL_STATUS_PATH")
+
+QUEUED = "queued"
+SENT = "sent"
+FAILED = "failed"
+
+
+INVITATION_SUBJECT = "Invitation to participate in SKAO proposal - {prsl_id}"
+INVITATION_TEXT = (
+    "You have been invited to participate in the SKAO proposal with id"
+    " {prsl_id}. Kindly click on attached link to accept or reject"
+)
+
+
+@lru_cache(maxsize=256)
+def _render_invitation(prsl_id: str) -> Tuple[str, str]:
+    return (
+        INVITATION_SUBJECT.format(prsl_id=prsl_id),
+        INVITATION_TEXT.format(prsl_id=prsl_id),
+    )
+
+
+def invitation_message(recipient: str, prsl_id: str) -> MIMEMultipart:
+    """
+    Return the email inviting the recipient to participate in the proposal.
+    The subject and text are rendered once per proposal and reused for all
+    the recipients invited to it.
+    """
+    subject, text = _render_invitation(prsl_id)
+    msg = MIMEMultipart()
+    msg["From"] = SMTP_USER
+    msg["To"] = recipient
+    msg["Subject"] = subject
+    msg.attach(MIMEText(text, "plain"))
+    return msg
+
+
+class MemoryStatusStore:
+    """
+    LRU of the delivery statuses of a process.
+    """
+
+    def __init__(self, maxsize: int = EMAIL_STATUS_MAXSIZE):
+        self.maxsize = maxsize
+        self._statuses: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, delivery_id: str) -> Optional[dict]:
+        with self._lock:
+            status = self._statuses.get(delivery_id)
+            return None if status is None else dict(status)
+
+    def set(self, delivery_id: str, status: dict) -> None:
+        with self._lock:
+            self._statuses[delivery_id] = status
+            self._statuses.move_to_end(delivery_id)
+            while len(self._statuses) > self.maxsize:
+                self._statuses.popitem(last=False)
+
+
+class SQLiteStatusStore:
+    """
+    Delivery statuses kept in an SQLite file, so that they are shared between
+    the processes on the same host (e.g. gunicorn workers). The latest maxsize
+    statuses are kept.
+
+    A connection is opened per operation, as in the SQLite resolver cache, so
+    the store is safe to use from any thread and across forks.
+    """
+
+    def __init__(self, path: str, maxsize: int = EMAIL_STATUS_MAXSIZE):
+        self.path = path
+        self.maxsize = maxsize
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS email_status ("
+                " delivery_id TEXT PRIMARY KEY,"
+                " status TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, delivery_id: str) -> Optional[dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT status FROM email_status WHERE delivery_id = ?",
+                (delivery_id,),
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set(self, delivery_id: str, status: dict) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                (
+                    "INSERT OR REPLACE INTO email_status"
+                    " (delivery_id, status, updated_at) VALUES (?, ?, ?)"
+                ),
+                (delivery_id, json.dumps(status), time.time()),
+            )
+            conn.execute(
+                (
+                    "DELETE FROM email_status WHERE delivery_id IN ("
+                    " SELECT delivery_id FROM email_status ORDER BY updated_at DESC"
+                    " LIMIT -1 OFFSET ?)"
+                ),
+                (self.maxsize,),
+            )
+
+
+class DeliveryQueue:
+    """
+    Queue of emails delivered by a background worker over a reused SMTP
+    connection. The worker thread is started by the first submit, so that
+    each forked gunicorn worker starts its own.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        host: str = SMTP_SERVER,
+        port: int = SMTP_PORT,
+        user: str = SMTP_USER,
+        password: Optional[str] = SMTP_PASSWORD,
+        starttls: bool = SMTP_STARTTLS,
+        batch_size: int = EMAIL_BATCH_SIZE,
+        max_retries: int = EMAIL_MAX_RETRIES,
+        retry_backoff: float = EMAIL_RETRY_BACKOFF,
+        idle_timeout: float = EMAIL_SMTP_IDLE_TIMEOUT,
+        status_maxsize: int = EMAIL_STATUS_MAXSIZE,
+        timeout: float = SMTP_TIMEOUT,
+        status_path: Optional[str] = EMAIL_STATUS_PATH,
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._queue = queue.Queue()
+        self._statuses = (
+            SQLiteStatusStore(status_path, status_maxsize)
+            if status_path
+            else MemoryStatusStore(status_maxsize)
+        )
+        self._lock = threading.Lock()
+        self._worker = None
+        self._connection = None
+
+    def submit(self, recipient: str, msg: MIMEMultipart) -> str:
+        """
+        Queue the message for delivery to the recipient and return its
+        delivery id.
+        """
+        delivery_id = uuid.uuid4().hex
+        self._set_status(delivery_id, {"status": QUEUED})
+        self._queue.put((delivery_id, recipient, msg.as_string()))
+        self._ensure_worker()
+        return delivery_id
+
+    def status(self, delivery_id: str) -> Optional[dict]:
+        """
+        Return the status of the delivery, or None if the id is unknown.
+        """
+        return self._statuses.get(delivery_id)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every queued message has been sent or has failed, or the
+        timeout in seconds has expired.
+
+        :return: False if messages were still queued at the timeout
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="email-delivery", daemon=True
+                )
+                self._worker.start()
+
+    def _set_status(self, delivery_id: str, status: dict) -> None:
+        self._statuses.set(delivery_id, status)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.idle_timeout)]
+            except queue.Empty:
+                self._close()
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for delivery_id, recipient, message in batch:
+                try:
+                    self._deliver(delivery_id, recipient, message)
+                except Exception as err:  # pylint: disable=broad-exception-caught
+                    # Keep the worker alive for the rest of the queue
+                    LOGGER.exception("Could not send email %s", delivery_id)
+                    self._close()
+                    self._set_status(delivery_id, {"status": FAILED, "error": str(err)})
+                finally:
+                    self._queue.task_done()
+
+    def _deliver(self, delivery_id: str, recipient: str, message: str) -> None:
+        for attempt in range(self.max_retries + 1):
+            try:
+                with METRICS.time_dependency("smtp"):
+                    self._connect().sendmail(self.user, recipient, message)
+            except (smtplib.SMTPException, OSError) as err:
+                LOGGER.warning(
+                    "Attempt %d to send email %s failed: %s",
+                    attempt + 1,
+                    delivery_id,
+                    err,
+                )
+                if _is_permanent(err):
+                    self._set_status(delivery_id, {"status": FAILED, "error": str(err)})
+                    return
+                self._close()
+                if attempt == self.max_retries:
+                    self._set_status(delivery_id, {"status": FAILED, "error": str(err)})
+                    return
+                time.sleep(self.retry_backoff * 2**attempt)
+            else:
+                self._set_status(delivery_id, {"status": SENT})
+                return
+
+    def _connect(self) -> smtplib.SMTP:
+        if self._connection is None:
+            connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.starttls:
+                    connection.starttls()
+                if self.password is not None:
+                    connection.login(self.user, self.password)
+            except BaseException:
+                connection.close()
+                raise
+            self._connection = connection
+            self.connections_opened += 1
+        return self._connection
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            try:
+                self._connection.quit()
+            except (smtplib.SMTPException, OSError):
+                self._connection.close()
+            self._connection = None
+
+
+def _is_permanent(err: Exception) -> bool:
+    # 5xx replies, e.g. an unknown recipient, fail again if retried, and leave
+    # the connection usable for the next message
+    if isinstance(err, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in err.recipients.values())
+    return isinstance(err, smtplib.SMTPResponseException) and err.smtp_code >= 500
+
+
+DELIVERY_QUEUE = DeliveryQueue()
@@ -0,0 +1,163 @@
+"""
+JSON Patch (RFC 6902) for the JSON documents of the API, such as proposals.
+
+apply_patch returns a patched copy of the document without modifying it. Only
+the containers along the patched paths are copied, the rest of the document is
+shared with the original, so patching a large proposal is cheap. Invalid
+operations raise ValueError, which the API returns as 400 Bad Request.
+"""
+
+import copy
+from typing import Any, Callable, List
+
+OPERATIONS = ("add", "remove", "replace", "move", "copy", "test")
+
+
+def parse_pointer(pointer: str) -> List[str]:
+    """
+    Return the reference tokens of a JSON Pointer (RFC 6901)
+    """
+    if not isinstance(pointer, str):
+        raise ValueError(f"Invalid JSON Pointer {pointer!r}")
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise ValueError(f"JSON Pointer {pointer} must start with /")
+    return [
+        token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")
+    ]
+
+
+def patched_paths(patch: List[dict]) -> List[List[str]]:
+    """
+    Return the tokens of the paths changed by the operations, including the
+    paths moved from
+    """
+    paths = []
+    for operation in patch:
+        if operation.get("op") == "test":
+            continue
+        paths.append(parse_pointer(operation.get("path")))
+        if operation.get("op") == "move":
+            paths.append(parse_pointer(operation.get("from")))
+    return paths
+
+
+def apply_patch(document: Any, patch: List[dict]) -> Any:
+    """
+    Return a copy of the document with the operations applied in order.
+
+    :raises ValueError: if an operation is invalid, its path does not exist or
+        a test operation fails
+    """
+    if not isinstance(patch, list):
+        raise ValueError("JSON Patch must be a list of operations")
+    for operation in patch:
+        document = _apply_operation(document, operation)
+    return document
+
+
+def _apply_operation(document: Any, operation: dict) -> Any:
+    if not isinstance(operation, dict) or operation.get("op") not in OPERATIONS:
+        raise ValueError(f"Invalid JSON Patch operation {operation!r}")
+    op = operation["op"]
+    path = parse_pointer(operation.get("path"))
+
+    if op in ("add", "replace", "test") and "value" not in operation:
+        raise ValueError(f"JSON Patch {op} operation on {path} has no value")
+    if op == "add":
+        return _add(document, path, copy.deepcopy(operation["value"]))
+    if op == "remove":
+        return _remove(document, path)[0]
+    if op == "replace":
+        return _replace(document, path, copy.deepcopy(operation["value"]))
+    if op == "test":
+        if _get(document, path) != operation["value"]:
+            raise ValueError(f"JSON Patch test of {operation['path']} failed")
+        return document
+
+    from_path = parse_pointer(operation.get("from"))
+    if op == "copy":
+        return _add(document, path, copy.deepcopy(_get(document, from_path)))
+    # move
+    if path[: len(from_path)] == from_path and path != from_path:
+        raise ValueError(f"Cannot move {operation['from']} into one of its children")
+    document, value = _remove(document, from_path)
+    return _add(document, path, value)
+
+
+def _get(document: Any, path: List[str]) -> Any:
+    for token in path:
+        document = document[_existing_key(document, token)]
+    return document
+
+
+def _existing_key(container: Any, token: str):
+    if isinstance(container, dict):
+        if token not in container:
+            raise ValueError(f"JSON Patch path member {token} does not exist")
+        return token
+    if isinstance(container, list):
+        return _index(token, len(container) - 1)
+    raise ValueError(f"JSON Patch path member {token} is not in an object or array")
+
+
+def _index(token: str, maximum: int) -> int:
+    if not token.isdigit() or (token.startswith("0") and token != "0"):
+        raise ValueError(f"Invalid JSON Patch array index {token}")
+    index = int(token)
+    if index > maximum:
+        raise ValueError(f"JSON Patch array index {token} is out of range")
+    return index
+
+
+def _with_parent(document: Any, path: List[str], change: Callable) -> Any:
+    # Copy the containers from the document down to the parent of the path and
+    # apply the change to the copy of the parent
+    if len(path) == 1:
+        if not isinstance(document, (dict, list)):
+            raise ValueError(f"JSON Patch path member {path[0]} is not in a container")
+        parent = copy.copy(document)
+        change(parent, path[0])
+        return parent
+    key = _existing_key(document, path[0])
+    patched = copy.copy(document)
+    patched[key] = _with_parent(document[key], path[1:], change)
+    return patched
+
+
+def _add(document: Any, path: List[str], value: Any) -> Any:
+    if not path:
+        return value
+
+    def add(parent, token):
+        if isinstance(parent, dict):
+            parent[token] = value
+        elif token == "-":
+            parent.append(value)
+        else:
+            parent.insert(_index(token, len(parent)), value)
+
+    return _with_parent(document, path, add)
+
+
+def _replace(document: Any, path: List[str], value: Any) -> Any:
+    if not path:
+        return value
+
+    def replace(parent, token):
+        parent[_existing_key(parent, token)] = value
+
+    return _with_parent(document, path, replace)
+
+
+def _remove(document: Any, path: List[str]):
+    if not path:
+        raise ValueError("JSON Patch cannot remove the whole document")
+    removed = []
+
+    def remove(parent, token):
+        removed.append(parent.pop(_existing_key(parent, token)))
+
+    document = _with_parent(document, path, remove)
+    return document, removed[0]
@@ -0,0 +1,345 @@
+"""
+Request and dependency metrics, exposed in the Prometheus text format by
+GET /metrics.
+
+create_app records the latency, status and number of in-flight requests of
+each API operation, and the calls to the ODA, SIMBAD, NED, S3 and SMTP are
+timed with METRICS.time_dependency or the METRICS.timed decorator.
+
+Metrics are kept in memory by each process. When METRICS_DIR is set, as the
+gunicorn configuration does, each process also writes its metrics to a file
+named after its pid in that directory, at most every METRICS_FLUSH_INTERVAL
+seconds, and GET /metrics returns the sum over the files, so that a scrape
+covers every gunicorn worker whichever one serves it. The other workers'
+metrics can be up to METRICS_FLUSH_INTERVAL seconds old. The metrics of
+workers which have exited, without their requests in flight, are added up in
+a single file, so that the counters do not go backwards when a worker is
+restarted and the directory does not grow with each restart. Without METRICS_DIR
+each scrape returns the metrics of the process that served it only.
+"""
+
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "1"))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# The sum of the metrics of the processes which have exited
+EXITED_FILE = "exited.json"
+
+
+class _Histogram:
+    def __init__(self, buckets: Sequence[float]):
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def add(self, other: "_Histogram") -> None:
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+
+class _State:
+    # The metrics of one process, or the sum of the metrics of several
+
+    def __init__(self):
+        self.requests: Dict[Tuple[str, int], int] = defaultdict(int)
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self.request_durations: Dict[str, _Histogram] = {}
+        self.dependency_durations: Dict[str, _Histogram] = {}
+
+    def add(self, other: "_State") -> None:
+        for key, count in other.requests.items():
+            self.requests[key] += count
+        for operation, count in other.in_flight.items():
+            self.in_flight[operation] += count
+        for mine, theirs in (
+            (self.request_durations, other.request_durations),
+            (self.dependency_durations, other.dependency_durations),
+        ):
+            for label, histogram in theirs.items():
+                if label not in mine:
+                    mine[label] = _Histogram(histogram.counts)
+                mine[label].add(histogram)
+
+    def to_json(self) -> dict:
+        return {
+            "requests": [
+                [operation, status, count]
+                for (operation, status), count in self.requests.items()
+            ],
+            "in_flight": dict(self.in_flight),
+            "request_durations": _histograms_to_json(self.request_durations),
+            "dependency_durations": _histograms_to_json(self.dependency_durations),
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "_State":
+        state = cls()
+        for operation, status, count in data["requests"]:
+            state.requests[(operation, status)] = count
+        state.in_flight.update(data["in_flight"])
+        state.request_durations = _histograms_from_json(data["request_durations"])
+        state.dependency_durations = _histograms_from_json(data["dependency_durations"])
+        return state
+
+
+def _histograms_to_json(histograms: Dict[str, _Histogram]) -> dict:
+    return {
+        label: [histogram.counts, histogram.sum, histogram.count]
+        for label, histogram in histograms.items()
+    }
+
+
+def _histograms_from_json(data: dict) -> Dict[str, _Histogram]:
+    histograms = {}
+    for label, (counts, total, count) in data.items():
+        histogram = histograms[label] = _Histogram(counts)
+        histogram.counts, histogram.sum, histogram.count = list(counts), total, count
+    return histograms
+
+
+class Metrics:
+    """
+    Thread safe store of the request and dependency metrics of a process,
+    shared with the other processes through the files in directory if given.
+    """
+
+    def __init__(
+        self,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        directory: Optional[str] = None,
+        flush_interval: float = METRICS_FLUSH_INTERVAL,
+    ):
+        self.buckets = tuple(buckets)
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._state = _State()
+        self._flush_timer: Optional[threading.Timer] = None
+        if directory is not None:
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def start_request(self, operation: str) -> None:
+        with self._lock:
+            self._state.in_flight[operation] += 1
+            self._schedule_flush()
+
+    def end_request(self, operation: str, status: int, duration: float) -> None:
+        with self._lock:
+            self._state.in_flight[operation] -= 1
+            self._state.requests[(operation, status)] += 1
+            self._observe(self._state.request_durations, operation, duration)
+            self._schedule_flush()
+
+    def observe_dependency(self, dependency: str, duration: float) -> None:
+        with self._lock:
+            self._observe(self._state.dependency_durations, dependency, duration)
+            self._schedule_flush()
+
+    @contextmanager
+    def time_dependency(self, dependency: str) -> Iterator[None]:
+        """
+        Time the body of the with statement as a call to the dependency,
+        whether or not it raises.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe_dependency(dependency, time.perf_counter() - start)
+
+    def timed(self, dependency: str):
+        """
+        Decorator timing each call of the function as a call to the dependency.
+        """
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time_dependency(dependency):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def _observe(self, histograms: dict, label: str, value: float) -> None:
+        histogram = histograms.get(label)
+        if histogram is None:
+            histogram = histograms[label] = _Histogram(self.buckets)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                histogram.counts[index] += 1
+                break
+        histogram.sum += value
+        histogram.count += 1
+
+    def _schedule_flush(self) -> None:
+        # Called with the lock held. Rather than writing the file on every
+        # change, the first change after a flush starts a timer flushing all
+        # the changes made until it fires.
+        if self.directory is not None and self._flush_timer is None:
+            self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def _after_fork(self) -> None:
+        # A worker forked from the gunicorn master starts with no metrics,
+        # whatever the master recorded while loading the application, and
+        # without the timer thread, which only exists in the parent
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._state = _State()
+        self._flush_timer = None
+
+    def flush(self) -> None:
+        """
+        Write the metrics of this process to its file in the directory.
+        """
+        if self.directory is None:
+            return
+        with self._flush_lock:
+            with self._lock:
+                self._flush_timer = None
+                data = self._state.to_json()
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                _write_json(os.path.join(self.directory, f"{os.getpid()}.json"), data)
+            except OSError as err:
+                LOGGER.warning("Cannot write metrics to %s: %s", self.directory, err)
+
+    def render(self) -> str:
+        """
+        Return the metrics, of every process sharing the directory if there
+        is one, in the Prometheus text exposition format.
+        """
+        if self.directory is None:
+            with self._lock:
+                return self._render(self._state)
+        self.flush()
+        return self._render(read_directory(self.directory))
+
+    def _render(self, state: _State) -> str:
+        lines = [
+            "# HELP pht_requests_total Requests served, by operation and status",
+            "# TYPE pht_requests_total counter",
+        ]
+        for (operation, status), count in sorted(state.requests.items()):
+            lines.append(
+                f'pht_requests_total{{operation="{operation}",status="{status}"}}'
+                f" {count}"
+            )
+        lines += [
+            "# HELP pht_requests_in_flight Requests being served, by operation",
+            "# TYPE pht_requests_in_flight gauge",
+        ]
+        for operation, count in sorted(state.in_flight.items()):
+            lines.append(f'pht_requests_in_flight{{operation="{operation}"}} {count}')
+        lines += self._render_histograms(
+            "pht_request_duration_seconds",
+            "Request latency, by operation",
+            "operation",
+            state.request_durations,
+        )
+        lines += self._render_histograms(
+            "pht_dependency_duration_seconds",
+            "Duration of calls to the ODA, SIMBAD, NED, S3 and SMTP",
+            "dependency",
+            state.dependency_durations,
+        )
+        return "\n".join(lines) + "\n"
+
+    def _render_histograms(
+        self, name: str, description: str, label: str, histograms: dict
+    ) -> List[str]:
+        lines = [f"# HELP {name} {description}", f"# TYPE {name} histogram"]
+        for value, histogram in sorted(histograms.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, histogram.counts):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'{name}_bucket{{{label}="{value}",le="+Inf"}} {histogram.count}'
+            )
+            lines.append(f'{name}_sum{{{label}="{value}"}} {histogram.sum}')
+            lines.append(f'{name}_count{{{label}="{value}"}} {histogram.count}')
+        return lines
+
+
+def read_directory(directory: str) -> _State:
+    """
+    Return the sum of the metrics of the processes in the directory.
+    """
+    total = _State()
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            with open(path, encoding="utf-8") as file:
+                total.add(_State.from_json(json.load(file)))
+        except (OSError, ValueError, KeyError, TypeError) as err:
+            LOGGER.warning("Ignoring metrics file %s: %s", path, err)
+    return total
+
+
+def clear_directory(directory: str) -> None:
+    """
+    Remove the metrics files of previous runs from the directory, creating it
+    if needed. Called by gunicorn before starting the workers.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        os.remove(path)
+
+
+def mark_process_dead(directory: str, pid: int) -> None:
+    """
+    Add the counters of an exited process, without its requests in flight,
+    to those of the processes which exited before it in EXITED_FILE, and
+    remove its own file. Called by gunicorn in the master process, one worker
+    at a time, when a worker exits.
+    """
+    path = os.path.join(directory, f"{pid}.json")
+    try:
+        with open(path, encoding="utf-8") as file:
+            exited = _State.from_json(json.load(file))
+    except FileNotFoundError:
+        return
+    exited.in_flight.clear()
+    totals_path = os.path.join(directory, EXITED_FILE)
+    try:
+        with open(totals_path, encoding="utf-8") as file:
+            exited.add(_State.from_json(json.load(file)))
+    except FileNotFoundError:
+        pass
+    _write_json(totals_path, exited.to_json())
+    os.remove(path)
+
+
+def _write_json(path: str, data: dict) -> None:
+    # Write to a temporary file first, so that readers never see a partial file
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(descriptor, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    os.replace(temporary, path)
+
+
+METRICS = Metrics(directory=METRICS_DIR)
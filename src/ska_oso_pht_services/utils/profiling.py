@@ -0,0 +1,213 @@
+"""
+Opt-in profiling of individual requests, to find out why a particular request
+is slow in a deployed service.
+
+When PROFILING_ENABLED is set, a request with the X-Profile header (whose
+value must match PROFILING_TOKEN, if one is configured) runs its API handler
+under cProfile. The response then carries an X-Profile-Id header, and the
+profile can be downloaded from GET /profiles/{profile_id}, either as pstats
+data for pstats/snakeviz or as a text summary.
+
+To keep it safe to leave enabled, at most one request per process is
+profiled at a time, at most PROFILING_MAX_PER_MINUTE per minute per process,
+and only the latest PROFILING_MAX_STORED profiles are kept. Requests over the
+limits are served normally without profiling.
+
+Profiles are kept in memory by the process which ran the request, unless
+PROFILING_DIR is set, as the gunicorn configuration does, in which case they
+are written to that directory so that any gunicorn worker can serve them.
+"""
+
+import cProfile
+import glob
+import io
+import logging
+import marshal
+import os
+import pstats
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Optional
+
+from flask import g, has_request_context, request
+
+LOGGER = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN")
+PROFILING_MAX_PER_MINUTE = int(os.getenv("PROFILING_MAX_PER_MINUTE", "6"))
+PROFILING_MAX_STORED = int(os.getenv("PROFILING_MAX_STORED", "20"))
+PROFILING_DIR = os.getenv("PROFILING_DIR")
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+
+class Profiler:
+    """
+    Runs functions under cProfile within the sampling limits and keeps the
+    resulting profiles, in the directory if one is given.
+    """
+
+    def __init__(
+        self,
+        max_per_minute: int = PROFILING_MAX_PER_MINUTE,
+        max_stored: int = PROFILING_MAX_STORED,
+        clock=time.monotonic,
+        directory: Optional[str] = None,
+    ):
+        self.max_per_minute = max_per_minute
+        self.max_stored = max_stored
+        self.directory = directory
+        self._clock = clock
+        self._running = threading.Lock()
+        self._lock = threading.Lock()
+        self._started = deque()
+        self._profiles: OrderedDict = OrderedDict()
+
+    def acquire(self) -> bool:
+        """
+        Return whether a profile can be started now, in which case release
+        must be called once it has finished.
+        """
+        if not self._running.acquire(blocking=False):
+            return False
+        now = self._clock()
+        with self._lock:
+            while self._started and self._started[0] <= now - 60:
+                self._started.popleft()
+            if len(self._started) >= self.max_per_minute:
+                self._running.release()
+                return False
+            self._started.append(now)
+        return True
+
+    def release(self) -> None:
+        self._running.release()
+
+    def run(self, profile_id: str, func, *args, **kwargs):
+        """
+        Call func under cProfile and store the profile under the id, even if
+        func raises.
+        """
+        profile = cProfile.Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            profile.create_stats()
+            self._store(profile_id, marshal.dumps(profile.stats))
+
+    def _store(self, profile_id: str, data: bytes) -> None:
+        if self.directory is not None:
+            try:
+                self._write(profile_id, data)
+            except OSError as err:
+                LOGGER.warning("Could not store profile %s: %s", profile_id, err)
+            return
+        with self._lock:
+            self._profiles[profile_id] = data
+            while len(self._profiles) > self.max_stored:
+                self._profiles.popitem(last=False)
+
+    def _write(self, profile_id: str, data: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        # Written to a temporary file first, so that a download never gets a
+        # partial profile
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(data)
+        os.replace(temporary, os.path.join(self.directory, f"{profile_id}.pstats"))
+
+        # Other processes may be removing the same old profiles
+        paths = glob.glob(os.path.join(self.directory, "*.pstats"))
+        paths.sort(key=_modified_time)
+        for path in paths[: max(len(paths) - self.max_stored, 0)]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def get(self, profile_id: str) -> Optional[bytes]:
+        """
+        Return the pstats data of the profile, or None if it is not stored.
+        """
+        if self.directory is None:
+            with self._lock:
+                return self._profiles.get(profile_id)
+        # Profile ids are uuid hex strings, anything else is not a file name
+        if not profile_id.isalnum():
+            return None
+        try:
+            with open(
+                os.path.join(self.directory, f"{profile_id}.pstats"), "rb"
+            ) as file:
+                return file.read()
+        except FileNotFoundError:
+            return None
+
+
+def _modified_time(path: str) -> float:
+    try:
+        return os.path.getmtime(path)
+    except FileNotFoundError:
+        return 0.0
+
+
+PROFILER = Profiler(directory=PROFILING_DIR)
+
+
+def _requested() -> bool:
+    if not PROFILING_ENABLED or not has_request_context():
+        return False
+    value = request.headers.get(PROFILE_HEADER)
+    if value is None:
+        return False
+    return PROFILING_TOKEN is None or value == PROFILING_TOKEN
+
+
+def profile_call(func, *args, **kwargs):
+    """
+    Call the API handler, under cProfile if profiling is enabled, requested
+    by the X-Profile header and within the sampling limits.
+    """
+    if not _requested() or not PROFILER.acquire():
+        return func(*args, **kwargs)
+    g.profile_id = uuid.uuid4().hex
+    LOGGER.info("Profiling %s as %s", request.path, g.profile_id)
+    try:
+        return PROFILER.run(g.profile_id, func, *args, **kwargs)
+    finally:
+        PROFILER.release()
+
+
+def add_profile_id_header(response):
+    """
+    Set the X-Profile-Id header on the response if the request was profiled
+    """
+    profile_id = g.get("profile_id")
+    if profile_id is not None:
+        response.headers[PROFILE_ID_HEADER] = profile_id
+    return response
+
+
+def render_text(data: bytes, limit: int = 50) -> str:
+    """
+    Return the functions of the profile with the highest cumulative time, as
+    printed by pstats.
+    """
+    stream = io.StringIO()
+    stats = pstats.Stats(_StatsData(data), stream=stream)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return stream.getvalue()
+
+
+class _StatsData:  # pylint: disable=too-few-public-methods
+    # pstats.Stats loads any object with a create_stats method and a stats dict
+    def __init__(self, data: bytes):
+        self.stats = marshal.loads(data)
+
+    def create_stats(self):
+        pass
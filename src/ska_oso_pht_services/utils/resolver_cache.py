@@ -0,0 +1,256 @@
+"""
+Cache for the results of object name resolution against SIMBAD and NED.
+
+The cache sits in front of the remote resolvers used by
+ska_oso_pht_services.utils.coordinates so that repeated lookups of the same
+object name (for example "M31" requested by many proposers) are answered
+without a network round trip. Results are stored under a normalised version
+of the object name, expire after a configurable TTL and the number of entries
+is bounded, with the least recently used entries evicted first.
+
+"Not found" results are cached as well (negative caching) but with a shorter
+TTL so that newly catalogued objects become resolvable reasonably quickly.
+
+Two backends are provided: an in-process dictionary and an SQLite file which
+can be shared by all the gunicorn workers on a pod.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from typing import Any, Callable, Optional, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+COORDINATES_CACHE_BACKEND = os.getenv("COORDINATES_CACHE_BACKEND", "memory")
+COORDINATES_CACHE_PATH = os.getenv(
+    "COORDINATES_CACHE_PATH",
+    os.path.join(tempfile.gettempdir(), "pht-coordinates-cache.sqlite"),
+)
+COORDINATES_CACHE_TTL = float(os.getenv("COORDINATES_CACHE_TTL", "86400"))
+COORDINATES_CACHE_NEGATIVE_TTL = float(
+    os.getenv("COORDINATES_CACHE_NEGATIVE_TTL", "300")
+)
+COORDINATES_CACHE_MAXSIZE = int(os.getenv("COORDINATES_CACHE_MAXSIZE", "10000"))
+
+
+def normalise_name(object_name: str) -> str:
+    """
+    Normalise an object name so that trivially different spellings of the
+    same name, e.g. "M31" and " m31 " or "NGC  224" and "ngc 224", share a
+    cache entry.
+
+    :param object_name: name of the celestial object as given by the user
+    :return: the normalised cache key
+    """
+    return " ".join(object_name.split()).casefold()
+
+
+class MemoryBackend:
+    """
+    In-process LRU store, local to a single worker.
+    """
+
+    def __init__(self, maxsize: int = COORDINATES_CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, now: float) -> Optional[Tuple[Any, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= now:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: Any, expires_at: float, now: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """
+    LRU store kept in an SQLite file, so that it can be shared between
+    processes on the same host (e.g. gunicorn workers) and survives restarts.
+
+    A connection is opened per operation, which keeps the backend safe to use
+    from any thread and across forks.
+    """
+
+    def __init__(
+        self,
+        path: str = COORDINATES_CACHE_PATH,
+        maxsize: int = COORDINATES_CACHE_MAXSIZE,
+    ):
+        self.path = path
+        self.maxsize = maxsize
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resolver_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key: str, now: float) -> Optional[Tuple[Any, float]]:
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM resolver_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                conn.execute("DELETE FROM resolver_cache WHERE key = ?", (key,))
+                return None
+            conn.execute(
+                "UPDATE resolver_cache SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, expires_at: float, now: float) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                (
+                    "INSERT OR REPLACE INTO resolver_cache"
+                    " (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)"
+                ),
+                (key, json.dumps(value), expires_at, now),
+            )
+            conn.execute(
+                (
+                    "DELETE FROM resolver_cache WHERE key IN ("
+                    " SELECT key FROM resolver_cache ORDER BY accessed_at DESC"
+                    " LIMIT -1 OFFSET ?)"
+                ),
+                (self.maxsize,),
+            )
+
+    def clear(self) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM resolver_cache")
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM resolver_cache").fetchone()[0]
+
+
+class ResolverCache:
+    """
+    Read-through cache for object name resolution.
+
+    Values must be JSON serialisable. A resolved value which is not a dict is
+    treated as a "not found" result and cached with the negative TTL.
+    """
+
+    def __init__(
+        self,
+        backend,
+        ttl: float = COORDINATES_CACHE_TTL,
+        negative_ttl: float = COORDINATES_CACHE_NEGATIVE_TTL,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+    def get_or_resolve(self, object_name: str, resolve: Callable[[str], Any]) -> Any:
+        """
+        Return the cached value for the object name, calling resolve(object_name)
+        and caching its result on a miss. Exceptions raised by resolve are
+        propagated and nothing is cached.
+        """
+        found, value = self.lookup(object_name)
+        if found:
+            return value
+        value = resolve(object_name)
+        self.store(object_name, value)
+        return value
+
+    def lookup(self, object_name: str) -> Tuple[bool, Any]:
+        """
+        Return a tuple of whether the object name is in the cache and its
+        cached value, updating the hit/miss counters.
+        """
+        entry = self.backend.get(normalise_name(object_name), self._clock())
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            if not isinstance(entry[0], dict):
+                self.negative_hits += 1
+        return True, entry[0]
+
+    def store(self, object_name: str, value: Any) -> None:
+        """
+        Cache the resolved value for the object name.
+        """
+        ttl = self.ttl if isinstance(value, dict) else self.negative_ttl
+        now = self._clock()
+        self.backend.set(normalise_name(object_name), value, now + ttl, now)
+
+    def stats(self) -> dict:
+        """
+        Return the hit/miss counters of this process along with the number of
+        entries currently held by the backend.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "size": len(self.backend),
+            }
+
+    def clear(self) -> None:
+        self.backend.clear()
+        with self._lock:
+            self.hits = self.negative_hits = self.misses = 0
+
+
+def create_resolver_cache(
+    backend: str = COORDINATES_CACHE_BACKEND,
+) -> Optional[ResolverCache]:
+    """
+    Create the resolver cache configured by the COORDINATES_CACHE_* environment
+    variables. Returns None if caching is disabled with the "none" backend.
+    """
+    if backend == "none":
+        return None
+    if backend == "sqlite":
+        return ResolverCache(SQLiteBackend())
+    if backend != "memory":
+        LOGGER.warning(
+            "Unknown COORDINATES_CACHE_BACKEND %s, using in-memory cache", backend
+        )
+    return ResolverCache(MemoryBackend())
@@ -0,0 +1,67 @@
+"""
+Cache of serialised proposal responses, used to answer the frequent polling
+of GET /proposals/{identifier} by the frontend.
+
+Entries are keyed on the prsl_id and the ODA metadata version of the proposal,
+so an entry is only reused while the stored proposal is unchanged. Each entry
+holds the JSON body and a strong ETag computed from it, which allows
+conditional requests with If-None-Match to be answered with 304 Not Modified.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+PROPOSAL_CACHE_MAXSIZE = int(os.getenv("PROPOSAL_CACHE_MAXSIZE", "1000"))
+
+
+def compute_etag(body: bytes) -> str:
+    """
+    Return a strong entity tag for the response body.
+    """
+    return hashlib.sha256(body).hexdigest()
+
+
+class ProposalResponseCache:
+    """
+    LRU cache holding the latest serialised version of each proposal.
+    """
+
+    def __init__(self, maxsize: int = PROPOSAL_CACHE_MAXSIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, prsl_id: str, version: int) -> Optional[Tuple[str, bytes]]:
+        """
+        Return the ETag and body cached for the given version of the proposal,
+        or None if that version is not cached.
+        """
+        with self._lock:
+            entry = self._entries.get(prsl_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(prsl_id)
+            return entry[1], entry[2]
+
+    def put(self, prsl_id: str, version: int, body: bytes) -> str:
+        """
+        Cache the body for the given version of the proposal, replacing any
+        other version, and return its ETag.
+        """
+        etag = compute_etag(body)
+        with self._lock:
+            self._entries[prsl_id] = (version, etag, body)
+            self._entries.move_to_end(prsl_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return etag
+
+    def invalidate(self, prsl_id: str) -> None:
+        """
+        Remove the proposal from the cache, e.g. after it has been edited.
+        """
+        with self._lock:
+            self._entries.pop(prsl_id, None)
@@ -1,6 +1,9 @@
 import os
+import threading
+import time
+from collections import OrderedDict
 
-import boto3
+from ska_oso_pht_services.utils.metrics import METRICS
 
 AWS_SERVER_PUBLIC_KEY = os.getenv("AWS_SERVER_PUBLIC_KEY", "AWS_SERVER_PUBLIC_KEY")
 AWS_SERVER_SECRET_KEY = os.getenv("AWS_SERVER_SECRET_KEY", "AWS_SERVER_SECRET_KEY")
@@ -9,32 +12,152 @@ AWS_REGION_NAME = "eu-west-2"
 
 PRESIGNED_URL_EXPIRY_TIME = 60
 
+# S3 client methods behind the operations offered by the signed URL endpoints
+PRESIGNED_URL_OPERATIONS = {
+    "upload": "put_object",
+    "download": "get_object",
+    "delete": "delete_object",
+}
+# Part URLs of multipart uploads stay valid long enough to upload large
+# documents in parallel and retry failed parts
+MULTIPART_PART_URL_EXPIRY_TIME = int(
+    os.getenv("MULTIPART_PART_URL_EXPIRY_TIME", "3600")
+)
+MULTIPART_MAX_PARTS = 10000
+
+# Cached presigned URLs are only handed out while they have at least this
+# many seconds of validity left
+PRESIGNED_URL_MIN_VALIDITY = int(os.getenv("PRESIGNED_URL_MIN_VALIDITY", "30"))
+PRESIGNED_URL_CACHE_MAXSIZE = int(os.getenv("PRESIGNED_URL_CACHE_MAXSIZE", "1000"))
+
+_AWS_CLIENT = None
+_AWS_CLIENT_LOCK = threading.Lock()
+
 
 def get_aws_client():
-    aws_access_key_id = AWS_SERVER_PUBLIC_KEY
-    aws_secret_access_key = AWS_SERVER_SECRET_KEY
-    region_name = AWS_REGION_NAME
-    return boto3.client(
-        "s3",
-        aws_access_key_id=aws_access_key_id,
-        aws_secret_access_key=aws_secret_access_key,
-        region_name=region_name,
-    )
+    """
+    Return the S3 client shared by all requests in this process, creating it
+    on first use. boto3 clients are thread safe once created, but creating
+    them from the default session is not, hence the lock.
+    """
+    global _AWS_CLIENT  # pylint: disable=global-statement
+    if _AWS_CLIENT is None:
+        # boto3 is imported here so that workers only load it when S3 is used
+        import boto3  # pylint: disable=import-outside-toplevel
 
+        with _AWS_CLIENT_LOCK:
+            if _AWS_CLIENT is None:
+                _AWS_CLIENT = boto3.client(
+                    "s3",
+                    aws_access_key_id=AWS_SERVER_PUBLIC_KEY,
+                    aws_secret_access_key=AWS_SERVER_SECRET_KEY,
+                    region_name=AWS_REGION_NAME,
+                )
+    return _AWS_CLIENT
 
-def create_presigned_url_download_pdf(
-    key, s3_client, expiry, bucket=AWS_PHT_BUCKET_NAME
+
+def reset_aws_client():
+    """
+    Discard the shared S3 client and the presigned URLs cached for it.
+    """
+    global _AWS_CLIENT  # pylint: disable=global-statement
+    with _AWS_CLIENT_LOCK:
+        _AWS_CLIENT = None
+    PRESIGNED_URL_CACHE.clear()
+
+
+class PresignedUrlCache:
+    """
+    LRU cache of presigned URLs keyed on the S3 operation and object key.
+
+    A URL is reused until it has less than min_validity seconds left before
+    it expires, so callers always get a URL they can use straight away.
+    """
+
+    def __init__(
+        self,
+        min_validity: float = PRESIGNED_URL_MIN_VALIDITY,
+        maxsize: int = PRESIGNED_URL_CACHE_MAXSIZE,
+        clock=time.time,
+    ):
+        self.min_validity = min_validity
+        self.maxsize = maxsize
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, expiry, create):
+        """
+        Return the cached URL for the key, or call create() and cache its
+        result as valid for expiry seconds.
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] - now >= self.min_validity:
+                self._entries.move_to_end(key)
+                return entry[0]
+        url = create()
+        if expiry > self.min_validity:
+            with self._lock:
+                self._entries[key] = (url, now + expiry)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return url
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+PRESIGNED_URL_CACHE = PresignedUrlCache()
+
+
+def get_presigned_url(
+    client_method, key, expiry=PRESIGNED_URL_EXPIRY_TIME, bucket=AWS_PHT_BUCKET_NAME
 ):
-    """Generate a presigned URL S3 URL for a file
-    :param bucket: string
+    """Return a presigned URL for the S3 operation on the object, signed with
+    the shared client and reused from the cache while it is still valid
+    :param client_method: string, get_object, put_object or delete_object
     :param key: string
-    :param s3_client: boto3.client
     :param expiry: int
+    :param bucket: string
     :return: presigned url of file
     """
+    return PRESIGNED_URL_CACHE.get_or_create(
+        (client_method, bucket, key),
+        expiry,
+        lambda: _create_presigned_url(
+            client_method, key, get_aws_client(), expiry, bucket
+        ),
+    )
 
-    url = s3_client.generate_presigned_url(
-        ClientMethod="get_object",
+
+def get_presigned_urls(
+    operations, expiry=PRESIGNED_URL_EXPIRY_TIME, bucket=AWS_PHT_BUCKET_NAME
+):
+    """Return presigned URLs for a list of operations on objects, all signed
+    with the shared client
+    :param operations: list of (operation, key) pairs, where operation is
+        upload, download or delete
+    :param expiry: int
+    :param bucket: string
+    :return: list of presigned urls, in the order of the operations
+    """
+    unknown = {op for op, _ in operations} - PRESIGNED_URL_OPERATIONS.keys()
+    if unknown:
+        raise ValueError(f"Unknown signed URL operations: {sorted(unknown)}")
+    return [
+        get_presigned_url(PRESIGNED_URL_OPERATIONS[op], key, expiry, bucket)
+        for op, key in operations
+    ]
+
+
+@METRICS.timed("s3")
+def _create_presigned_url(client_method, key, s3_client, expiry, bucket):
+    return s3_client.generate_presigned_url(
+        ClientMethod=client_method,
         Params={
             "Bucket": bucket,
             "Key": key,
@@ -42,7 +165,19 @@ def create_presigned_url_download_pdf(
         ExpiresIn=expiry,
     )
 
-    return url
+
+def create_presigned_url_download_pdf(
+    key, s3_client, expiry, bucket=AWS_PHT_BUCKET_NAME
+):
+    """Generate a presigned URL S3 URL for a file
+    :param bucket: string
+    :param key: string
+    :param s3_client: boto3.client
+    :param expiry: int
+    :return: presigned url of file
+    """
+
+    return _create_presigned_url("get_object", key, s3_client, expiry, bucket)
 
 
 def create_presigned_url_upload_pdf(key, s3_client, expiry, bucket=AWS_PHT_BUCKET_NAME):
@@ -54,16 +189,7 @@ def create_presigned_url_upload_pdf(key, s3_client, expiry, bucket=AWS_PHT_BUCKE
     :return: presigned url of file
     """
 
-    url = s3_client.generate_presigned_url(
-        ClientMethod="put_object",
-        Params={
-            "Bucket": bucket,
-            "Key": key,
-        },
-        ExpiresIn=expiry,
-    )
-
-    return url
+    return _create_presigned_url("put_object", key, s3_client, expiry, bucket)
 
 
 def create_presigned_url_delete_pdf(key, s3_client, expiry, bucket=AWS_PHT_BUCKET_NAME):
@@ -75,13 +201,99 @@ def create_presigned_url_delete_pdf(key, s3_client, expiry, bucket=AWS_PHT_BUCKE
     :return: presigned url of file
     """
 
-    url = s3_client.generate_presigned_url(
-        ClientMethod="delete_object",
-        Params={
-            "Bucket": bucket,
-            "Key": key,
-        },
-        ExpiresIn=expiry,
+    return _create_presigned_url("delete_object", key, s3_client, expiry, bucket)
+
+
+@METRICS.timed("s3")
+def create_multipart_upload(
+    key,
+    parts,
+    s3_client,
+    expiry=MULTIPART_PART_URL_EXPIRY_TIME,
+    bucket=AWS_PHT_BUCKET_NAME,
+):
+    """Start a multipart upload and generate a presigned URL for each part
+    :param key: string
+    :param parts: int, number of parts the file will be uploaded in
+    :param s3_client: boto3.client
+    :param expiry: int
+    :param bucket: string
+    :return: the upload id and the list of part urls, for part numbers 1 to parts
+    """
+    from botocore.exceptions import (  # pylint: disable=import-outside-toplevel
+        ClientError,
+    )
+
+    if not 1 <= parts <= MULTIPART_MAX_PARTS:
+        raise ValueError(f"parts must be between 1 and {MULTIPART_MAX_PARTS}")
+
+    try:
+        upload = s3_client.create_multipart_upload(Bucket=bucket, Key=key)
+    except ClientError as err:
+        raise ValueError(f"Could not start an upload of {key}: {err}") from err
+    upload_id = upload["UploadId"]
+    urls = [
+        s3_client.generate_presigned_url(
+            ClientMethod="upload_part",
+            Params={
+                "Bucket": bucket,
+                "Key": key,
+                "UploadId": upload_id,
+                "PartNumber": part_number,
+            },
+            ExpiresIn=expiry,
+        )
+        for part_number in range(1, parts + 1)
+    ]
+    return upload_id, urls
+
+
+@METRICS.timed("s3")
+def complete_multipart_upload(
+    key, upload_id, parts, s3_client, bucket=AWS_PHT_BUCKET_NAME
+):
+    """Assemble the uploaded parts into the object
+    :param key: string
+    :param upload_id: string
+    :param parts: list of (part number, etag) pairs of the uploaded parts
+    :param s3_client: boto3.client
+    :param bucket: string
+    """
+    from botocore.exceptions import (  # pylint: disable=import-outside-toplevel
+        ClientError,
+    )
+
+    try:
+        s3_client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [
+                    {"PartNumber": part_number, "ETag": etag}
+                    for part_number, etag in sorted(parts)
+                ]
+            },
+        )
+    except ClientError as err:
+        raise ValueError(
+            f"Could not complete upload {upload_id} of {key}: {err}"
+        ) from err
+
+
+@METRICS.timed("s3")
+def abort_multipart_upload(key, upload_id, s3_client, bucket=AWS_PHT_BUCKET_NAME):
+    """Abort a multipart upload, discarding the parts uploaded so far
+    :param key: string
+    :param upload_id: string
+    :param s3_client: boto3.client
+    :param bucket: string
+    """
+    from botocore.exceptions import (  # pylint: disable=import-outside-toplevel
+        ClientError,
     )
 
-    return url
+    try:
+        s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+    except ClientError as err:
+        raise ValueError(f"Could not abort upload {upload_id} of {key}: {err}") from err
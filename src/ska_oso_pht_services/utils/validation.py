@@ -1,3 +1,16 @@
+"""
+Validation of proposals before submission.
+
+Each check is a rule registered with the rule decorator. The rules run over a
+ProposalIndex built once per validation, which holds the target and
+observation set references of the results as sets, so that every check is a
+single pass over the proposal rather than a scan of the results per target or
+observation set.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, FrozenSet, List, Tuple
+
 from ska_oso_pdm import Proposal
 
 # from ska_oso_pht_services.api_clients.osd_api import osd_client
@@ -5,6 +18,102 @@ from ska_oso_pdm import Proposal
 # TODO: use values from OSD after connection is ready
 
 
+@dataclass(frozen=True)
+class ProposalIndex:
+    """
+    The references between the sections of a proposal, shared by the rules
+    """
+
+    proposal: Proposal
+    target_refs: FrozenSet[str]
+    observation_set_refs: FrozenSet[str]
+
+    @classmethod
+    def build(cls, proposal: Proposal) -> "ProposalIndex":
+        results = proposal.info.result_details
+        return cls(
+            proposal=proposal,
+            target_refs=frozenset(result.target_ref for result in results),
+            observation_set_refs=frozenset(
+                result.observation_set_ref for result in results
+            ),
+        )
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    A validation check returning a message for each problem it finds.
+
+    sections are the fields of proposal.info the check reads, so that the
+    rules affected by a change to a proposal can be found.
+    """
+
+    name: str
+    sections: Tuple[str, ...]
+    check: Callable[[ProposalIndex], List[str]]
+
+
+RULES: List[Rule] = []
+
+
+def rule(*sections: str):
+    """
+    Register the decorated function as a validation rule, run in the order of
+    registration, reading the given sections of proposal.info
+    """
+
+    def decorator(check: Callable[[ProposalIndex], List[str]]):
+        RULES.append(Rule(check.__name__, sections, check))
+        return check
+
+    return decorator
+
+
+@rule("observation_sets")
+def has_observation_sets(index: ProposalIndex) -> List[str]:
+    """
+    check that proposal has at least one observation set
+    """
+    if not index.proposal.info.observation_sets:
+        return ["This proposal has no observation sets"]
+    return []
+
+
+@rule("targets", "result_details")
+def targets_have_results(index: ProposalIndex) -> List[str]:
+    """
+    each observation target should have a valid sensitivity calculation result
+    """
+    return [
+        f"Target {target.target_id} has no valid sensitivity/integration time results or is not linked to an observation"  # noqa
+        for target in index.proposal.info.targets
+        if target.target_id not in index.target_refs
+    ]
+
+
+@rule("observation_sets", "result_details")
+def observation_sets_have_targets(index: ProposalIndex) -> List[str]:
+    """
+    check that each observation sets has at least one target (in result)
+    """
+    return [
+        f"Observation Set {obs_set.observation_set_id} has no Targets linked in Results"  # noqa
+        for obs_set in index.proposal.info.observation_sets
+        if obs_set.observation_set_id not in index.observation_set_refs
+    ]
+
+
+def run_rules(index: ProposalIndex, rules: List[Rule]) -> List[str]:
+    """
+    Return the messages of the rules, in order
+    """
+    messages = []
+    for validation_rule in rules:
+        messages += validation_rule.check(index)
+    return messages
+
+
 def validate_proposal(proposal: Proposal) -> dict:
     """
     validate proposal
@@ -19,41 +128,8 @@ def validate_proposal(proposal: Proposal) -> dict:
     Returns:
     dict: result of validation and messages
     """
-
-    validate_result = True
-
-    messages = []
     try:
-        # check that proposal has at least one observation set
-        if len(proposal.info.observation_sets) == 0:
-            validate_result = False
-            messages.append("This proposal has no observation sets")
-
-        # each observation target should have a valid sensitivity calculation result
-        for target in proposal.info.targets:
-            found = any(
-                target.target_id == result.target_ref
-                for result in proposal.info.result_details
-            )
-            if not found:
-                validate_result = False
-                messages.append(
-                    f"Target {target.target_id} has no valid sensitivity/integration time results or is not linked to an observation"  # noqa
-                )
-
-        # check that each observation sets has at least one target (in result)
-        for obs_set in proposal.info.observation_sets:
-            found = any(
-                obs_set.observation_set_id == result.observation_set_ref
-                for result in proposal.info.result_details
-            )
-            if not found:
-                validate_result = False
-                messages.append(
-                    f"Observation Set {obs_set.observation_set_id} has no Targets linked in Results"  # noqa
-                )
-
+        messages = run_rules(ProposalIndex.build(proposal), RULES)
     except ValueError as err:
-        messages.append("Exception: " + str(err))
-        return {"result": False, "validation_errors": messages}
-    return {"result": validate_result, "validation_errors": messages}
+        return {"result": False, "validation_errors": ["Exception: " + str(err)]}
+    return {"result": not messages, "validation_errors": messages}
@@ -0,0 +1,211 @@
+"""
+Incremental validation of the proposals being edited in the frontend.
+
+POST /proposals/validate keeps the last proposal validated for each prsl_id,
+together with the messages of each validation rule. PATCH
+/proposals/validate/{identifier} then applies a JSON Patch to that proposal
+and, when the operations only touch sections of proposal.info, validates just
+those sections with pydantic and re-runs just the rules reading them, reusing
+the messages of the other rules. Other changes fall back to a full validation.
+
+Each session has a random version, returned as the ETag of the validation,
+which the patch must name with If-Match. Sessions are kept in memory by each
+process, in an LRU bounded by VALIDATION_SESSION_MAXSIZE, and are removed
+when the proposal is written. A patch for a proposal without a session in the
+process, or whose session has another version, e.g. because the previous
+request was served by another gunicorn worker, is rejected and the frontend
+sends the full proposal again.
+"""
+
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from pydantic import TypeAdapter
+from pydantic.fields import FieldInfo
+from ska_oso_pdm import Proposal
+
+from ska_oso_pht_services.connectors.pht_handler import transform_update_proposal
+from ska_oso_pht_services.utils import json_patch, validation
+
+VALIDATION_SESSION_MAXSIZE = int(os.getenv("VALIDATION_SESSION_MAXSIZE", "256"))
+
+# Sections which are copied into the top level of the proposal by
+# transform_update_proposal, so changes to them need a full validation
+TRANSFORMED_SECTIONS = frozenset({"investigators"})
+
+
+class StaleSessionError(Exception):
+    """
+    Raised when a patch is based on another version of the session
+    """
+
+
+@dataclass(frozen=True)
+class _Session:
+    version: str
+    body: dict
+    proposal: Proposal
+    index: validation.ProposalIndex
+    messages: Dict[str, List[str]]
+
+
+class ValidationSessions:
+    """
+    LRU of the last validated version of each proposal.
+    """
+
+    def __init__(self, maxsize: int = VALIDATION_SESSION_MAXSIZE):
+        self.maxsize = maxsize
+        self._sessions: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._adapters: Dict[str, TypeAdapter] = {}
+
+    def validate(self, prsl_id: str, body: dict) -> Tuple[dict, Optional[str]]:
+        """
+        Validate the proposal, as sent by the frontend, from scratch and keep
+        it as the session of the prsl_id.
+
+        :return: the result of validation and the version of the new session,
+            or None if the rules failed and no session is kept
+        :raises ValueError: if the body is not a valid proposal
+        """
+        self.invalidate(prsl_id)
+        proposal = Proposal.model_validate(transform_update_proposal(body))
+        index = validation.ProposalIndex.build(proposal)
+        try:
+            messages = _run_rules(index, validation.RULES)
+        except ValueError as err:
+            return _exception_result(err), None
+        return _result(messages), self._put(prsl_id, body, proposal, index, messages)
+
+    def validate_patch(
+        self, prsl_id: str, patch: List[dict], base_version: Optional[str]
+    ) -> Tuple[dict, Optional[str]]:
+        """
+        Apply the JSON Patch to the session of the prsl_id and validate the
+        result, re-running only what the patch affects.
+
+        :param base_version: the version of the session the patch applies to
+        :return: the result of validation and the version of the new session,
+            or None if the rules failed and no session is kept
+        :raises KeyError: if there is no session for the prsl_id
+        :raises StaleSessionError: if the session has another version
+        :raises ValueError: if the patch cannot be applied or the result is
+            not a valid proposal
+        """
+        with self._lock:
+            session = self._sessions[prsl_id]
+            if session.version != base_version:
+                raise StaleSessionError(
+                    f"Validation of {prsl_id} is not at version {base_version}"
+                )
+            self._sessions.move_to_end(prsl_id)
+
+        body = json_patch.apply_patch(session.body, patch)
+        sections = _patched_sections(patch)
+        info = session.proposal.info
+        if not _are_info_fields(sections, info):
+            return self.validate(prsl_id, body)
+
+        updates = {}
+        for section in sections:
+            field = type(info).model_fields[section]
+            if section in body["info"]:
+                updates[section] = self._adapter(section, field).validate_python(
+                    body["info"][section]
+                )
+            else:
+                updates[section] = field.get_default(call_default_factory=True)
+        proposal = session.proposal.model_copy(
+            update={"info": info.model_copy(update=updates)}
+        )
+
+        if "result_details" in sections:
+            index = validation.ProposalIndex.build(proposal)
+        else:
+            index = validation.ProposalIndex(
+                proposal, session.index.target_refs, session.index.observation_set_refs
+            )
+        affected = [
+            rule for rule in validation.RULES if sections.intersection(rule.sections)
+        ]
+        try:
+            messages = {**session.messages, **_run_rules(index, affected)}
+        except ValueError as err:
+            self.invalidate(prsl_id)
+            return _exception_result(err), None
+        return _result(messages), self._put(prsl_id, body, proposal, index, messages)
+
+    def _adapter(self, section: str, field: FieldInfo) -> TypeAdapter:
+        # Only the type of the field is validated, so this relies on
+        # ProposalInfo having no validators across its fields. Building an
+        # adapter is much slower than validating with it, hence the cache.
+        adapter = self._adapters.get(section)
+        if adapter is None:
+            adapter = self._adapters[section] = TypeAdapter(field.annotation)
+        return adapter
+
+    def _put(
+        self,
+        prsl_id: str,
+        body: dict,
+        proposal: Proposal,
+        index: validation.ProposalIndex,
+        messages: Dict[str, List[str]],
+    ) -> str:
+        # Versions are random, so that sessions of the same proposal in
+        # different processes never have the same version
+        version = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[prsl_id] = _Session(version, body, proposal, index, messages)
+            self._sessions.move_to_end(prsl_id)
+            while len(self._sessions) > self.maxsize:
+                self._sessions.popitem(last=False)
+        return version
+
+    def invalidate(self, prsl_id: str) -> None:
+        """
+        Remove the session of the proposal, e.g. after the proposal has been
+        written.
+        """
+        with self._lock:
+            self._sessions.pop(prsl_id, None)
+
+
+def _patched_sections(patch: List[dict]) -> Optional[Set[str]]:
+    # The sections of proposal.info changed by the patch, or None if it
+    # changes anything else
+    sections = set()
+    for path in json_patch.patched_paths(patch):
+        if len(path) < 2 or path[0] != "info" or path[1] in TRANSFORMED_SECTIONS:
+            return None
+        sections.add(path[1])
+    return sections
+
+
+def _are_info_fields(sections: Optional[Set[str]], info) -> bool:
+    if sections is None or info is None:
+        return False
+    return sections.issubset(type(info).model_fields)
+
+
+def _run_rules(
+    index: validation.ProposalIndex, rules: List[validation.Rule]
+) -> Dict[str, List[str]]:
+    return {rule.name: rule.check(index) for rule in rules}
+
+
+def _exception_result(err: ValueError) -> dict:
+    # reported like validation.validate_proposal does, and not kept
+    return {"result": False, "validation_errors": ["Exception: " + str(err)]}
+
+
+def _result(messages: Dict[str, List[str]]) -> dict:
+    errors = [
+        message for rule in validation.RULES for message in messages.get(rule.name, [])
+    ]
+    return {"result": not errors, "validation_errors": errors}
@@ -1,4 +1,6 @@
 import json
+import statistics
+import time
 from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
 from os import getenv
@@ -29,6 +31,9 @@ PHT_URL = getenv(
     "PHT_URL", f"http://ska-oso-pht-services-rest-test:5000/{KUBE_NAMESPACE}/pht/api/v2"
 )
 
+ODA_BACKEND_TYPE = getenv("ODA_BACKEND_TYPE", "unknown")
+WRITE_BENCHMARK_ITERATIONS = int(getenv("WRITE_BENCHMARK_ITERATIONS", "20"))
+
 test_prsl_id = ""
 
 
@@ -125,6 +130,41 @@ def test_proposal_put():
     # assert expected == result
 
 
+def test_proposal_put_write_latency(record_property):
+    """
+    Check that each response of PUT /proposals/{identifier} is the proposal
+    as stored, without the service reading it back, and record the median and
+    p95 latency against the deployed ODA backend as junit properties.
+    """
+    body = json.loads(VALID_PROPOSAL_DATA_JSON)
+    body["prsl_id"] = test_prsl_id
+    stored = requests.get(f"{PHT_URL}/proposals/{test_prsl_id}").json()
+    version = stored["metadata"]["version"]
+
+    latencies = []
+    for iteration in range(WRITE_BENCHMARK_ITERATIONS):
+        body["info"]["title"] = f"Write benchmark {iteration}"
+        start = time.perf_counter()
+        response = requests.put(
+            f"{PHT_URL}/proposals/{test_prsl_id}",
+            data=json.dumps(body),
+            headers={"Content-type": "application/json"},
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()["metadata"]["version"] == version + iteration + 1
+
+    stored = requests.get(f"{PHT_URL}/proposals/{test_prsl_id}").json()
+    assert stored == response.json()
+
+    median = statistics.median(latencies)
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    record_property("oda_backend", ODA_BACKEND_TYPE)
+    record_property("put_latency_median_ms", round(median, 1))
+    record_property("put_latency_p95_ms", round(p95, 1))
+
+
 def test_proposal_validate_no_target_in_result():
     """
     Test that the POST /proposals/validate path receives the request
@@ -1,8 +1,16 @@
+import os
 import unittest
+from tempfile import TemporaryDirectory
+from unittest import mock
 
 from flask import Response
 
-from ska_oso_pht_services import set_default_headers_on_response
+import ska_oso_pht_services
+from ska_oso_pht_services import (
+    _spec_hash,
+    resolve_openapi_spec,
+    set_default_headers_on_response,
+)
 
 
 class TestDefaultHeaders(unittest.TestCase):
@@ -11,3 +19,55 @@ class TestDefaultHeaders(unittest.TestCase):
         response = set_default_headers_on_response(response)
         self.assertIn("Access-Control-Allow-Origin", response.headers)
         self.assertEqual(response.headers["Access-Control-Allow-Origin"], "*")
+
+
+class TestResolveOpenapiSpec(unittest.TestCase):
+    def setUp(self):
+        cache_dir = TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.addCleanup(cache_dir.cleanup)
+        self.cache_dir = cache_dir.name
+        patcher = mock.patch.object(
+            ska_oso_pht_services, "OPENAPI_SPEC_CACHE_DIR", self.cache_dir
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_validated_spec_is_cached(self):
+        spec = resolve_openapi_spec()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        with mock.patch.object(ska_oso_pht_services, "validate_spec") as validate:
+            cached = resolve_openapi_spec()
+
+        validate.assert_not_called()
+        self.assertEqual(cached, spec)
+
+    def test_skip_validation(self):
+        with mock.patch.object(
+            ska_oso_pht_services, "OPENAPI_SKIP_VALIDATION", True
+        ), mock.patch.object(ska_oso_pht_services, "validate_spec") as validate:
+            spec = resolve_openapi_spec()
+
+        validate.assert_not_called()
+        self.assertIn("paths", spec)
+        # the spec is cached even though it has not been validated
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_corrupt_cache_is_ignored(self):
+        resolve_openapi_spec()
+        (cache_file,) = os.listdir(self.cache_dir)
+        with open(os.path.join(self.cache_dir, cache_file), "w", encoding="utf-8") as f:
+            f.write("{")
+
+        self.assertIn("paths", resolve_openapi_spec())
+
+    def test_spec_hash_ignores_directories(self):
+        with TemporaryDirectory() as openapi_dir:
+            with open(
+                os.path.join(openapi_dir, "spec.yaml"), "w", encoding="utf-8"
+            ) as f:
+                f.write("openapi: 3.0.0")
+            before = _spec_hash(openapi_dir)
+            os.mkdir(os.path.join(openapi_dir, "__pycache__"))
+
+            self.assertEqual(_spec_hash(openapi_dir), before)
@@ -69,6 +69,51 @@ def test_proposal_get(mock_oda, client):
     assert_json_is_equal(response.text, VALID_PROPOSAL_DATA_JSON)
 
 
+@patch("ska_oso_pht_services.api.oda.uow", autospec=True)
+def test_proposal_get_not_modified(mock_oda, client):
+    uow_mock = MagicMock()
+    uow_mock.prsls.get.return_value = Proposal.model_validate(
+        json.loads(VALID_PROPOSAL_DATA_JSON)
+    )
+    mock_oda.return_value.__enter__.return_value = uow_mock
+    url = "/ska-oso-pht-services/pht/api/v2/proposals/prp-ska01-202204-01"
+
+    response = client.get(url)
+    etag = response.headers["ETag"]
+
+    assert response.status_code == HTTPStatus.OK
+    assert etag
+
+    response = client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers["ETag"] == etag
+    assert response.data == b""
+
+    response = client.get(url, headers={"If-None-Match": '"stale"'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert_json_is_equal(response.text, VALID_PROPOSAL_DATA_JSON)
+
+
+@patch("ska_oso_pht_services.api.oda.uow", autospec=True)
+def test_proposal_get_etag_changes_with_version(mock_oda, client):
+    proposal = Proposal.model_validate(json.loads(VALID_PROPOSAL_DATA_JSON))
+    uow_mock = MagicMock()
+    uow_mock.prsls.get.return_value = proposal
+    mock_oda.return_value.__enter__.return_value = uow_mock
+    url = "/ska-oso-pht-services/pht/api/v2/proposals/prp-ska01-202204-01"
+
+    etag = client.get(url).headers["ETag"]
+    proposal.metadata.version += 1
+    proposal.info.title = "Updated title"
+    response = client.get(url, headers={"If-None-Match": etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["ETag"] != etag
+    assert json.loads(response.text)["info"]["title"] == "Updated title"
+
+
 @patch("ska_oso_pht_services.api.oda.uow", autospec=True)
 def test_proposal_get_list(mock_oda, client):
     list_result = json.loads(VALID_PROPOSAL_GET_LIST_RESULT_JSON)
@@ -88,10 +133,115 @@ def test_proposal_get_list(mock_oda, client):
     assert len(json.loads(response.text)) == len(list_result)
 
 
+@patch("ska_oso_pht_services.api.oda.uow", autospec=True)
+def test_proposal_get_list_paginated(mock_oda, client):
+    list_result = json.loads(VALID_PROPOSAL_GET_LIST_RESULT_JSON)
+    prsl_ids = [f"prsl-{index}" for index in range(3)]
+
+    uow_mock = MagicMock()
+    uow_mock.prsls.query.return_value = [
+        OPENAPI_CODEC.loads(Proposal, json.dumps({**list_result[0], "prsl_id": x}))
+        for x in reversed(prsl_ids)
+    ]
+    mock_oda.return_value.__enter__.return_value = uow_mock
+    url = "/ska-oso-pht-services/pht/api/v2/proposals/list/DefaultUser"
+
+    response = client.get(f"{url}?limit=2")
+
+    assert response.status_code == HTTPStatus.OK
+    assert [x["prsl_id"] for x in json.loads(response.text)] == prsl_ids[:2]
+    cursor = response.headers["X-Next-Cursor"]
+
+    response = client.get(f"{url}?limit=2&cursor={cursor}")
+
+    assert response.status_code == HTTPStatus.OK
+    assert [x["prsl_id"] for x in json.loads(response.text)] == prsl_ids[2:]
+    assert "X-Next-Cursor" not in response.headers
+
+
+@patch("ska_oso_pht_services.api.oda.uow", autospec=True)
+def test_proposal_get_list_ndjson(mock_oda, client):
+    list_result = json.loads(VALID_PROPOSAL_GET_LIST_RESULT_JSON)
+
+    uow_mock = MagicMock()
+    uow_mock.prsls.query.return_value = [
+        OPENAPI_CODEC.loads(Proposal, json.dumps(x)) for x in list_result
+    ]
+    mock_oda.return_value.__enter__.return_value = uow_mock
+
+    response = client.get(
+        "/ska-oso-pht-services/pht/api/v2/proposals/list/DefaultUser",
+        headers={"Accept": "application/x-ndjson"},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert len(lines) == len(list_result)
+    assert {json.loads(line)["prsl_id"] for line in lines} == {
+        x["prsl_id"] for x in list_result
+    }
+
+
+@patch("ska_oso_pht_services.api.oda.uow", autospec=True)
+def test_proposal_get_list_summary_view(mock_oda, client):
+    list_result = json.loads(VALID_PROPOSAL_GET_LIST_RESULT_JSON)
+
+    uow_mock = MagicMock()
+    uow_mock.prsls.query.return_value = [
+        OPENAPI_CODEC.loads(Proposal, json.dumps(x)) for x in list_result
+    ]
+    mock_oda.return_value.__enter__.return_value = uow_mock
+
+    response = client.get(
+        "/ska-oso-pht-services/pht/api/v2/proposals/list/DefaultUser?view=summary"
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    for summary in json.loads(response.text):
+        assert "prsl_id" in summary
+        assert set(summary["info"]) <= {"title", "proposal_type", "science_category"}
+        assert "targets" not in summary["info"]
+
+
+@patch("ska_oso_pht_services.api.oda.uow", autospec=True)
+def test_proposal_get_list_fields(mock_oda, client):
+    list_result = json.loads(VALID_PROPOSAL_GET_LIST_RESULT_JSON)
+
+    uow_mock = MagicMock()
+    uow_mock.prsls.query.return_value = [
+        OPENAPI_CODEC.loads(Proposal, json.dumps(x)) for x in list_result
+    ]
+    mock_oda.return_value.__enter__.return_value = uow_mock
+
+    response = client.get(
+        "/ska-oso-pht-services/pht/api/v2/proposals/list/DefaultUser"
+        "?fields=prsl_id,info.title"
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert sorted(json.loads(response.text), key=lambda x: x["prsl_id"]) == sorted(
+        (
+            {"prsl_id": x["prsl_id"], "info": {"title": x["info"]["title"]}}
+            for x in list_result
+        ),
+        key=lambda x: x["prsl_id"],
+    )
+
+
+def test_proposal_get_list_invalid_cursor(client):
+    with patch("ska_oso_pht_services.api.oda.uow"):
+        response = client.get(
+            "/ska-oso-pht-services/pht/api/v2/proposals/list/DefaultUser?cursor=%25"
+        )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
 @patch("ska_oso_pht_services.api.oda.uow", autospec=True)
 def test_proposal_edit(mock_oda, client):
     uow_mock = MagicMock()
-    uow_mock.prsls.get.return_value = OPENAPI_CODEC.loads(
+    uow_mock.prsls.add.return_value = OPENAPI_CODEC.loads(
         Proposal, VALID_PROPOSAL_DATA_JSON
     )
 
@@ -105,6 +255,112 @@ def test_proposal_edit(mock_oda, client):
 
     assert response.status_code == HTTPStatus.OK
     assert_json_is_equal(response.text, VALID_PROPOSAL_DATA_JSON)
+    # the stored proposal is returned by add rather than read back
+    uow_mock.prsls.get.assert_not_called()
+
+
+class TestProposalPatch:
+    url = "/ska-oso-pht-services/pht/api/v2/proposals/prp-ska01-202204-01"
+
+    @pytest.fixture
+    def uow_mock(self):
+        with patch("ska_oso_pht_services.api.oda.uow", autospec=True) as mock_oda:
+            uow_mock = MagicMock()
+            uow_mock.prsls.get.return_value = OPENAPI_CODEC.loads(
+                Proposal, VALID_PROPOSAL_DATA_JSON
+            )
+            uow_mock.prsls.add.side_effect = lambda prsl: prsl
+            mock_oda.return_value.__enter__.return_value = uow_mock
+            yield uow_mock
+
+    def test_proposal_patch(self, uow_mock, client):
+        response = client.patch(
+            self.url,
+            json=[{"op": "replace", "path": "/info/title", "value": "New title"}],
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.json["info"]["title"] == "New title"
+        added = uow_mock.prsls.add.call_args.args[0]
+        assert added.info.title == "New title"
+        uow_mock.commit.assert_called_once()
+        # the stored proposal is read once, and not read back after the add
+        uow_mock.prsls.get.assert_called_once_with("prp-ska01-202204-01")
+
+    def test_proposal_patch_investigator(self, uow_mock, client):
+        investigator = {
+            "investigator_id": "prp-ska01-202204-02",
+            "status": "pending",
+            "given_name": "Ella",
+            "family_name": "Fitzgerald",
+            "email": "somewhere.else@example.com",
+            "organization": "",
+            "for_phd": False,
+            "principal_investigator": False,
+        }
+
+        response = client.patch(
+            self.url,
+            json=[
+                {"op": "add", "path": "/info/investigators/-", "value": investigator}
+            ],
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        added = uow_mock.prsls.add.call_args.args[0]
+        assert added.investigator_refs == [
+            "prp-ska01-202204-01",
+            "prp-ska01-202204-02",
+        ]
+        assert added.status == "submitted"
+
+    def test_proposal_patch_not_found(self, uow_mock, client):
+        uow_mock.prsls.get.side_effect = KeyError("prp-ska01-202204-01")
+
+        response = client.patch(self.url, json=[])
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_proposal_patch_invalid(self, uow_mock, client):
+        response = client.patch(
+            self.url, json=[{"op": "remove", "path": "/info/unknown"}]
+        )
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        uow_mock.prsls.add.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "operation",
+        [
+            {"op": "replace", "path": "/metadata/version", "value": 100},
+            {"op": "remove", "path": "/metadata"},
+            {"op": "move", "from": "/metadata/version", "path": "/info/title"},
+            {"op": "replace", "path": "", "value": {}},
+        ],
+    )
+    def test_proposal_patch_metadata(self, uow_mock, client, operation):
+        response = client.patch(self.url, json=[operation])
+
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        uow_mock.prsls.add.assert_not_called()
+
+    def test_proposal_patch_write_error(self, uow_mock, client):
+        uow_mock.prsls.add.side_effect = KeyError("version")
+
+        response = client.patch(
+            self.url,
+            json=[{"op": "replace", "path": "/info/title", "value": "New title"}],
+        )
+
+        assert response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+
+    def test_proposal_patch_prsl_id(self, uow_mock, client):
+        response = client.patch(
+            self.url, json=[{"op": "replace", "path": "/prsl_id", "value": "other"}]
+        )
+
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+        uow_mock.prsls.add.assert_not_called()
 
 
 def test_validate_proposal_no_target_in_result(client):
@@ -172,6 +428,145 @@ def test_validate_proposal_result_passing(client):
     )
 
 
+class TestValidateProposalPatch:
+    url = "/ska-oso-pht-services/pht/api/v2/proposals/validate"
+    json_patch = [{"op": "replace", "path": "/info/result_details", "value": []}]
+
+    @pytest.fixture
+    def prsl_id_and_etag(self, client):
+        body = json.loads(VALID_PROPOSAL_POST_VALIDATE_BODY_JSON_PASSING)
+        response = client.post(self.url, json=body)
+        return body["prsl_id"], response.headers["ETag"]
+
+    def test_validate_proposal_patch(self, client, prsl_id_and_etag):
+        prsl_id, etag = prsl_id_and_etag
+
+        response = client.patch(
+            f"{self.url}/{prsl_id}",
+            data=json.dumps(self.json_patch),
+            headers={
+                "Content-type": "application/json-patch+json",
+                "If-Match": etag,
+            },
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert not response.json["result"]
+        assert response.json["validation_errors"]
+        assert response.headers["ETag"] != etag
+
+    def test_validate_proposal_patch_stale_version(self, client, prsl_id_and_etag):
+        prsl_id, etag = prsl_id_and_etag
+        client.patch(f"{self.url}/{prsl_id}", json=[], headers={"If-Match": etag})
+
+        response = client.patch(
+            f"{self.url}/{prsl_id}", json=self.json_patch, headers={"If-Match": etag}
+        )
+
+        assert response.status_code == HTTPStatus.CONFLICT
+
+    def test_validate_proposal_patch_without_version(self, client, prsl_id_and_etag):
+        prsl_id, _ = prsl_id_and_etag
+
+        response = client.patch(f"{self.url}/{prsl_id}", json=self.json_patch)
+
+        assert response.status_code == HTTPStatus.CONFLICT
+
+    @patch("ska_oso_pht_services.api.oda.uow", autospec=True)
+    def test_validate_proposal_patch_after_edit(
+        self, mock_oda, client, prsl_id_and_etag
+    ):
+        prsl_id, etag = prsl_id_and_etag
+        uow_mock = MagicMock()
+        uow_mock.prsls.add.return_value = OPENAPI_CODEC.loads(
+            Proposal, VALID_PROPOSAL_DATA_JSON
+        )
+        mock_oda.return_value.__enter__.return_value = uow_mock
+        edited = json.loads(VALID_PROPOSAL_DATA_JSON)
+        edited["prsl_id"] = prsl_id
+        client.put(f"/ska-oso-pht-services/pht/api/v2/proposals/{prsl_id}", json=edited)
+
+        response = client.patch(
+            f"{self.url}/{prsl_id}", json=self.json_patch, headers={"If-Match": etag}
+        )
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_validate_proposal_patch_unknown_proposal(self, client):
+        response = client.patch(f"{self.url}/prsl-unknown", json=[])
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@patch("ska_oso_pht_services.api.oda.uow", autospec=True)
+def test_validate_proposal_batch(mock_oda, client):
+    uow_mock = MagicMock()
+    uow_mock.prsls.get.side_effect = [
+        Proposal.model_validate(json.loads(VALID_PROPOSAL_DATA_JSON)),
+        KeyError("prsl-unknown"),
+    ]
+    mock_oda.return_value.__enter__.return_value = uow_mock
+    passing = json.loads(VALID_PROPOSAL_POST_VALIDATE_BODY_JSON_PASSING)
+
+    response = client.post(
+        "/ska-oso-pht-services/pht/api/v2/proposals/validate/batch",
+        json={
+            "proposals": [passing, {"prsl_id": "invalid"}],
+            "prsl_ids": ["prp-ska01-202204-01", "prsl-unknown"],
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [(line["index"], line["prsl_id"]) for line in lines] == [
+        (0, "prp-ska01-202204-01"),
+        (1, "prsl-unknown"),
+        (0, passing["prsl_id"]),
+        (1, "invalid"),
+    ]
+    assert not lines[0]["result"]
+    assert "error" in lines[1]
+    assert lines[2]["result"]
+    assert "error" in lines[3]
+
+
+@patch("ska_oso_pht_services.api.oda.uow", autospec=True)
+def test_validate_proposal_batch_reports_errors_in_the_stream(mock_oda, client):
+    uow_mock = MagicMock()
+    uow_mock.prsls.get.side_effect = ConnectionError("ODA down")
+    mock_oda.return_value.__enter__.return_value = uow_mock
+
+    def broken(bodies):
+        raise RuntimeError("validation broke")
+        yield  # pylint: disable=unreachable
+
+    with patch("ska_oso_pht_services.api.batch_validation.validate_bodies", broken):
+        response = client.post(
+            "/ska-oso-pht-services/pht/api/v2/proposals/validate/batch",
+            json={"proposals": [{"prsl_id": "a"}], "prsl_ids": ["prsl-1"]},
+        )
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [
+        {
+            "index": 0,
+            "prsl_id": "prsl-1",
+            "error": "Could not read proposal prsl-1: ODA down",
+        },
+        {"error": "Validation of the batch failed: validation broke"},
+    ]
+
+
+def test_validate_proposal_batch_too_large(client):
+    response = client.post(
+        "/ska-oso-pht-services/pht/api/v2/proposals/validate/batch",
+        json={"prsl_ids": ["prsl"] * 5001},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
 @pytest.mark.skip(
     reason="revisit test for validate endpoint after refactoring with new pdm data"
 )
@@ -212,6 +607,143 @@ class TestGetSignedUrl:
         assert response.status_code == HTTPStatus.OK
 
 
+def test_get_signed_urls(client):
+    response = client.post(
+        "/ska-oso-pht-services/pht/api/v2/signedurls",
+        json={
+            "requests": [
+                {"operation": "upload", "filename": "science.pdf"},
+                {"operation": "download", "filename": "technical.pdf"},
+            ]
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    urls = response.json["urls"]
+    assert [(x["operation"], x["filename"]) for x in urls] == [
+        ("upload", "science.pdf"),
+        ("download", "technical.pdf"),
+    ]
+    assert "science.pdf" in urls[0]["url"]
+    assert "technical.pdf" in urls[1]["url"]
+
+
+def test_get_signed_urls_rejects_unknown_operation(client):
+    response = client.post(
+        "/ska-oso-pht-services/pht/api/v2/signedurls",
+        json={"requests": [{"operation": "copy", "filename": "science.pdf"}]},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@patch("ska_oso_pht_services.api.s3_bucket.create_multipart_upload")
+def test_multipart_upload_create(mock_create, client):
+    mock_create.return_value = ("upload-1", ["url1", "url2"])
+
+    response = client.post(
+        "/ska-oso-pht-services/pht/api/v2/upload/multipart/large.pdf",
+        json={"parts": 2},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json == {"upload_id": "upload-1", "urls": ["url1", "url2"]}
+    assert mock_create.call_args.args[:2] == ("large.pdf", 2)
+
+
+@patch("ska_oso_pht_services.api.s3_bucket.complete_multipart_upload")
+def test_multipart_upload_complete(mock_complete, client):
+    response = client.post(
+        "/ska-oso-pht-services/pht/api/v2/upload/multipart/large.pdf/complete",
+        json={
+            "upload_id": "upload-1",
+            "parts": [
+                {"part_number": 1, "etag": '"etag1"'},
+                {"part_number": 2, "etag": '"etag2"'},
+            ],
+        },
+    )
+
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert mock_complete.call_args.args[:3] == (
+        "large.pdf",
+        "upload-1",
+        [(1, '"etag1"'), (2, '"etag2"')],
+    )
+
+
+def test_multipart_upload_complete_rejects_invalid_parts(client):
+    response = client.post(
+        "/ska-oso-pht-services/pht/api/v2/upload/multipart/large.pdf/complete",
+        json={"upload_id": "upload-1", "parts": [{"part_number": "one"}]},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+@patch("ska_oso_pht_services.api.s3_bucket.abort_multipart_upload")
+def test_multipart_upload_abort(mock_abort, client):
+    response = client.delete(
+        "/ska-oso-pht-services/pht/api/v2/upload/multipart/large.pdf?upload_id=upload-1"
+    )
+
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert mock_abort.call_args.args[:2] == ("large.pdf", "upload-1")
+
+
+def test_get_metrics(client):
+    client.get("/ska-oso-pht-services/pht/api/v2/send-email/unknown")
+
+    response = client.get("/ska-oso-pht-services/pht/api/v2/metrics")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == "text/plain"
+    assert (
+        'pht_requests_total{operation="send_email_status",status="404"}'
+        in response.text
+    )
+    assert 'pht_requests_in_flight{operation="get_metrics"} 1' in response.text
+
+
+@patch("ska_oso_pht_services.utils.profiling.PROFILING_ENABLED", True)
+def test_profile_request(client):
+    response = client.get(
+        "/ska-oso-pht-services/pht/api/v2/send-email/unknown",
+        headers={"X-Profile": "1"},
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    profile_id = response.headers["X-Profile-Id"]
+
+    response = client.get(
+        f"/ska-oso-pht-services/pht/api/v2/profiles/{profile_id}?format=text"
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == "text/plain"
+    assert "send_email_status" in response.text
+
+    response = client.get(f"/ska-oso-pht-services/pht/api/v2/profiles/{profile_id}")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.mimetype == "application/octet-stream"
+
+
+def test_profiling_disabled(client):
+    response = client.get(
+        "/ska-oso-pht-services/pht/api/v2/send-email/unknown",
+        headers={"X-Profile": "1"},
+    )
+
+    assert "X-Profile-Id" not in response.headers
+
+
+def test_get_unknown_profile(client):
+    response = client.get("/ska-oso-pht-services/pht/api/v2/profiles/unknown")
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
 class TestGetCoordinates:
     test_cases = [
         (
@@ -280,13 +812,56 @@ class TestGetCoordinates:
             self.get_coordinates_generic(client, *data)
 
 
-def test_send_email_success(client, mocker):
-    # Mock the smtplib.SMTP object to avoid actually sending emails during the test
-    mock_smtp = mocker.patch("smtplib.SMTP")
+@patch("ska_oso_pht_services.utils.coordinates.get_coordinates_batch")
+def test_get_coordinates_batch(mock_batch, client):
+    mock_batch.return_value = {
+        "M31": {
+            "ra": "00:42:44.33",
+            "dec": "+41:16:07.5",
+            "velocity": -300.0,
+            "redshift": -0.0010006922855944561,
+        },
+        "unknown": "Object not found in SIMBAD or NED",
+    }
+
+    response = client.post(
+        "/ska-oso-pht-services/pht/api/v2/coordinates/batch",
+        json={"identifiers": ["M31", "unknown"], "reference_frame": "equatorial"},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    mock_batch.assert_called_once_with(["M31", "unknown"])
+    results = json.loads(response.data.decode())["results"]
+    assert results[0] == {
+        "identifier": "M31",
+        "coordinates": {
+            "equatorial": {
+                "ra": "00:42:44.330",
+                "dec": "+41:16:07.500",
+                "velocity": -300.0,
+                "redshift": -0.0010006922855944561,
+            }
+        },
+    }
+    assert results[1]["identifier"] == "unknown"
+    assert "Object not found" in results[1]["error"]
+
+
+def test_get_coordinates_batch_rejects_invalid_identifiers(client):
+    response = client.post(
+        "/ska-oso-pht-services/pht/api/v2/coordinates/batch",
+        json={"identifiers": "M31", "reference_frame": "equatorial"},
+    )
 
-    # Mock the response of sendmail method
-    mock_smtp_instance = mock_smtp.return_value.__enter__.return_value
-    mock_smtp_instance.sendmail.return_value = {"message": "Email sent successfully!"}
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_send_email_success(client, mocker):
+    # Mock the delivery queue to avoid actually sending emails during the test
+    mock_queue = mocker.patch(
+        "ska_oso_pht_services.api.email_delivery.DELIVERY_QUEUE", autospec=True
+    )
+    mock_queue.submit.return_value = "delivery-1"
 
     # Define the email data to be sent
     response = client.post(
@@ -294,15 +869,20 @@ def test_send_email_success(client, mocker):
         json={"email": "recipient@example.com", "prsl_id": "test-prsl-id-123"},
     )
 
-    # Assert that the response status code is 200 (success)
-    assert response.status_code == HTTPStatus.OK
-    assert b"Email sent successfully" in response.data
+    # Assert that the email is queued and the response status code is 202
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert response.json["delivery_id"] == "delivery-1"
+    recipient, msg = mock_queue.submit.call_args.args
+    assert recipient == "recipient@example.com"
+    assert "test-prsl-id-123" in msg["Subject"]
 
 
 def test_send_email_failure(client, mocker):
-    # Mock the smtplib.SMTP object to raise an exception
-    mock_smtp = mocker.patch("smtplib.SMTP")
-    mock_smtp.side_effect = Exception("SMTP connection error")
+    # Mock the delivery queue to raise an exception
+    mock_queue = mocker.patch(
+        "ska_oso_pht_services.api.email_delivery.DELIVERY_QUEUE", autospec=True
+    )
+    mock_queue.submit.side_effect = Exception("Queue error")
 
     # Define the email data to be sent
     response = client.post(
@@ -312,4 +892,70 @@ def test_send_email_failure(client, mocker):
 
     # Assert that the response status code is 500 (internal server error)
     assert response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
-    assert b"SMTP connection error" in response.data
+    assert b"Queue error" in response.data
+
+
+def test_send_email_bulk(client, mocker):
+    mock_queue = mocker.patch(
+        "ska_oso_pht_services.api.email_delivery.DELIVERY_QUEUE", autospec=True
+    )
+    mock_queue.submit.side_effect = ["delivery-1", "delivery-2"]
+
+    response = client.post(
+        "/ska-oso-pht-services/pht/api/v2/send-email/bulk",
+        json={
+            "prsl_id": "test-prsl-id-123",
+            "emails": [
+                "first@example.com",
+                "not-an-address",
+                "second@example.com",
+                "first@example.com",
+            ],
+        },
+    )
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert response.json["results"] == [
+        {
+            "email": "first@example.com",
+            "delivery_id": "delivery-1",
+            "status": "queued",
+        },
+        {"email": "not-an-address", "status": "rejected", "error": "Invalid address"},
+        {
+            "email": "second@example.com",
+            "delivery_id": "delivery-2",
+            "status": "queued",
+        },
+    ]
+    assert [c.args[0] for c in mock_queue.submit.call_args_list] == [
+        "first@example.com",
+        "second@example.com",
+    ]
+
+
+def test_send_email_bulk_rejects_invalid_body(client):
+    response = client.post(
+        "/ska-oso-pht-services/pht/api/v2/send-email/bulk",
+        json={"prsl_id": "test-prsl-id-123", "emails": "first@example.com"},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_send_email_status(client, mocker):
+    mock_queue = mocker.patch(
+        "ska_oso_pht_services.api.email_delivery.DELIVERY_QUEUE", autospec=True
+    )
+    mock_queue.status.return_value = {"status": "sent"}
+
+    response = client.get("/ska-oso-pht-services/pht/api/v2/send-email/delivery-1")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json == {"delivery_id": "delivery-1", "status": "sent"}
+
+
+def test_send_email_status_not_found(client):
+    response = client.get("/ska-oso-pht-services/pht/api/v2/send-email/unknown")
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,94 @@
+"""
+Unit tests for ska_oso_pht_services.utils.batch_validation
+"""
+
+import json
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+import pytest
+
+from ska_oso_pht_services.utils import batch_validation
+
+from .util import (
+    VALID_PROPOSAL_POST_VALIDATE_BODY_JSON_NO_TARGET_IN_RESULT,
+    VALID_PROPOSAL_POST_VALIDATE_BODY_JSON_PASSING,
+)
+
+
+@pytest.fixture
+def bodies():
+    return [
+        json.loads(VALID_PROPOSAL_POST_VALIDATE_BODY_JSON_PASSING),
+        json.loads(VALID_PROPOSAL_POST_VALIDATE_BODY_JSON_NO_TARGET_IN_RESULT),
+        {"prsl_id": "invalid"},
+    ] * 3
+
+
+def _expected(bodies):
+    return [batch_validation.validate_body(body) for body in bodies]
+
+
+def test_invalid_body_gives_error():
+    assert "error" in batch_validation.validate_body({"prsl_id": "invalid"})
+
+
+def test_small_batches_are_validated_inline(bodies):
+    with mock.patch.object(batch_validation, "_pool") as pool:
+        results = list(batch_validation.validate_bodies(bodies))
+
+    pool.assert_not_called()
+    assert results == _expected(bodies)
+
+
+def test_large_batches_are_validated_in_processes(bodies, parallel):
+    try:
+        results = list(batch_validation.validate_bodies(bodies))
+        assert batch_validation._POOL is not None  # pylint: disable=protected-access
+    finally:
+        batch_validation.shutdown()
+
+    assert results == _expected(bodies)
+    assert batch_validation._POOL is None  # pylint: disable=protected-access
+
+
+@pytest.fixture
+def parallel(tmp_path):
+    with mock.patch.object(
+        batch_validation, "VALIDATION_PARALLEL_MIN_SIZE", 2
+    ), mock.patch.object(batch_validation, "VALIDATION_WORKERS", 2), mock.patch.object(
+        batch_validation, "VALIDATION_LOCK_PATH", str(tmp_path / "lock")
+    ):
+        yield
+
+
+def test_one_process_at_a_time_uses_its_pool(bodies, parallel):
+    # pylint: disable-next=protected-access
+    lock = batch_validation._try_lock()
+    try:
+        with mock.patch.object(batch_validation, "_pool") as pool:
+            results = list(batch_validation.validate_bodies(bodies))
+    finally:
+        lock.close()
+
+    pool.assert_not_called()
+    assert results == _expected(bodies)
+
+
+def test_rest_of_the_batch_is_validated_inline_if_the_pool_breaks(bodies, parallel):
+    def broken_results():
+        yield batch_validation.validate_body(bodies[0])
+        raise BrokenProcessPool("killed")
+
+    with mock.patch.object(batch_validation, "_pool") as pool, mock.patch.object(
+        batch_validation, "shutdown"
+    ) as shutdown:
+        pool.return_value.map.return_value = broken_results()
+        results = list(batch_validation.validate_bodies(bodies))
+
+    shutdown.assert_called_once()
+    assert results == _expected(bodies)
+    # the lock is released at the end of the batch
+    lock = batch_validation._try_lock()  # pylint: disable=protected-access
+    assert lock is not None
+    lock.close()
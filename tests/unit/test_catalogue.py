@@ -0,0 +1,74 @@
+"""
+Unit tests for ska_oso_pht_services.utils.catalogue
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from ska_oso_pht_services.utils import catalogue, coordinates
+
+CATALOGUE_CSV = """name,aliases,ra,dec,velocity,redshift
+M31,NGC 224|Andromeda Galaxy,00 42 44.330,+41 16 07.50,-300.0,
+Crab,M1|NGC 1952,05 34 31.94,+22 00 52.2,,
+"""
+
+
+@pytest.fixture(name="catalogue_path")
+def fixture_catalogue_path(tmp_path):
+    csv_path = tmp_path / "catalogue.csv"
+    csv_path.write_text(CATALOGUE_CSV)
+    npz_path = tmp_path / "catalogue.npz"
+
+    assert catalogue.build_catalogue(str(csv_path), str(npz_path)) == 2
+    return str(npz_path)
+
+
+def test_lookup_by_name_and_alias(catalogue_path):
+    local_catalogue = catalogue.LocalCatalogue(catalogue_path)
+
+    m31 = local_catalogue.lookup("M31")
+    assert m31 == local_catalogue.lookup("andromeda  galaxy")
+    assert m31[0] == pytest.approx(10.684708)
+    assert m31[1] == pytest.approx(41.26875)
+    assert m31[2:] == (-300.0, None)
+    assert local_catalogue.lookup("NGC 1952")[2:] == (None, None)
+    assert local_catalogue.lookup("M42") is None
+
+
+def test_get_coordinates_uses_catalogue_before_remote_lookup(catalogue_path):
+    with patch.object(
+        catalogue, "COORDINATES_CATALOGUE_PATH", catalogue_path
+    ), patch.object(catalogue, "_CATALOGUE", None), patch.object(
+        coordinates, "_query_coordinates"
+    ) as remote:
+        result = coordinates.get_coordinates("NGC 224")
+
+    remote.assert_not_called()
+    assert result["ra"].startswith("00:42:44.33")
+    assert result["dec"].startswith("+41:16:07.5")
+    assert result["velocity"] == -300.0
+    assert result["redshift"] == pytest.approx(-0.0010006922855944561)
+
+
+def test_catalogue_which_cannot_be_read_is_loaded_once(tmp_path, caplog):
+    with patch.object(
+        catalogue, "COORDINATES_CATALOGUE_PATH", str(tmp_path / "missing.npz")
+    ), patch.object(catalogue, "_CATALOGUE", None), patch.object(
+        catalogue.np, "load", wraps=catalogue.np.load
+    ) as load:
+        assert catalogue.get_catalogue() is None
+        assert catalogue.get_catalogue() is None
+
+    load.assert_called_once()
+    assert len(caplog.records) == 1
+
+
+def test_main_builds_catalogue(tmp_path, capsys):
+    csv_path = tmp_path / "catalogue.csv"
+    csv_path.write_text(CATALOGUE_CSV)
+
+    catalogue.main([str(csv_path), str(tmp_path / "out.npz")])
+
+    assert "Wrote 2 objects" in capsys.readouterr().out
+    assert len(catalogue.LocalCatalogue(str(tmp_path / "out.npz"))) == 2
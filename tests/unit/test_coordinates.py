@@ -0,0 +1,248 @@
+"""
+Unit tests for ska_oso_pht_services.utils.coordinates
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import pytest
+from astropy.table import Table
+from astroquery.exceptions import RemoteServiceError
+
+from ska_oso_pht_services.utils import coordinates
+from ska_oso_pht_services.utils.resolver_cache import MemoryBackend, ResolverCache
+
+SIMBAD_TABLE = Table(
+    rows=[
+        ("M31", "00 42 44.330", "+41 16 07.50", -300.0, -300.0),
+        ("Crab", "05 34 31.94", "+22 00 52.2", 0.0, 0.0),
+    ],
+    names=("TYPED_ID", "RA", "DEC", "RVZ_RADVEL", "RV_VALUE"),
+    masked=True,
+)
+SIMBAD_TABLE["RVZ_RADVEL"].mask[1] = True
+SIMBAD_TABLE["RV_VALUE"].mask[1] = True
+NED_TABLE = Table(rows=[(2.143912, -33.858388)], names=("RA", "DEC"))
+
+
+@pytest.fixture(name="remote")
+def fixture_remote():
+    simbad, ned = MagicMock(), MagicMock()
+    simbad.query_objects.return_value = SIMBAD_TABLE
+
+    def query_ned(object_name):
+        if object_name == "NGC 10":
+            return NED_TABLE
+        raise RemoteServiceError("not found")
+
+    ned.query_object.side_effect = query_ned
+    with patch.object(
+        coordinates, "get_resolvers", return_value=(simbad, ned)
+    ), patch.object(coordinates, "RESOLVER_CACHE", ResolverCache(MemoryBackend())):
+        yield simbad, ned
+
+
+def test_get_coordinates_batch_queries_simbad_once(remote):
+    simbad, ned = remote
+
+    result = coordinates.get_coordinates_batch(["M31", "Crab", "NGC 10", "unknown"])
+
+    simbad.query_objects.assert_called_once_with(["M31", "Crab", "NGC 10", "unknown"])
+    assert sorted(c.args[0] for c in ned.query_object.call_args_list) == [
+        "NGC 10",
+        "unknown",
+    ]
+    assert result["M31"] == {
+        "ra": "00:42:44.33",
+        "dec": "+41:16:07.5",
+        "velocity": -300.0,
+        "redshift": -0.0010006922855944561,
+    }
+    assert result["Crab"]["velocity"] is None
+    assert result["NGC 10"]["ra"] == "00:08:34.53888"
+    assert "Object not found in SIMBAD or NED" in result["unknown"]
+
+
+def test_get_coordinates_batch_uses_cache(remote):
+    simbad, _ = remote
+
+    coordinates.get_coordinates_batch(["M31"])
+    coordinates.get_coordinates_batch(["m31", "Crab"])
+
+    assert simbad.query_objects.call_args_list[1].args == (["Crab"],)
+    assert coordinates.RESOLVER_CACHE.stats()["hits"] == 1
+
+
+def test_get_coordinates_batch_resolves_every_case_variant(remote):
+    simbad, ned = remote
+
+    result = coordinates.get_coordinates_batch(["M31", "m31", "CRAB"])
+
+    simbad.query_objects.assert_called_once_with(["M31", "m31", "CRAB"])
+    ned.query_object.assert_not_called()
+    assert result["m31"] == result["M31"]
+    assert result["M31"]["velocity"] == -300.0
+    assert result["CRAB"]["ra"] == "05:34:31.94"
+
+
+def test_get_coordinates_batch_reports_failed_ned_lookups(remote):
+    _, ned = remote
+    query_ned = ned.query_object.side_effect
+
+    def fail_for_bad(object_name):
+        if object_name == "bad":
+            raise ConnectionError("NED down")
+        return query_ned(object_name)
+
+    ned.query_object.side_effect = fail_for_bad
+
+    result = coordinates.get_coordinates_batch(["M31", "NGC 10", "bad"])
+
+    assert result["M31"]["ra"] == "00:42:44.33"
+    assert result["NGC 10"]["ra"] == "00:08:34.53888"
+    assert result["bad"] == "Error resolving bad in NED: NED down"
+    found, _ = coordinates.RESOLVER_CACHE.lookup("bad")
+    assert not found
+
+
+def test_get_coordinates_batch_falls_back_to_ned_if_simbad_fails(remote):
+    simbad, _ = remote
+    simbad.query_objects.side_effect = ConnectionError("SIMBAD down")
+
+    result = coordinates.get_coordinates_batch(["NGC 10", "unknown"])
+
+    assert result["NGC 10"]["ra"] == "00:08:34.53888"
+    assert "SIMBAD down" in result["unknown"]
+    assert coordinates.RESOLVER_CACHE.lookup("NGC 10")[0]
+    assert not coordinates.RESOLVER_CACHE.lookup("unknown")[0]
+
+
+def test_get_coordinates_batch_enforces_deadline(remote):
+    _, ned = remote
+    ned.query_object.side_effect = lambda object_name: time.sleep(1)
+
+    start = time.monotonic()
+    result = coordinates.get_coordinates_batch(["M31", "NGC 10"], deadline=0.1)
+
+    assert time.monotonic() - start < 0.5
+    assert result["M31"]["ra"] == "00:42:44.33"
+    assert result["NGC 10"] == "Resolving NGC 10 took longer than 0.1 seconds"
+    found, _ = coordinates.RESOLVER_CACHE.lookup("NGC 10")
+    assert not found
+
+
+def test_get_coordinates_batch_does_not_use_the_lookup_pool(remote):
+    with patch.object(coordinates, "_get_executor") as get_executor:
+        coordinates.get_coordinates_batch(["NGC 10", "unknown"])
+
+    get_executor.assert_not_called()
+
+
+RA = ["00:08:34.539", "00:42:44.330", "05:34:31.94", "-00:00:01.5"]
+DEC = ["-33:51:30.197", "+41:16:07.500", "+22:00:52.2", "-00:30:00.0"]
+
+
+def test_convert_to_galactic_array_matches_scalar_version():
+    result = coordinates.convert_to_galactic_array(RA, DEC)
+
+    for index, (ra, dec) in enumerate(zip(RA, DEC)):
+        expected = coordinates.convert_to_galactic(ra, dec, None, None)["galactic"]
+        assert result["lon"][index] == expected["lon"]
+        assert result["lat"][index] == expected["lat"]
+
+
+def test_round_coord_to_3_decimal_places_array_matches_scalar_version():
+    result = coordinates.round_coord_to_3_decimal_places_array(RA, DEC)
+
+    for index, (ra, dec) in enumerate(zip(RA, DEC)):
+        expected = coordinates.round_coord_to_3_decimal_places(ra, dec, None, None)
+        assert result["ra"][index] == expected["equatorial"]["ra"]
+        assert result["dec"][index] == expected["equatorial"]["dec"]
+
+
+def test_convert_ra_dec_deg_array_matches_scalar_version():
+    result = coordinates.convert_ra_dec_deg_array(RA, DEC)
+
+    for index, (ra, dec) in enumerate(zip(RA, DEC)):
+        expected = coordinates.convert_ra_dec_deg(ra, dec)
+        assert result["ra"][index] == expected["ra"]
+        assert result["dec"][index] == expected["dec"]
+
+
+def slow(result, delay):
+    def resolve(object_name):  # pylint: disable=unused-argument
+        time.sleep(delay)
+        return result
+
+    return resolve
+
+
+def test_resolve_concurrently_prefers_first_resolver():
+    result = coordinates.resolve_concurrently(
+        "M31", (slow({"source": "simbad"}, 0.1), slow({"source": "ned"}, 0))
+    )
+
+    assert result == {"source": "simbad"}
+
+
+def test_resolve_concurrently_falls_back_without_waiting_twice():
+    start = time.monotonic()
+    result = coordinates.resolve_concurrently(
+        "NGC 10", (slow(None, 0.2), slow({"source": "ned"}, 0.2))
+    )
+
+    assert result == {"source": "ned"}
+    assert time.monotonic() - start < 0.35
+
+
+def test_resolve_concurrently_returns_none_if_not_found():
+    assert (
+        coordinates.resolve_concurrently("unknown", (slow(None, 0), slow(None, 0)))
+        is None
+    )
+
+
+def test_resolve_concurrently_enforces_deadline():
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        coordinates.resolve_concurrently(
+            "M31", (slow({"source": "simbad"}, 1), slow(None, 0)), deadline=0.1
+        )
+    assert time.monotonic() - start < 0.5
+
+
+def test_resolve_concurrently_uses_fallback_when_first_resolver_times_out():
+    result = coordinates.resolve_concurrently(
+        "M31", (slow({"source": "simbad"}, 1), slow({"source": "ned"}, 0)), deadline=0.1
+    )
+
+    assert result == {"source": "ned"}
+
+
+def test_init_resolvers_configures_simbad_once():
+    simbad, ned = coordinates.init_resolvers()
+    fields = list(simbad.get_votable_fields())
+
+    assert coordinates.get_resolvers() == (simbad, ned)
+    assert coordinates.init_resolvers() == (simbad, ned)
+    assert simbad.get_votable_fields() == fields
+    assert fields.count("typed_id") == 1
+    assert simbad.TIMEOUT == coordinates.SIMBAD_TIMEOUT
+    assert ned.TIMEOUT == coordinates.NED_TIMEOUT
+
+
+def test_each_thread_has_its_own_resolvers():
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        barrier = threading.Barrier(2)
+
+        def resolvers():
+            barrier.wait()
+            return coordinates.get_resolvers()
+
+        first, second = executor.map(lambda _: resolvers(), range(2))
+
+    assert first[0] is not second[0]
+    assert first[1] is not second[1]
+    assert first[0].TIMEOUT == second[0].TIMEOUT == coordinates.SIMBAD_TIMEOUT
@@ -0,0 +1,14 @@
+"""
+Unit tests for ska_oso_pht_services.utils.cpus
+"""
+
+from unittest import mock
+
+from ska_oso_pht_services.utils.cpus import available_cpus
+
+
+def test_available_cpus_respects_cgroup_limit():
+    with mock.patch(
+        "builtins.open", mock.mock_open(read_data="200000 100000\n")
+    ), mock.patch("os.sched_getaffinity", return_value=set(range(16)), create=True):
+        assert available_cpus() == 2
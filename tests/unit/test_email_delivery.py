@@ -0,0 +1,242 @@
+"""
+Unit tests for ska_oso_pht_services.utils.email_delivery
+"""
+
+import socketserver
+import threading
+import time
+
+import pytest
+
+from ska_oso_pht_services.utils.email_delivery import (
+    FAILED,
+    QUEUED,
+    SENT,
+    DeliveryQueue,
+    SQLiteStatusStore,
+    _render_invitation,
+    invitation_message,
+)
+
+
+class StubSMTPHandler(socketserver.StreamRequestHandler):
+    """
+    Minimal SMTP server side, recording the messages it receives.
+    """
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 stub ESMTP")
+        while line := self.rfile.readline().decode().rstrip("\r\n"):
+            command = line.split(" ", 1)[0].upper()
+            if command == "EHLO":
+                self.reply("250-stub")
+                self.reply("250 AUTH PLAIN")
+            elif command == "AUTH":
+                server.logins += 1
+                self.reply("235 Authentication successful")
+            elif command == "MAIL":
+                self.reply("250 OK")
+            elif command == "RCPT":
+                recipient = line.split(":", 1)[1].strip("<> ")
+                if recipient in server.rejected:
+                    self.reply("550 No such user")
+                elif recipient in server.deferred:
+                    self.reply("450 Mailbox busy")
+                else:
+                    server.recipients.append(recipient)
+                    self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class StubSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubSMTPHandler)
+        self.connections = 0
+        self.logins = 0
+        self.recipients = []
+        self.rejected = set()
+        self.deferred = set()
+
+
+@pytest.fixture
+def smtp_server():
+    server = StubSMTPServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_queue(server, **kwargs):
+    return DeliveryQueue(
+        host="127.0.0.1",
+        port=server.server_address[1],
+        user="pht@example.com",
+        password="secret",
+        starttls=False,
+        **kwargs,
+    )
+
+
+def test_invitation_message():
+    msg = invitation_message("someone@example.com", "prsl-1")
+
+    assert msg["To"] == "someone@example.com"
+    assert "prsl-1" in msg["Subject"]
+
+
+def test_invitation_is_rendered_once_per_proposal():
+    misses = _render_invitation.cache_info().misses
+
+    first = invitation_message("a@example.com", "prsl-2")
+    second = invitation_message("b@example.com", "prsl-2")
+
+    assert _render_invitation.cache_info().misses == misses + 1
+    assert first["Subject"] == second["Subject"]
+    assert first["To"] != second["To"]
+
+
+def test_messages_are_sent_over_one_connection(smtp_server):
+    delivery_queue = make_queue(smtp_server)
+    recipients = [f"user{i}@example.com" for i in range(5)]
+
+    ids = [
+        delivery_queue.submit(recipient, invitation_message(recipient, "prsl-1"))
+        for recipient in recipients
+    ]
+    delivery_queue.join()
+
+    assert smtp_server.recipients == recipients
+    assert smtp_server.connections == 1
+    assert smtp_server.logins == 1
+    assert [delivery_queue.status(x)["status"] for x in ids] == [SENT] * 5
+
+
+def test_failed_delivery_is_retried_and_reported(smtp_server):
+    smtp_server.deferred.add("busy@example.com")
+    delivery_queue = make_queue(smtp_server, max_retries=2, retry_backoff=0)
+
+    delivery_id = delivery_queue.submit(
+        "busy@example.com", invitation_message("busy@example.com", "prsl-1")
+    )
+    delivery_queue.join()
+
+    status = delivery_queue.status(delivery_id)
+    assert status["status"] == FAILED
+    assert "Mailbox busy" in status["error"]
+    assert smtp_server.connections == 3
+
+
+def test_rejected_delivery_is_not_retried(smtp_server):
+    smtp_server.rejected.add("unknown@example.com")
+    delivery_queue = make_queue(smtp_server, max_retries=2, retry_backoff=10)
+
+    rejected_id = delivery_queue.submit(
+        "unknown@example.com", invitation_message("unknown@example.com", "prsl-1")
+    )
+    sent_id = delivery_queue.submit(
+        "a@example.com", invitation_message("a@example.com", "prsl-1")
+    )
+    delivery_queue.join()
+
+    status = delivery_queue.status(rejected_id)
+    assert status["status"] == FAILED
+    assert "No such user" in status["error"]
+    assert delivery_queue.status(sent_id)["status"] == SENT
+    # no backoff and the connection is reused for the next message
+    assert smtp_server.connections == 1
+
+
+def test_unexpected_error_does_not_stop_the_worker(smtp_server):
+    delivery_queue = make_queue(smtp_server)
+    deliver = delivery_queue._deliver  # pylint: disable=protected-access
+
+    def fail_once(delivery_id, recipient, message):
+        if recipient == "boom@example.com":
+            raise RuntimeError("boom")
+        deliver(delivery_id, recipient, message)
+
+    delivery_queue._deliver = fail_once  # pylint: disable=protected-access
+    failed_id = delivery_queue.submit(
+        "boom@example.com", invitation_message("boom@example.com", "prsl-1")
+    )
+    sent_id = delivery_queue.submit(
+        "a@example.com", invitation_message("a@example.com", "prsl-1")
+    )
+    delivery_queue.join()
+
+    assert delivery_queue.status(failed_id) == {"status": FAILED, "error": "boom"}
+    assert delivery_queue.status(sent_id)["status"] == SENT
+
+
+def test_connection_is_closed_when_idle(smtp_server):
+    delivery_queue = make_queue(smtp_server, idle_timeout=0.01)
+
+    delivery_queue.submit("a@example.com", invitation_message("a@example.com", "p"))
+    delivery_queue.join()
+    time.sleep(0.1)
+    delivery_queue.submit("b@example.com", invitation_message("b@example.com", "p"))
+    delivery_queue.join()
+
+    assert smtp_server.connections == 2
+
+
+def test_join_gives_up_at_the_timeout(smtp_server):
+    smtp_server.deferred.add("busy@example.com")
+    delivery_queue = make_queue(smtp_server, max_retries=1, retry_backoff=10)
+    delivery_queue.submit(
+        "busy@example.com", invitation_message("busy@example.com", "prsl-1")
+    )
+
+    assert not delivery_queue.join(timeout=0.1)
+    assert make_queue(smtp_server).join(timeout=0)
+
+
+def test_unknown_delivery_id():
+    assert DeliveryQueue().status("unknown") is None
+
+
+def test_statuses_are_shared_through_the_status_file(smtp_server, tmp_path):
+    path = str(tmp_path / "status.sqlite")
+    delivery_queue = make_queue(smtp_server, status_path=path)
+
+    delivery_id = delivery_queue.submit(
+        "a@example.com", invitation_message("a@example.com", "prsl-1")
+    )
+    delivery_queue.join()
+
+    # e.g. the queue of another gunicorn worker
+    assert make_queue(smtp_server, status_path=path).status(delivery_id) == {
+        "status": SENT
+    }
+
+
+def test_status_file_keeps_the_latest_statuses(tmp_path):
+    store = SQLiteStatusStore(str(tmp_path / "status.sqlite"), maxsize=2)
+
+    for delivery_id in ("a", "b", "c"):
+        store.set(delivery_id, {"status": QUEUED})
+        time.sleep(0.01)
+    store.set("b", {"status": SENT})
+
+    assert store.get("a") is None
+    assert store.get("b") == {"status": SENT}
+    assert store.get("c") == {"status": QUEUED}
@@ -0,0 +1,102 @@
+"""
+Unit tests for ska_oso_pht_services.gunicorn_config
+"""
+
+import importlib
+from unittest import mock
+
+import pytest
+
+from ska_oso_pht_services import gunicorn_config
+
+
+@pytest.fixture
+def load_config(monkeypatch):
+    def load(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return importlib.reload(gunicorn_config)
+
+    yield load
+    monkeypatch.undo()
+    importlib.reload(gunicorn_config)
+
+
+def test_defaults_to_threaded_workers(load_config):
+    config = load_config()
+
+    assert config.worker_class == "gthread"
+    assert config.workers == config.available_cpus() + 1
+    assert config.threads == 8
+    assert config.preload_app
+
+
+def test_sync_workers(load_config):
+    config = load_config(GUNICORN_WORKER_CLASS="sync")
+
+    assert config.workers == 2 * config.available_cpus() + 1
+    assert config.threads == 1
+
+
+def test_explicit_worker_counts(load_config):
+    config = load_config(GUNICORN_WORKERS="3", GUNICORN_THREADS="16")
+
+    assert config.workers == 3
+    assert config.threads == 16
+
+
+def test_timeout_outlasts_a_coordinates_batch(load_config):
+    assert load_config().timeout == 85
+    assert (
+        load_config(COORDINATES_BATCH_DEADLINE="30", SIMBAD_TIMEOUT="5").timeout == 45
+    )
+    assert load_config(GUNICORN_TIMEOUT="120").timeout == 120
+
+
+def test_unknown_worker_class_falls_back_to_gthread(load_config):
+    assert load_config(GUNICORN_WORKER_CLASS="eventlet").worker_class == "gthread"
+
+
+def test_gevent_disables_preload(load_config):
+    with mock.patch("importlib.util.find_spec", return_value=object()):
+        config = load_config(GUNICORN_WORKER_CLASS="gevent")
+
+    assert config.worker_class == "gevent"
+    assert not config.preload_app
+
+
+def test_gevent_falls_back_to_gthread_when_not_installed(load_config):
+    with mock.patch("importlib.util.find_spec", return_value=None):
+        config = load_config(GUNICORN_WORKER_CLASS="gevent")
+
+    assert config.worker_class == "gthread"
+
+
+def test_workers_share_their_state_through_files(load_config, tmp_path):
+    config = load_config(
+        METRICS_DIR=str(tmp_path / "metrics"),
+        PROFILING_DIR=str(tmp_path / "profiles"),
+        EMAIL_STATUS_PATH=str(tmp_path / "email.sqlite"),
+    )
+
+    assert config.raw_env == [
+        f"METRICS_DIR={tmp_path / 'metrics'}",
+        f"PROFILING_DIR={tmp_path / 'profiles'}",
+        f"EMAIL_STATUS_PATH={tmp_path / 'email.sqlite'}",
+    ]
+
+
+def test_worker_exit_stops_the_pool_if_the_emails_are_not_sent():
+    worker = mock.Mock(pid=1)
+    with mock.patch(
+        "ska_oso_pht_services.utils.email_delivery.DELIVERY_QUEUE"
+    ) as delivery_queue, mock.patch(
+        "ska_oso_pht_services.utils.batch_validation.shutdown"
+    ) as shutdown:
+        delivery_queue.join.side_effect = KeyboardInterrupt
+        with pytest.raises(KeyboardInterrupt):
+            gunicorn_config.worker_exit(None, worker)
+
+    timeout = delivery_queue.join.call_args.kwargs["timeout"]
+    assert timeout < gunicorn_config.graceful_timeout
+    shutdown.assert_called_once()
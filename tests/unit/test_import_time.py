@@ -0,0 +1,30 @@
+"""
+Checks that importing the API does not load the heavy dependencies that only
+some of the endpoints use, measured with python -X importtime
+"""
+
+import os
+import subprocess
+import sys
+
+LAZY_MODULES = ("astropy", "astroquery", "boto3", "botocore")
+
+
+def test_api_import_does_not_load_lazy_dependencies():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import ska_oso_pht_services.api"],
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    imported = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            imported.add(line.split("|")[-1].strip())
+
+    loaded = sorted(
+        module for module in imported if module.split(".")[0] in LAZY_MODULES
+    )
+    assert not loaded
@@ -0,0 +1,101 @@
+"""
+Unit tests for ska_oso_pht_services.utils.json_patch
+"""
+
+import pytest
+
+from ska_oso_pht_services.utils.json_patch import apply_patch, patched_paths
+
+
+@pytest.fixture
+def document():
+    return {"info": {"title": "A", "targets": [{"id": 1}, {"id": 2}]}, "a/b": 0}
+
+
+@pytest.mark.parametrize(
+    "patch,expected",
+    [
+        (
+            [{"op": "replace", "path": "/info/title", "value": "B"}],
+            {"info": {"title": "B", "targets": [{"id": 1}, {"id": 2}]}, "a/b": 0},
+        ),
+        (
+            [{"op": "add", "path": "/info/targets/1", "value": {"id": 3}}],
+            {
+                "info": {"title": "A", "targets": [{"id": 1}, {"id": 3}, {"id": 2}]},
+                "a/b": 0,
+            },
+        ),
+        (
+            [{"op": "add", "path": "/info/targets/-", "value": {"id": 3}}],
+            {
+                "info": {"title": "A", "targets": [{"id": 1}, {"id": 2}, {"id": 3}]},
+                "a/b": 0,
+            },
+        ),
+        (
+            [{"op": "remove", "path": "/info/targets/0"}],
+            {"info": {"title": "A", "targets": [{"id": 2}]}, "a/b": 0},
+        ),
+        (
+            [{"op": "move", "from": "/info/title", "path": "/title"}],
+            {"info": {"targets": [{"id": 1}, {"id": 2}]}, "a/b": 0, "title": "A"},
+        ),
+        (
+            [{"op": "copy", "from": "/info/targets/0", "path": "/info/targets/-"}],
+            {
+                "info": {"title": "A", "targets": [{"id": 1}, {"id": 2}, {"id": 1}]},
+                "a/b": 0,
+            },
+        ),
+        (
+            [
+                {"op": "test", "path": "/a~1b", "value": 0},
+                {"op": "replace", "path": "/a~1b", "value": 1},
+            ],
+            {"info": {"title": "A", "targets": [{"id": 1}, {"id": 2}]}, "a/b": 1},
+        ),
+    ],
+)
+def test_apply_patch(document, patch, expected):
+    assert apply_patch(document, patch) == expected
+
+
+def test_apply_patch_does_not_modify_the_document(document):
+    patched = apply_patch(
+        document, [{"op": "replace", "path": "/info/targets/0/id", "value": 5}]
+    )
+
+    assert document["info"]["targets"][0] == {"id": 1}
+    assert patched["info"]["targets"][0] == {"id": 5}
+    # parts of the document which are not patched are shared
+    assert patched["info"]["targets"][1] is document["info"]["targets"][1]
+
+
+@pytest.mark.parametrize(
+    "patch",
+    [
+        {"op": "replace", "path": "/info/title", "value": "B"},
+        [{"op": "update", "path": "/info/title", "value": "B"}],
+        [{"op": "replace", "path": "info/title", "value": "B"}],
+        [{"op": "replace", "path": "/info/title"}],
+        [{"op": "replace", "path": "/info/abstract", "value": "B"}],
+        [{"op": "remove", "path": "/info/targets/2"}],
+        [{"op": "add", "path": "/info/targets/01", "value": {}}],
+        [{"op": "test", "path": "/info/title", "value": "B"}],
+        [{"op": "move", "from": "/info", "path": "/info/title"}],
+        [{"op": "remove", "path": ""}],
+    ],
+)
+def test_invalid_patch(document, patch):
+    with pytest.raises(ValueError):
+        apply_patch(document, patch)
+
+
+def test_patched_paths():
+    assert patched_paths(
+        [
+            {"op": "test", "path": "/info/title", "value": "A"},
+            {"op": "move", "from": "/info/targets/0", "path": "/info/targets/1"},
+        ]
+    ) == [["info", "targets", "1"], ["info", "targets", "0"]]
@@ -0,0 +1,133 @@
+"""
+Unit tests for ska_oso_pht_services.utils.metrics
+"""
+
+import os
+import time
+
+import pytest
+
+from ska_oso_pht_services.utils.metrics import (
+    EXITED_FILE,
+    Metrics,
+    clear_directory,
+    mark_process_dead,
+    read_directory,
+)
+
+
+def test_request_metrics():
+    metrics = Metrics(buckets=(0.1, 1))
+
+    metrics.start_request("proposal_get")
+    metrics.start_request("proposal_get")
+    metrics.end_request("proposal_get", 200, 0.05)
+
+    text = metrics.render()
+    assert 'pht_requests_total{operation="proposal_get",status="200"} 1' in text
+    assert 'pht_requests_in_flight{operation="proposal_get"} 1' in text
+    assert (
+        'pht_request_duration_seconds_bucket{operation="proposal_get",le="0.1"} 1'
+        in text
+    )
+    assert 'pht_request_duration_seconds_count{operation="proposal_get"} 1' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    metrics = Metrics(buckets=(0.1, 1))
+
+    for duration in (0.05, 0.5, 5):
+        metrics.observe_dependency("simbad", duration)
+
+    lines = metrics.render().splitlines()
+    assert (
+        'pht_dependency_duration_seconds_bucket{dependency="simbad",le="0.1"} 1'
+        in lines
+    )
+    assert (
+        'pht_dependency_duration_seconds_bucket{dependency="simbad",le="1"} 2' in lines
+    )
+    assert (
+        'pht_dependency_duration_seconds_bucket{dependency="simbad",le="+Inf"} 3'
+        in lines
+    )
+    assert 'pht_dependency_duration_seconds_sum{dependency="simbad"} 5.55' in lines
+
+
+def test_timed_records_failed_calls():
+    metrics = Metrics()
+
+    @metrics.timed("ned")
+    def query():
+        raise ConnectionError("NED down")
+
+    with pytest.raises(ConnectionError):
+        query()
+
+    assert 'pht_dependency_duration_seconds_count{dependency="ned"} 1' in (
+        metrics.render()
+    )
+
+
+def test_metrics_are_summed_over_the_processes(tmp_path):
+    other = Metrics(buckets=(0.1, 1), directory=str(tmp_path))
+    other.start_request("proposal_get")
+    other.end_request("proposal_get", 200, 0.05)
+    other.observe_dependency("oda", 0.5)
+    other.flush()
+    (tmp_path / f"{os.getpid()}.json").rename(tmp_path / "1.json")
+    metrics = Metrics(buckets=(0.1, 1), directory=str(tmp_path))
+    metrics.start_request("proposal_get")
+    metrics.end_request("proposal_get", 200, 0.5)
+    metrics.start_request("proposal_get")
+
+    lines = metrics.render().splitlines()
+
+    assert 'pht_requests_total{operation="proposal_get",status="200"} 2' in lines
+    assert 'pht_requests_in_flight{operation="proposal_get"} 1' in lines
+    assert (
+        'pht_request_duration_seconds_bucket{operation="proposal_get",le="0.1"} 1'
+        in lines
+    )
+    assert (
+        'pht_request_duration_seconds_bucket{operation="proposal_get",le="1"} 2'
+        in lines
+    )
+    assert 'pht_dependency_duration_seconds_count{dependency="oda"} 1' in lines
+
+
+def test_changes_are_flushed_after_the_interval(tmp_path):
+    metrics = Metrics(directory=str(tmp_path), flush_interval=0.05)
+
+    metrics.observe_dependency("simbad", 0.1)
+    metrics.observe_dependency("simbad", 0.1)
+    time.sleep(0.5)
+
+    state = read_directory(str(tmp_path))
+    assert state.dependency_durations["simbad"].count == 2
+
+
+def test_exited_process_keeps_its_counters(tmp_path):
+    metrics = Metrics(directory=str(tmp_path))
+    metrics.start_request("proposal_get")
+    metrics.end_request("proposal_get", 200, 0.05)
+    metrics.start_request("proposal_get")
+    metrics.flush()
+
+    mark_process_dead(str(tmp_path), os.getpid())
+    mark_process_dead(str(tmp_path), os.getpid())
+
+    state = read_directory(str(tmp_path))
+    assert state.requests == {("proposal_get", 200): 1}
+    assert state.in_flight == {}
+    # a later process with the same pid adds to the exited counters, which
+    # are kept in a single file
+    metrics.flush()
+    mark_process_dead(str(tmp_path), os.getpid())
+    state = read_directory(str(tmp_path))
+    assert state.requests == {("proposal_get", 200): 2}
+    assert state.request_durations["proposal_get"].count == 2
+    assert state.in_flight == {}
+    assert [path.name for path in tmp_path.iterdir()] == [EXITED_FILE]
+    clear_directory(str(tmp_path))
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,109 @@
+"""
+Unit tests for ska_oso_pht_services.utils.profiling
+"""
+
+import time
+
+from ska_oso_pht_services.utils.profiling import Profiler, render_text
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_one_profile_at_a_time():
+    profiler = Profiler(max_per_minute=10, max_stored=5)
+
+    assert profiler.acquire()
+    assert not profiler.acquire()
+    profiler.release()
+    assert profiler.acquire()
+
+
+def test_profiles_per_minute_are_limited():
+    clock = FakeClock()
+    profiler = Profiler(max_per_minute=2, max_stored=5, clock=clock)
+
+    for _ in range(2):
+        assert profiler.acquire()
+        profiler.release()
+    assert not profiler.acquire()
+
+    clock.now = 60
+    assert profiler.acquire()
+    profiler.release()
+
+
+def test_rate_limited_acquire_does_not_hold_the_profile():
+    profiler = Profiler(max_per_minute=0, max_stored=5)
+
+    assert not profiler.acquire()
+    profiler.max_per_minute = 1
+    assert profiler.acquire()
+
+
+def test_run_stores_profile_even_if_function_raises():
+    profiler = Profiler(max_per_minute=10, max_stored=5)
+
+    def fail():
+        raise ValueError("boom")
+
+    try:
+        profiler.run("failed", fail)
+    except ValueError:
+        pass
+
+    assert profiler.get("failed") is not None
+
+
+def test_only_latest_profiles_are_kept():
+    profiler = Profiler(max_per_minute=10, max_stored=2)
+
+    for profile_id in ("a", "b", "c"):
+        assert profiler.run(profile_id, sum, [1, 2]) == 3
+
+    assert profiler.get("a") is None
+    assert profiler.get("b") is not None
+    assert profiler.get("c") is not None
+
+
+def test_render_text():
+    profiler = Profiler(max_per_minute=10, max_stored=2)
+
+    def profiled_function():
+        return sorted(range(100), reverse=True)
+
+    profiler.run("id", profiled_function)
+
+    text = render_text(profiler.get("id"))
+    assert "cumulative" in text
+    assert "profiled_function" in text
+
+
+def test_profiles_are_shared_through_the_directory(tmp_path):
+    profiler = Profiler(max_per_minute=10, max_stored=2, directory=str(tmp_path))
+    other = Profiler(max_per_minute=10, max_stored=2, directory=str(tmp_path))
+
+    for profile_id in ("a", "b", "c"):
+        profiler.run(profile_id, sum, [1, 2])
+        # distinct modification times for keeping the latest profiles
+        time.sleep(0.02)
+
+    assert other.get("a") is None
+    assert other.get("b") is not None
+    assert "cumulative" in render_text(other.get("c"))
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "b.pstats",
+        "c.pstats",
+    ]
+
+
+def test_profile_id_is_not_a_path(tmp_path):
+    (tmp_path / "secret.pstats").write_bytes(b"secret")
+    profiler = Profiler(directory=str(tmp_path / "profiles"))
+
+    assert profiler.get("../secret") is None
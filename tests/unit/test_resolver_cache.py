@@ -0,0 +1,114 @@
+"""
+Unit tests for ska_oso_pht_services.utils.resolver_cache
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from ska_oso_pht_services.utils.resolver_cache import (
+    MemoryBackend,
+    ResolverCache,
+    SQLiteBackend,
+    normalise_name,
+)
+
+M31 = {"ra": "00:42:44.330", "dec": "+41:16:07.500", "velocity": -300.0}
+NOT_FOUND = "Object not found in SIMBAD or NED"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteBackend(str(tmp_path / "cache.sqlite"), maxsize=2)
+    return MemoryBackend(maxsize=2)
+
+
+def test_normalise_name():
+    assert normalise_name("M31") == normalise_name("  m31 ")
+    assert normalise_name("NGC  224") == normalise_name("ngc 224")
+
+
+def test_get_or_resolve_caches_by_normalised_name(backend):
+    cache = ResolverCache(backend, clock=FakeClock())
+    resolve = MagicMock(return_value=M31)
+
+    assert cache.get_or_resolve("M31", resolve) == M31
+    assert cache.get_or_resolve(" m31 ", resolve) == M31
+
+    resolve.assert_called_once_with("M31")
+    assert cache.stats() == {"hits": 1, "negative_hits": 0, "misses": 1, "size": 1}
+
+
+def test_entries_expire_after_ttl(backend):
+    clock = FakeClock()
+    cache = ResolverCache(backend, ttl=60, clock=clock)
+    resolve = MagicMock(return_value=M31)
+
+    cache.get_or_resolve("M31", resolve)
+    clock.now += 61
+    cache.get_or_resolve("M31", resolve)
+
+    assert resolve.call_count == 2
+
+
+def test_not_found_results_use_negative_ttl(backend):
+    clock = FakeClock()
+    cache = ResolverCache(backend, ttl=3600, negative_ttl=10, clock=clock)
+    resolve = MagicMock(return_value=NOT_FOUND)
+
+    assert cache.get_or_resolve("unknown", resolve) == NOT_FOUND
+    assert cache.get_or_resolve("unknown", resolve) == NOT_FOUND
+    assert resolve.call_count == 1
+    assert cache.stats()["negative_hits"] == 1
+
+    clock.now += 11
+    cache.get_or_resolve("unknown", resolve)
+    assert resolve.call_count == 2
+
+
+def test_least_recently_used_entry_is_evicted(backend):
+    clock = FakeClock()
+    cache = ResolverCache(backend, clock=clock)
+    resolve = MagicMock(side_effect=lambda name: {"name": name})
+
+    cache.get_or_resolve("M1", resolve)
+    clock.now += 1
+    cache.get_or_resolve("M31", resolve)
+    clock.now += 1
+    cache.get_or_resolve("M1", resolve)
+    clock.now += 1
+    cache.get_or_resolve("M42", resolve)
+    clock.now += 1
+    cache.get_or_resolve("M1", resolve)
+    cache.get_or_resolve("M31", resolve)
+
+    assert [c.args[0] for c in resolve.call_args_list] == ["M1", "M31", "M42", "M31"]
+
+
+def test_resolver_errors_are_not_cached(backend):
+    cache = ResolverCache(backend, clock=FakeClock())
+    resolve = MagicMock(side_effect=[ConnectionError("SIMBAD down"), M31])
+
+    with pytest.raises(ConnectionError):
+        cache.get_or_resolve("M31", resolve)
+    assert cache.get_or_resolve("M31", resolve) == M31
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    resolve = MagicMock(return_value=M31)
+
+    ResolverCache(SQLiteBackend(path)).get_or_resolve("M31", resolve)
+    other_worker = ResolverCache(SQLiteBackend(path))
+
+    assert other_worker.get_or_resolve("M31", resolve) == M31
+    resolve.assert_called_once()
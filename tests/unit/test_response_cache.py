@@ -0,0 +1,26 @@
+"""
+Unit tests for ska_oso_pht_services.utils.response_cache
+"""
+
+from ska_oso_pht_services.utils.response_cache import ProposalResponseCache
+
+
+def test_get_returns_only_cached_version():
+    cache = ProposalResponseCache()
+    etag = cache.put("prsl-1", 1, b'{"prsl_id": "prsl-1"}')
+
+    assert cache.get("prsl-1", 1) == (etag, b'{"prsl_id": "prsl-1"}')
+    assert cache.get("prsl-1", 2) is None
+
+
+def test_invalidate_and_eviction():
+    cache = ProposalResponseCache(maxsize=2)
+    cache.put("prsl-1", 1, b"1")
+    cache.put("prsl-2", 1, b"2")
+    cache.invalidate("prsl-1")
+    cache.put("prsl-3", 1, b"3")
+    cache.put("prsl-4", 1, b"4")
+
+    assert cache.get("prsl-1", 1) is None
+    assert cache.get("prsl-2", 1) is None
+    assert cache.get("prsl-4", 1) is not None
@@ -1,12 +1,22 @@
 import unittest
+from unittest.mock import MagicMock
 
 import boto3
+import requests
 from moto import mock_aws
 
 from ska_oso_pht_services.utils.s3_bucket import (
+    PresignedUrlCache,
+    abort_multipart_upload,
+    complete_multipart_upload,
+    create_multipart_upload,
     create_presigned_url_delete_pdf,
     create_presigned_url_download_pdf,
     create_presigned_url_upload_pdf,
+    get_aws_client,
+    get_presigned_url,
+    get_presigned_urls,
+    reset_aws_client,
 )
 
 PRESIGNED_URL_EXPIRY_TIME = 60
@@ -68,3 +78,121 @@ class TestS3Bucket(unittest.TestCase):
             ExpiresIn=PRESIGNED_URL_EXPIRY_TIME,
         )
         assert result == from_client
+
+    def test_get_aws_client_is_shared(self):
+        reset_aws_client()
+
+        assert get_aws_client() is get_aws_client()
+
+    def test_get_presigned_url_is_cached(self):
+        reset_aws_client()
+
+        first = get_presigned_url("get_object", "example.pdf", bucket="mybucket")
+        second = get_presigned_url("get_object", "example.pdf", bucket="mybucket")
+        other = get_presigned_url("put_object", "example.pdf", bucket="mybucket")
+
+        assert first == second
+        assert first != other
+        assert "example.pdf" in first
+
+    def test_get_presigned_urls(self):
+        reset_aws_client()
+
+        result = get_presigned_urls(
+            [("upload", "a.pdf"), ("download", "b.pdf")], bucket="mybucket"
+        )
+
+        assert result == [
+            get_presigned_url("put_object", "a.pdf", bucket="mybucket"),
+            get_presigned_url("get_object", "b.pdf", bucket="mybucket"),
+        ]
+
+    def test_get_presigned_urls_rejects_unknown_operation(self):
+        with self.assertRaises(ValueError):
+            get_presigned_urls([("copy", "a.pdf")], bucket="mybucket")
+
+    def test_multipart_upload(self):
+        s3 = boto3.client("s3")
+        first_part = b"a" * 5 * 1024 * 1024
+        last_part = b"b" * 10
+
+        upload_id, urls = create_multipart_upload("large.pdf", 2, s3, 60, "mybucket")
+
+        assert len(urls) == 2
+        assert all(upload_id in url for url in urls)
+        parts = [
+            (part_number, requests.put(url, data=data, timeout=10).headers["ETag"])
+            for part_number, url, data in zip(
+                (2, 1), reversed(urls), (last_part, first_part)
+            )
+        ]
+        complete_multipart_upload("large.pdf", upload_id, parts, s3, "mybucket")
+
+        body = s3.get_object(Bucket="mybucket", Key="large.pdf")["Body"].read()
+        assert body == first_part + last_part
+
+    def test_abort_multipart_upload(self):
+        s3 = boto3.client("s3")
+        upload_id, _ = create_multipart_upload("large.pdf", 1, s3, 60, "mybucket")
+
+        abort_multipart_upload("large.pdf", upload_id, s3, "mybucket")
+
+        assert "Uploads" not in s3.list_multipart_uploads(Bucket="mybucket")
+        with self.assertRaises(ValueError):
+            abort_multipart_upload("large.pdf", upload_id, s3, "mybucket")
+
+    def test_create_multipart_upload_rejects_invalid_parts(self):
+        s3 = boto3.client("s3")
+
+        with self.assertRaises(ValueError):
+            create_multipart_upload("large.pdf", 0, s3, 60, "mybucket")
+
+    def test_create_multipart_upload_in_unknown_bucket(self):
+        s3 = boto3.client("s3")
+
+        with self.assertRaises(ValueError):
+            create_multipart_upload("large.pdf", 1, s3, 60, "otherbucket")
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPresignedUrlCache(unittest.TestCase):
+    def test_url_is_reused_while_valid_for_min_validity(self):
+        clock = FakeClock()
+        cache = PresignedUrlCache(min_validity=30, clock=clock)
+        create = MagicMock(side_effect=["url1", "url2"])
+
+        assert cache.get_or_create(("get_object", "a.pdf"), 60, create) == "url1"
+        clock.now += 30
+        assert cache.get_or_create(("get_object", "a.pdf"), 60, create) == "url1"
+        clock.now += 1
+        assert cache.get_or_create(("get_object", "a.pdf"), 60, create) == "url2"
+
+    def test_short_lived_urls_are_not_cached(self):
+        cache = PresignedUrlCache(min_validity=30, clock=FakeClock())
+        create = MagicMock(side_effect=["url1", "url2"])
+
+        cache.get_or_create(("get_object", "a.pdf"), 10, create)
+        cache.get_or_create(("get_object", "a.pdf"), 10, create)
+
+        assert create.call_count == 2
+
+    def test_least_recently_used_url_is_evicted(self):
+        cache = PresignedUrlCache(maxsize=1, clock=FakeClock())
+        create = MagicMock(side_effect=lambda: str(create.call_count))
+
+        cache.get_or_create("a", 60, create)
+        cache.get_or_create("b", 60, create)
+        cache.get_or_create("a", 60, create)
+
+        assert create.call_count == 3
+
+
+def teardown_module():
+    reset_aws_client()
@@ -0,0 +1,66 @@
+"""
+Unit tests for ska_oso_pht_services.utils.validation
+"""
+
+import json
+
+from ska_oso_pdm import Proposal
+
+from ska_oso_pht_services.utils import validation
+
+from .util import VALID_PROPOSAL_POST_VALIDATE_BODY_JSON_PASSING
+
+
+def _proposal() -> Proposal:
+    return Proposal.model_validate(
+        json.loads(VALID_PROPOSAL_POST_VALIDATE_BODY_JSON_PASSING)
+    )
+
+
+def test_index_holds_result_references():
+    proposal = _proposal()
+
+    index = validation.ProposalIndex.build(proposal)
+
+    assert index.target_refs == {
+        result.target_ref for result in proposal.info.result_details
+    }
+    assert index.observation_set_refs == {
+        result.observation_set_ref for result in proposal.info.result_details
+    }
+
+
+def test_rules_are_registered_in_order():
+    assert [rule.name for rule in validation.RULES] == [
+        "has_observation_sets",
+        "targets_have_results",
+        "observation_sets_have_targets",
+    ]
+
+
+def test_unlinked_target_and_observation_set():
+    proposal = _proposal()
+    proposal.info.result_details = []
+
+    result = validation.validate_proposal(proposal)
+
+    assert not result["result"]
+    assert len(result["validation_errors"]) == len(proposal.info.targets) + len(
+        proposal.info.observation_sets
+    )
+
+
+def test_registered_rule_runs_over_the_index(monkeypatch):
+    monkeypatch.setattr(validation, "RULES", list(validation.RULES))
+
+    @validation.rule("title")
+    def has_title(index):
+        return [] if index.proposal.info.title else ["This proposal has no title"]
+
+    proposal = _proposal()
+    proposal.info.title = ""
+
+    assert validation.validate_proposal(proposal) == {
+        "result": False,
+        "validation_errors": ["This proposal has no title"],
+    }
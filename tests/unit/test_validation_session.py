@@ -0,0 +1,120 @@
+"""
+Unit tests for ska_oso_pht_services.utils.validation_session
+"""
+
+import json
+from unittest import mock
+
+import pytest
+
+from ska_oso_pht_services.utils import validation
+from ska_oso_pht_services.utils.validation_session import (
+    StaleSessionError,
+    ValidationSessions,
+)
+
+from .util import (
+    VALID_PROPOSAL_POST_VALIDATE_BODY_JSON_NO_TARGET_IN_RESULT,
+    VALID_PROPOSAL_POST_VALIDATE_BODY_JSON_PASSING,
+)
+
+
+@pytest.fixture
+def sessions():
+    return ValidationSessions(maxsize=2)
+
+
+def _body(data: str = VALID_PROPOSAL_POST_VALIDATE_BODY_JSON_PASSING) -> dict:
+    return json.loads(data)
+
+
+def _full_result(body: dict) -> dict:
+    return ValidationSessions().validate("other", body)[0]
+
+
+def test_patch_gives_the_same_result_as_full_validation(sessions):
+    body = _body()
+    result, version = sessions.validate("prsl-1", body)
+    assert result["result"]
+    patch = [{"op": "replace", "path": "/info/result_details", "value": []}]
+
+    result, new_version = sessions.validate_patch("prsl-1", patch, version)
+
+    assert not result["result"]
+    assert new_version != version
+    body["info"]["result_details"] = []
+    assert result == _full_result(body)
+
+
+def test_patch_only_runs_affected_rules(sessions, monkeypatch):
+    _, version = sessions.validate("prsl-1", _body())
+    checks = [mock.Mock(wraps=rule.check) for rule in validation.RULES]
+    monkeypatch.setattr(
+        validation,
+        "RULES",
+        [
+            validation.Rule(rule.name, rule.sections, check)
+            for rule, check in zip(validation.RULES, checks)
+        ],
+    )
+    patch = [{"op": "replace", "path": "/info/title", "value": "New title"}]
+
+    result, _ = sessions.validate_patch("prsl-1", patch, version)
+
+    assert result == {"result": True, "validation_errors": []}
+    for check in checks:
+        check.assert_not_called()
+
+
+def test_patched_target_section_is_validated(sessions):
+    _, version = sessions.validate("prsl-1", _body())
+    patch = [{"op": "add", "path": "/info/targets/-", "value": {"target_id": 5}}]
+
+    with pytest.raises(ValueError):
+        sessions.validate_patch("prsl-1", patch, version)
+
+
+def test_patch_outside_info_runs_full_validation(sessions):
+    body = _body(VALID_PROPOSAL_POST_VALIDATE_BODY_JSON_NO_TARGET_IN_RESULT)
+    _, version = sessions.validate("prsl-1", body)
+    patch = [{"op": "replace", "path": "/cycle", "value": "SKA_2000_2025"}]
+
+    result, _ = sessions.validate_patch("prsl-1", patch, version)
+
+    body["cycle"] = "SKA_2000_2025"
+    assert result == _full_result(body)
+
+
+def test_patch_unknown_proposal(sessions):
+    with pytest.raises(KeyError):
+        sessions.validate_patch("prsl-1", [], None)
+
+
+def test_patch_of_another_version_is_rejected(sessions):
+    _, version = sessions.validate("prsl-1", _body())
+    _, new_version = sessions.validate_patch("prsl-1", [], version)
+
+    with pytest.raises(StaleSessionError):
+        sessions.validate_patch("prsl-1", [], version)
+    with pytest.raises(StaleSessionError):
+        sessions.validate_patch("prsl-1", [], None)
+    assert sessions.validate_patch("prsl-1", [], new_version)[0]["result"]
+
+
+def test_invalidated_session_is_removed(sessions):
+    _, version = sessions.validate("prsl-1", _body())
+
+    sessions.invalidate("prsl-1")
+
+    with pytest.raises(KeyError):
+        sessions.validate_patch("prsl-1", [], version)
+
+
+def test_sessions_are_bounded(sessions):
+    versions = [
+        sessions.validate(prsl_id, _body())[1] for prsl_id in ("p1", "p2", "p3")
+    ]
+
+    with pytest.raises(KeyError):
+        sessions.validate_patch("p1", [], versions[0])
+    assert sessions.validate_patch("p3", [], versions[2])[0]["result"]